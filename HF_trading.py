@@ -1,50 +1,58 @@
-import requests
-import time
-import pandas as pd
-import numpy as np
-import inquirer  # Pour la sélection interactive
+import os
+from candle_cache import fetch_ohlcv_cached
+from profiling import LoopProfiler, stage
+from scheduler import wait_next_tick
+from event_sink import emit
+from analytics import StreamingAnalytics
+from ledger import NetWorthHistory, TradeLedger, cumulative_note, journal_path
+from indicators import IndicatorEngine
+
+PERFORMANCE_MESSAGE = ("\nPerformance après itération {iteration}:\n"
+                       "Valeur nette : {net_worth:.2f} USD\n"
+                       "Profit/Pertes : {profit:.2f} USD\n"
+                       "Transactions totales : {trades}{trades_note}\n"
+                       "Drawdown max : {max_drawdown:.2%}, Sharpe : {sharpe:.3f}, "
+                       "Réussite : {win_rate:.0%} ({closed_trades} trades, PnL moyen {average_trade_pnl:.2f} USD)")
 
 class TradingBot:
-    def __init__(self, initial_balance):
+    def __init__(self, initial_balance, journal_dir=None):
         self.initial_balance = initial_balance
         self.balance = initial_balance  # Capital fictif en USD
         self.crypto_balance = 0  # Quantité de crypto détenue (générique)
-        self.trade_history = []  # Historique des transactions
-        self.net_worth_history = []  # Historique de la valeur nette
+        self.trade_history = TradeLedger(path=journal_path(journal_dir, 'trades.bin'))  # Historique des transactions
+        self.trades_note = cumulative_note(self.trade_history)  # Journal repris : compteur cumulé
+        self.net_worth_history = NetWorthHistory(path=journal_path(journal_dir, 'net_worth.bin'))  # Historique de la valeur nette
+        self.analytics = StreamingAnalytics()  # Statistiques de performance en O(1)
+        self.entry_value = 0  # Montant investi lors du dernier achat
 
     def buy(self, price, iteration):
         if self.balance > 0:
             self.crypto_balance = self.balance / price
             self.trade_history.append(("BUY", price, self.crypto_balance))
+            self.entry_value = self.balance
             self.balance = 0
-            print(f"[{iteration}] Achat simulé : {self.crypto_balance:.4f} crypto à {price:.2f} USD")
+            emit('trade', "[{iteration}] Achat simulé : {quantity:.4f} crypto à {price:.2f} USD",
+                 side='BUY', iteration=iteration, price=price, quantity=self.crypto_balance)
 
     def sell(self, price, iteration):
         if self.crypto_balance > 0:
             self.balance = self.crypto_balance * price
             self.trade_history.append(("SELL", price, self.balance))
             self.crypto_balance = 0
-            print(f"[{iteration}] Vente simulée : {self.balance:.2f} USD à {price:.2f} USD")
+            self.analytics.record_trade(self.balance - self.entry_value)
+            emit('trade', "[{iteration}] Vente simulée : {value:.2f} USD à {price:.2f} USD",
+                 side='SELL', iteration=iteration, price=price, value=self.balance)
 
     def show_performance(self, current_price, iteration):
         net_worth = self.balance + (self.crypto_balance * current_price)
         profit = net_worth - self.initial_balance
         self.net_worth_history.append(net_worth)
-        print(f"\nPerformance après itération {iteration}:")
-        print(f"Valeur nette : {net_worth:.2f} USD")
-        print(f"Profit/Pertes : {profit:.2f} USD")
-        print(f"Transactions totales : {len(self.trade_history)}")
-
-def fetch_ohlcv(symbol='ETHUSDT', interval='1m', limit=100):
-    """Récupère les données OHLCV (Open, High, Low, Close, Volume) pour une paire donnée"""
-    url = f'https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}'
-    response = requests.get(url)
-    data = response.json()
-
-    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df['close'] = df['close'].astype(float)
-    return df[['timestamp', 'close']]
+        self.analytics.update_net_worth(net_worth)
+        emit('performance', PERFORMANCE_MESSAGE, iteration=iteration, price=current_price, net_worth=net_worth,
+             profit=profit, trades=len(self.trade_history), trades_note=self.trades_note,
+             max_drawdown=self.analytics.max_drawdown,
+             sharpe=self.analytics.sharpe, win_rate=self.analytics.win_rate, closed_trades=self.analytics.trades,
+             average_trade_pnl=self.analytics.average_trade_pnl)
 
 def rsi(data, period=14):  # RSI modifié à 14
     """Calcul du RSI (Relative Strength Index)"""
@@ -63,15 +71,25 @@ def macd(data, fast_period=12, slow_period=26, signal_period=9):  # MACD standar
     signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
     return macd_line, signal_line
 
-def ultra_aggressive_trade_signal(data):
+def ultra_aggressive_trade_signal(data, engine=None, registry=None, symbol=None, interval='1m'):
     """Logique ultra agressive pour acheter et vendre"""
-    data['RSI'] = rsi(data)
-    data['MACD_Line'], data['Signal_Line'] = macd(data)
-
-    last_row = data.iloc[-1]
+    if registry is not None:
+        # Indicateurs partagés en lecture seule avec les autres stratégies du symbole
+        with stage('indicators'):
+            last_row = registry.last_row(symbol, interval, data, ('RSI', 'MACD_Line', 'Signal_Line'))
+    elif engine is not None:
+        # Mise à jour incrémentale : seule la dernière bougie est recalculée
+        with stage('indicators'):
+            last_row = engine.sync(data)
+    else:
+        with stage('indicators'):
+            data['RSI'] = rsi(data)
+            data['MACD_Line'], data['Signal_Line'] = macd(data)
+            last_row = data.iloc[-1]
     
     # Afficher les valeurs RSI et MACD dans le terminal pour mieux comprendre les conditions
-    print(f"RSI: {last_row['RSI']:.2f}, MACD Line: {last_row['MACD_Line']:.2f}, Signal Line: {last_row['Signal_Line']:.2f}")
+    emit('indicators', "RSI: {RSI:.2f}, MACD Line: {MACD_Line:.2f}, Signal Line: {Signal_Line:.2f}",
+         symbol=symbol, RSI=last_row['RSI'], MACD_Line=last_row['MACD_Line'], Signal_Line=last_row['Signal_Line'])
 
     # Signaux de trading très agressifs : entrée immédiate dès qu'un signal RSI ou MACD apparaît
     if last_row['RSI'] > 70 and last_row['MACD_Line'] < last_row['Signal_Line']:  # Surachat
@@ -82,6 +100,8 @@ def ultra_aggressive_trade_signal(data):
 
 def select_crypto():
     """Sélectionne une cryptomonnaie à trader via un menu interactif"""
+    import inquirer  # Importé seulement pour le menu interactif (démarrage plus rapide)
+
     questions = [
         inquirer.List('crypto',
                       message="Choisissez la cryptomonnaie à trader",
@@ -91,34 +111,48 @@ def select_crypto():
     answers = inquirer.prompt(questions)
     return answers['crypto']
 
+def run_iteration(bot, engine, symbol, interval, iteration, fetch=fetch_ohlcv_cached):
+    """Une itération de la boucle : données, signal, ordres et affichage"""
+    with stage('tick'):
+        with stage('fetch'):
+            data = fetch(symbol, interval)
+        with stage('signal'):
+            signal = ultra_aggressive_trade_signal(data, engine)
+        price = data['close'].iloc[-1]
+
+        with stage('print'):
+            emit('tick', "\n--- Iteration {iteration} ---\nPrix actuel : {price:.2f} USD",
+                 iteration=iteration, symbol=symbol, price=price, signal=signal)
+
+        with stage('execution'):
+            if signal == 'BUY':
+                bot.buy(price, iteration)
+            elif signal == 'SELL':
+                bot.sell(price, iteration)
+            else:
+                emit('hold', "[{iteration}] Aucune action. En attente du prochain signal...", iteration=iteration)
+
+        with stage('performance'):
+            bot.show_performance(price, iteration)
+    return signal
+
 def main():
     """Fonction principale"""
     symbol = select_crypto()
 
     print(f"Vous avez sélectionné {symbol} pour le trading.")
     
-    bot = TradingBot(initial_balance=1000)  
+    bot = TradingBot(initial_balance=1000, journal_dir=os.path.join('journal', 'HF_trading', symbol))  
+    engine = IndicatorEngine(sma_periods=())
     interval = '1m'
+    profiler = LoopProfiler.from_env()
 
     iteration = 0
-    while True:  
+    while True:
         iteration += 1
-        data = fetch_ohlcv(symbol, interval)
-        signal = ultra_aggressive_trade_signal(data)
-        price = data['close'].iloc[-1]
-
-        print(f"\n--- Iteration {iteration} ---")
-        print(f"Prix actuel : {price:.2f} USD")
-
-        if signal == 'BUY':
-            bot.buy(price, iteration)
-        elif signal == 'SELL':
-            bot.sell(price, iteration)
-        else:
-            print(f"[{iteration}] Aucune action. En attente du prochain signal...")
-
-        bot.show_performance(price, iteration)
-        time.sleep(5)  # Pause légèrement plus longue pour éviter les trades trop fréquents
+        run_iteration(bot, engine, symbol, interval, iteration)
+        profiler.after_iteration(iteration)
+        wait_next_tick(interval)  # Réveil après la clôture (BOT_LIVE_POLL pour suivre la bougie en cours)
 
 if __name__ == '__main__':
     main()
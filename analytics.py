@@ -0,0 +1,118 @@
+"""Statistiques de performance mises à jour en O(1) à chaque tick.
+
+Rendements, volatilité, Sharpe/Sortino, drawdown maximal, taux de réussite et
+PnL moyen par transaction sont tenus à jour par accumulateurs (algorithme de
+Welford pour la variance) : les interroger ne parcourt jamais l'historique.
+"""
+import math
+
+
+class StreamingAnalytics:
+    """Accumulateurs de performance d'un bot"""
+
+    def __init__(self, periods_per_year=None):
+        self.periods_per_year = periods_per_year  # Pour annualiser Sharpe/Sortino (None = par tick)
+        self.first_value = None
+        self.last_value = None
+        self.ticks = 0
+        # Rendements par tick (Welford)
+        self.returns = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside_sq = 0.0
+        # Drawdown
+        self.peak = None
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        # Transactions clôturées
+        self.trades = 0
+        self.wins = 0
+        self.total_pnl = 0.0
+
+    def update_net_worth(self, value):
+        """Nouvelle valeur nette (appelé une fois par itération)"""
+        self.ticks += 1
+        if self.first_value is None:
+            self.first_value = value
+        r = None
+        if self.last_value:
+            r = value / self.last_value - 1
+        elif self.last_value == 0:
+            # Valeur nette nulle au tick précédent : rendement nul si elle le reste, indéfini (ignoré) sinon
+            r = 0.0 if value == 0 else None
+        if r is not None:
+            self.returns += 1
+            delta = r - self.mean
+            self.mean += delta / self.returns
+            self.m2 += delta * (r - self.mean)
+            if r < 0:
+                self.downside_sq += r * r
+        self.last_value = value
+
+        if self.peak is None or value > self.peak:
+            self.peak = value
+        self.drawdown = value / self.peak - 1 if self.peak else 0.0
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+
+    def record_trade(self, pnl):
+        """PnL d'une position clôturée"""
+        self.trades += 1
+        self.total_pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+
+    def _annualize(self):
+        return math.sqrt(self.periods_per_year) if self.periods_per_year else 1.0
+
+    @property
+    def total_return(self):
+        if not self.first_value:
+            return 0.0
+        return self.last_value / self.first_value - 1
+
+    @property
+    def volatility(self):
+        """Écart-type des rendements par tick"""
+        return math.sqrt(self.m2 / (self.returns - 1)) if self.returns > 1 else 0.0
+
+    @property
+    def sharpe(self):
+        volatility = self.volatility
+        return self.mean / volatility * self._annualize() if volatility else 0.0
+
+    @property
+    def sortino(self):
+        downside = math.sqrt(self.downside_sq / self.returns) if self.returns else 0.0
+        return self.mean / downside * self._annualize() if downside else 0.0
+
+    @property
+    def win_rate(self):
+        return self.wins / self.trades if self.trades else 0.0
+
+    @property
+    def average_trade_pnl(self):
+        return self.total_pnl / self.trades if self.trades else 0.0
+
+    def snapshot(self):
+        """Toutes les statistiques courantes"""
+        return {
+            'ticks': self.ticks,
+            'net_worth': self.last_value,
+            'total_return': self.total_return,
+            'mean_return': self.mean,
+            'volatility': self.volatility,
+            'sharpe': self.sharpe,
+            'sortino': self.sortino,
+            'drawdown': self.drawdown,
+            'max_drawdown': self.max_drawdown,
+            'trades': self.trades,
+            'win_rate': self.win_rate,
+            'average_trade_pnl': self.average_trade_pnl,
+        }
+
+    def state(self):
+        """Accumulateurs bruts (checkpoint)"""
+        return dict(vars(self))
+
+    def load_state(self, state):
+        vars(self).update(state)
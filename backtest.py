@@ -0,0 +1,284 @@
+"""Backtest vectorisé des stratégies existantes sur un historique OHLCV.
+
+Les signaux de toutes les bougies sont calculés en une passe sur des tableaux
+NumPy. La simulation reproduit `TradingBot.buy/sell/short/cover` et
+`manage_risk()` (Stop-Loss / Take-Profit à la clôture) de la boucle en direct,
+en sautant directement d'un événement au suivant au lieu de parcourir chaque
+bougie.
+
+Différences avec la boucle en direct, qui recalcule ses indicateurs sur les 100
+dernières bougies à chaque tick (sans `IndicatorEngine`) :
+- les EMA du MACD sont calculées sur tout l'historique ;
+- la tendance du Supertrend (qui ne bascule que lorsque la clôture franchit une
+  bande) est suivie sur tout l'historique, alors que la boucle fenêtrée repart
+  d'une tendance haussière au début de chaque fenêtre : les signaux peuvent
+  différer jusqu'au prochain franchissement. `supertrend_signals(window=100)`
+  reproduit ce comportement fenêtré. supertrend.py avec son `IndicatorEngine`
+  suit la tendance comme le backtest par défaut.
+
+Avec `intrabar`, le Stop-Loss et le Take-Profit sont évalués sur le plus haut et
+le plus bas de chaque bougie, comme le moteur de déclencheurs (triggers.py) qui
+les surveille à chaque transaction : la sortie se fait au niveau atteint. Si
+les deux niveaux sont touchés dans la même bougie, le Stop-Loss est retenu
+(hypothèse prudente).
+"""
+import argparse
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from vectorized import macd_np, rsi_np, sma_np, supertrend_np
+
+HOLD, BUY, SELL, SHORT, COVER = range(5)
+SIGNAL_NAMES = ('HOLD', 'BUY', 'SELL', 'SHORT', 'COVER')
+
+
+def rsi_macd_signals(data, rsi_period=14, fast_period=12, slow_period=26, signal_period=9):
+    """`ultra_aggressive_trade_signal` / `combined_trade_signal` sur toutes les bougies"""
+    rsi_values = rsi_np(data['close'], rsi_period)
+    macd_line, signal_line = macd_np(data['close'], fast_period, slow_period, signal_period)
+    signals = np.zeros(rsi_values.shape, dtype=np.int8)
+    signals[(rsi_values < 30) & (macd_line > signal_line)] = BUY
+    signals[(rsi_values > 70) & (macd_line < signal_line)] = SELL
+    return signals
+
+
+def windowed_supertrend(high, low, close, period=10, multiplier=3, window=100, chunk=2048):
+    """Supertrend de chaque bougie recalculé sur ses `window` dernières bougies seulement"""
+    columns = [np.asarray(column, dtype=np.float64) for column in (high, low, close)]
+    # Fenêtres incomplètes du début : elles commencent à la première bougie, comme l'historique complet
+    values, _ = supertrend_np(*(column[:window] for column in columns), period, multiplier)
+    if len(columns[2]) <= window:
+        return values
+    result = np.empty(len(columns[2]))
+    result[:window] = values
+    views = [sliding_window_view(column, window) for column in columns]
+    for start in range(1, len(views[0]), chunk):
+        rows = [view[start:start + chunk] for view in views]
+        stop = start + len(rows[0])
+        result[start + window - 1:stop + window - 1] = supertrend_np(*rows, period, multiplier)[0][:, -1]
+    return result
+
+
+def supertrend_signals(data, period=10, multiplier=3, window=None):
+    """`trade_signal` de supertrend.py sur toutes les bougies (sur `window` bougies glissantes si fourni)"""
+    if window:
+        values = windowed_supertrend(data['high'], data['low'], data['close'], period, multiplier, window)
+    else:
+        values, _ = supertrend_np(data['high'], data['low'], data['close'], period, multiplier)
+    close = np.asarray(data['close'], dtype=np.float64)
+    signals = np.zeros(close.shape, dtype=np.int8)
+    signals[close > values] = BUY
+    signals[close < values] = SELL
+    return signals
+
+
+def sma_rsi_signals(data, fast_period=50, slow_period=200, rsi_period=14, allow_short=False):
+    """`trade_signal` de etherum-bot.py (et short-etherum.py avec `allow_short`)"""
+    close = data['close']
+    fast = sma_np(close, fast_period)
+    slow = sma_np(close, slow_period)
+    rsi_values = rsi_np(close, rsi_period)
+    signals = np.zeros(rsi_values.shape, dtype=np.int8)
+    # Même ordre de priorité que la cascade de if/elif des scripts
+    if allow_short:
+        signals[(fast > slow) & (rsi_values > 70)] = COVER
+        signals[(fast < slow) & (rsi_values < 30)] = SHORT
+    signals[(fast < slow) & (rsi_values > 70)] = SELL
+    signals[(fast > slow) & (rsi_values < 30)] = BUY
+    return signals
+
+
+def sma_rsi_short_signals(data, fast_period=50, slow_period=200, rsi_period=14):
+    return sma_rsi_signals(data, fast_period, slow_period, rsi_period, allow_short=True)
+
+
+# nom -> (fonction de signaux, gestion du risque comme `manage_risk()`)
+STRATEGIES = {
+    'ultra_aggressive': (rsi_macd_signals, False),
+    'combined': (rsi_macd_signals, True),
+    'supertrend': (supertrend_signals, True),
+    'sma_rsi': (sma_rsi_signals, False),
+    'sma_rsi_short': (sma_rsi_short_signals, False),
+}
+
+
+class BacktestResult:
+    """Transactions, valeur nette par bougie et résumé d'un backtest"""
+
+    def __init__(self, trades, equity, initial_balance):
+        self.trades = trades  # [(index de bougie, côté, prix, quantité ou solde)]
+        self.equity = equity
+        self.initial_balance = initial_balance
+
+    @property
+    def trade_history(self):
+        """Même format que `TradingBot.trade_history`"""
+        return [(side, price, amount) for _, side, price, amount in self.trades]
+
+    @property
+    def final_net_worth(self):
+        return float(self.equity[-1]) if len(self.equity) else self.initial_balance
+
+    @property
+    def profit(self):
+        return self.final_net_worth - self.initial_balance
+
+    def summary(self):
+        return {
+            'trades': len(self.trades),
+            'final_net_worth': self.final_net_worth,
+            'profit': self.profit,
+        }
+
+
+def _next_index(indices, start):
+    """Premier élément de `indices` (trié) >= start, ou None"""
+    position = np.searchsorted(indices, start)
+    return int(indices[position]) if position < len(indices) else None
+
+
+def _first_hit(condition, start, n, chunk=1024):
+    """Premier index >= start où `condition(slice)` est vrai, par blocs de taille croissante"""
+    while start < n:
+        stop = min(n, start + chunk)
+        hits = np.flatnonzero(condition(slice(start, stop)))
+        if len(hits):
+            return start + int(hits[0])
+        start = stop
+        chunk *= 2
+    return None
+
+
+def simulate(signals, close, initial_balance=1000, stop_loss_percent=None, take_profit_percent=None,
+             high=None, low=None):
+    """Rejoue les signaux comme la boucle en direct et renvoie un `BacktestResult`
+
+    À chaque bougie : le signal est exécuté (achat/vente/short/cover si la
+    position le permet), puis `manage_risk()` est appliqué à la clôture si
+    `stop_loss_percent` / `take_profit_percent` sont fournis. Avec `high` et
+    `low`, les niveaux sont vérifiés en cours de bougie, avant le signal de clôture.
+    """
+    signals = np.asarray(signals)
+    close = np.asarray(close, dtype=np.float64)
+    intrabar = high is not None and low is not None
+    if intrabar:
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+    n = len(close)
+    use_risk = stop_loss_percent is not None and take_profit_percent is not None
+    buy_indices = np.flatnonzero(signals == BUY)
+    short_indices = np.flatnonzero(signals == SHORT)
+
+    trades = []
+    equity = np.empty(n)
+    balance = initial_balance
+    i = 0
+    while i < n:
+        next_buy = _next_index(buy_indices, i)
+        next_short = _next_index(short_indices, i)
+        candidates = [index for index in (next_buy, next_short) if index is not None]
+        if not candidates:
+            break
+        entry = min(candidates)
+        equity[i:entry] = balance
+        price = close[entry]
+
+        if entry == next_buy:
+            quantity = balance / price
+            trades.append((entry, 'BUY', price, quantity))
+            if use_risk and intrabar:
+                stop_loss_price = price * (1 - stop_loss_percent)
+                take_profit_price = price * (1 + take_profit_percent)
+                exit_index = _first_hit(
+                    lambda s: (signals[s] == SELL) | (low[s] <= stop_loss_price) | (high[s] >= take_profit_price),
+                    entry + 1, n)
+            elif use_risk:
+                stop_loss_price = price * (1 - stop_loss_percent)
+                take_profit_price = price * (1 + take_profit_percent)
+                exit_index = _first_hit(
+                    lambda s: ((signals[s] == SELL) & (np.arange(s.start, s.stop) > entry))
+                    | (close[s] <= stop_loss_price) | (close[s] >= take_profit_price),
+                    entry, n)
+            else:
+                exit_index = _first_hit(lambda s: signals[s] == SELL, entry + 1, n)
+            exit_side = 'SELL'
+        else:
+            quantity = -(balance / price)
+            trades.append((entry, 'SHORT', price, quantity))
+            exit_index = _first_hit(lambda s: signals[s] == COVER, entry + 1, n)
+            exit_side = 'COVER'
+
+        balance = 0
+        if exit_index is None:
+            equity[entry:] = quantity * close[entry:]
+            i = n
+            break
+        equity[entry:exit_index] = quantity * close[entry:exit_index]
+        exit_price = close[exit_index]
+        if exit_side == 'SELL' and use_risk and intrabar:
+            # Stop-Loss prioritaire si les deux niveaux sont touchés dans la bougie
+            if low[exit_index] <= stop_loss_price:
+                exit_price = stop_loss_price
+            elif high[exit_index] >= take_profit_price:
+                exit_price = take_profit_price
+        balance = abs(quantity) * exit_price
+        trades.append((exit_index, exit_side, exit_price, balance))
+        equity[exit_index] = balance
+        i = exit_index + 1
+
+    if i < n:
+        equity[i:] = balance
+    return BacktestResult(trades, equity, initial_balance)
+
+
+def run_backtest(strategy, data, initial_balance=1000, stop_loss_percent=0.02, take_profit_percent=0.05,
+                 intrabar=False, **params):
+    """Backtest d'une stratégie nommée sur `data` (dict de tableaux ou DataFrame OHLC)"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Stratégie inconnue : {strategy} (disponibles : {', '.join(STRATEGIES)})")
+    signal_function, use_risk = STRATEGIES[strategy]
+    signals = signal_function(data, **params)
+    if not use_risk:
+        stop_loss_percent = take_profit_percent = None
+    high, low = (data['high'], data['low']) if intrabar else (None, None)
+    return simulate(signals, data['close'], initial_balance, stop_loss_percent, take_profit_percent, high, low)
+
+
+def main():
+    from candle_cache import CandleCache
+    from kline_store import KlineStore
+
+    parser = argparse.ArgumentParser(description="Backtest d'une stratégie sur l'historique Binance")
+    parser.add_argument('--strategy', default='combined', choices=sorted(STRATEGIES))
+    parser.add_argument('--symbol', default='ETHUSDT')
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--candles', type=int, default=5000)
+    parser.add_argument('--store', help="Lit l'historique dans ce stock local (kline_store.py) au lieu de l'API")
+    parser.add_argument('--intrabar', action='store_true', help="Stop-Loss / Take-Profit sur le plus haut / plus bas")
+    parser.add_argument('--window', type=int, help="supertrend : recalculé sur les N dernières bougies à chaque bougie")
+    args = parser.parse_args()
+
+    if args.store:
+        data = KlineStore(args.store).tail(args.symbol, args.interval, args.candles)
+    else:
+        cache = CandleCache(args.symbol, args.interval, capacity=args.candles)
+        cache.load()
+        data = cache.arrays()
+
+    start = time.perf_counter()
+    params = {'window': args.window} if args.window else {}
+    result = run_backtest(args.strategy, data, intrabar=args.intrabar, **params)
+    elapsed = time.perf_counter() - start
+
+    for index, side, price, amount in result.trades:
+        print(f"[{index}] {side} à {price:.2f} USD ({amount:.4f})")
+    print(f"\n{len(data['close'])} bougies en {elapsed * 1000:.1f} ms")
+    print(f"Valeur nette : {result.final_net_worth:.2f} USD")
+    print(f"Profit/Pertes : {result.profit:.2f} USD")
+    print(f"Transactions totales : {len(result.trades)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Coût CPU par récupération : décodage pandas d'origine vs `parse_klines()`.
+
+Les réponses sont générées localement (aucun appel réseau).
+Usage : python -m benchmarks.kline_parsing
+"""
+import json
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from kline_parser import parse_klines
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume',
+           'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore']
+
+
+def synthetic_payload(rows, seed=0):
+    """Réponse `/api/v3/klines` au format JSON compact de Binance"""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 1, rows))
+    start = 1_700_000_000_000
+    klines = []
+    for i, price in enumerate(close):
+        open_time = start + i * 60_000
+        klines.append([open_time, f'{price:.8f}', f'{price + 1:.8f}', f'{price - 1:.8f}', f'{price:.8f}',
+                       f'{rng.random() * 100:.8f}', open_time + 59_999, '12345.67890000', 42,
+                       '1.00000000', '2000.00000000', '0'])
+    return json.dumps(klines, separators=(',', ':')).encode()
+
+
+def pandas_parse(payload):
+    """Chemin d'origine de `fetch_ohlcv()` (HF_trading.py / smart.py)"""
+    data = json.loads(payload)
+    df = pd.DataFrame(data, columns=COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df['close'] = df['close'].astype(float)
+    return df[['timestamp', 'close']]
+
+
+def run(sizes=(100, 500, 1000), repeat=5):
+    """Temps médian (µs) par décodage pour chaque taille de réponse"""
+    results = []
+    for rows in sizes:
+        payload = synthetic_payload(rows)
+        number = max(10, 20_000 // rows)
+        cases = {
+            'pandas (avant)': lambda: pandas_parse(payload),
+            'parse_klines -> tableaux': lambda: parse_klines(payload, ('open_time', 'close')),
+            'parse_klines -> DataFrame': lambda: parse_klines(payload, ('open_time', 'close')).frame(),
+        }
+        for name, function in cases.items():
+            timings = timeit.repeat(function, number=number, repeat=repeat)
+            results.append({'rows': rows, 'case': name, 'us_per_fetch': min(timings) / number * 1e6})
+    return results
+
+
+def main():
+    results = run()
+    baseline = {r['rows']: r['us_per_fetch'] for r in results if r['case'] == 'pandas (avant)'}
+    for r in results:
+        speedup = baseline[r['rows']] / r['us_per_fetch']
+        print(f"{r['rows']:>5} bougies  {r['case']:<28} {r['us_per_fetch']:>9.1f} µs  (x{speedup:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Latence du flux WebSocket (`KlineStream`) comparée au polling REST.
+
+Le simulateur (simulator.py) tourne dans le même processus, sur un port libre
+et en temps accéléré. Pour chaque bougie, le délai entre sa clôture et sa
+réception est mesuré par le flux et par un polling REST de période `--poll`.
+La livraison, la reconnexion et le rattrapage REST sont vérifiés par
+tests/test_stream.py.
+
+Usage : python -m benchmarks.stream_latency [--speed 60] [--duration 12] [--poll 1]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from aiohttp import web
+
+from binance_client import BinanceClient
+from candle_cache import FIELDS, CandleCache, interval_ms
+from kline_parser import parse_klines
+from simulator import ExchangeSimulator, load_markets
+from stream import KlineStream
+
+SYMBOL = 'ETHUSDT'
+INTERVAL = '1m'
+
+
+def rest_fetcher(client):
+    """`request_klines` sur un client dédié (URL du simulateur)"""
+    def fetch(symbol, interval, limit=1000, start_time=None, end_time=None):
+        return parse_klines(client.klines(symbol, interval, limit, start_time, end_time).content, FIELDS)
+    return fetch
+
+
+def summary(delays):
+    """Délais (s) -> médiane et maximum en ms"""
+    if not delays:
+        return None
+    values = [delay * 1000 for delay in delays]
+    return {'count': len(values), 'p50': statistics.median(values), 'max': max(values)}
+
+
+async def poll(fetch, close_real, step, period, stop, observed):
+    """Polling REST : délai entre la clôture d'une bougie et sa première observation"""
+    loop = asyncio.get_running_loop()
+    last = None
+    while not stop.is_set():
+        page = await loop.run_in_executor(None, lambda: fetch(SYMBOL, INTERVAL, limit=2))
+        now = time.time()
+        closed = int(page['open_time'][0])  # Avant-dernière bougie : la dernière clôturée
+        if last is not None:
+            for open_time in range(last + step, closed + 1, step):
+                observed[open_time] = now - close_real(open_time)
+        last = closed
+        try:
+            # Période tirée autour de `period` : un polling calé sur les clôtures fausserait la mesure
+            await asyncio.wait_for(stop.wait(), random.uniform(0.5, 1.5) * period)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def measure(speed=60, duration=12, poll_period=1.0):
+    """Lance simulateur, flux et polling pendant `duration` secondes ; renvoie les mesures"""
+    step = interval_ms(INTERVAL)
+    simulator = ExchangeSimulator(load_markets([SYMBOL], INTERVAL, candles=5000), INTERVAL, speed)
+    runner = web.AppRunner(simulator.app())
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    host, port = runner.addresses[0][:2]
+    fetch = rest_fetcher(BinanceClient(f'http://{host}:{port}'))
+
+    def close_real(open_time):
+        """Heure réelle (s) de la clôture de la bougie `open_time`"""
+        return simulator.real_start + (open_time + step - simulator.sim_start) / 1000 / speed
+
+    streamed = {}
+
+    def on_candle(symbol, cache, closed):
+        if closed:
+            open_time = cache.live[0]
+            streamed.setdefault(open_time, time.time() - close_real(open_time))
+
+    stream = KlineStream([SYMBOL], INTERVAL, on_candle=on_candle, url=f'ws://{host}:{port}/stream',
+                         caches={SYMBOL: CandleCache(SYMBOL, INTERVAL, fetcher=fetch)})
+    stop = asyncio.Event()
+    polled = {}
+    tasks = [asyncio.create_task(stream.run()),
+             asyncio.create_task(poll(fetch, close_real, step, poll_period, stop, polled))]
+    try:
+        await asyncio.sleep(duration)
+        stream.stop()
+        stop.set()
+        await asyncio.wait(tasks, timeout=5)
+    finally:
+        stream.stop()
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await runner.cleanup()
+
+    return {
+        'stream_close_latency': summary(list(streamed.values())),
+        'poll_close_latency': summary(list(polled.values())),
+        'stream_event_latency': stream.latency_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence du flux WebSocket comparée au polling REST")
+    parser.add_argument('--speed', type=float, default=60, help="Accélération du simulateur (60 : une bougie/s)")
+    parser.add_argument('--duration', type=float, default=12, help="Durée de la mesure (s réelles)")
+    parser.add_argument('--poll', type=float, default=1.0, help="Période du polling REST comparé (s)")
+    args = parser.parse_args()
+
+    measures = asyncio.run(measure(args.speed, args.duration, args.poll))
+    for label, key in (('flux', 'stream_close_latency'), (f'polling {args.poll:g}s', 'poll_close_latency')):
+        stats = measures[key]
+        if stats:
+            print(f"Clôture -> réception ({label}) : médiane {stats['p50']:.1f} ms, max {stats['max']:.1f} ms "
+                  f"({stats['count']} bougies)")
+    print(f"Événement -> traitement (flux) : {measures['stream_event_latency']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""Suite de benchmarks : indicateurs, décodage des klines et itération complète.
+
+Les données OHLCV sont synthétiques (graine fixe) et le réseau est remplacé
+par un flux local, les mesures sont donc reproductibles. Chaque cas est mesuré
+pour plusieurs longueurs de fenêtre (100 à 1M bougies) et, pour l'itération
+complète, plusieurs nombres de symboles.
+
+Usage :
+    python -m benchmarks.suite --save bench.json
+    python -m benchmarks.suite --baseline bench.json   # code 1 si régression
+    python -m benchmarks.suite --quick --filter rsi
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import smart
+import supertrend
+from benchmarks.kline_parsing import synthetic_payload
+from candle_cache import CandleCache, MAX_LIMIT
+from event_sink import muted
+from indicators import IndicatorEngine
+from kline_parser import parse_klines
+from matrix_signals import decide
+from strategies import STRATEGIES, load_script, load_strategy
+from vectorized import macd_np, rsi_np, sma_np, supertrend_np
+
+WINDOWS = (100, 1_000, 10_000, 100_000, 1_000_000)
+QUICK_WINDOWS = (100, 1_000, 10_000)
+SYMBOL_COUNTS = (1, 8, 32)
+PARSE_MAX_ROWS = 100_000  # Au-delà, générer la réponse JSON coûte plus que la mesure
+TICK_MAX_CANDLES = 1_000_000  # Bougies en cache (fenêtre x symboles) pour l'itération complète
+TICK_EXTRA_ROWS = 20_000  # Bougies rejouées après la fenêtre initiale
+SIGNAL_MAX_ROWS = 10_000  # Fenêtres des signaux multi-symboles (boucle pandas vs matrice)
+START_TIME = 1_700_000_000_000
+STEP_MS = 60_000
+
+
+def synthetic_ohlcv(rows, seed=0):
+    """Bougies 1m en marche aléatoire, au format de `fetch_ohlcv_cached()`"""
+    rng = np.random.default_rng(seed)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, rows)) * close
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(START_TIME + np.arange(rows) * STEP_MS, unit='ms'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.random(rows) * 100,
+    })
+
+
+def kline_rows(data):
+    """Lignes au format de la réponse JSON `/api/v3/klines` (7 premières colonnes)"""
+    open_time = data['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64).tolist()
+    return [[t, o, h, l, c, v, t + STEP_MS - 1]
+            for t, o, h, l, c, v in zip(open_time, data['open'].tolist(), data['high'].tolist(),
+                                        data['low'].tolist(), data['close'].tolist(), data['volume'].tolist())]
+
+
+class ReplayFetcher:
+    """Remplace `request_klines` : rejoue des bougies synthétiques, une de plus par appel"""
+
+    def __init__(self, rows, position):
+        self.rows = rows
+        self.position = position  # Index de la bougie en cours
+
+    def __call__(self, symbol, interval, limit=MAX_LIMIT, start_time=None, end_time=None):
+        end = self.position + 1
+        if start_time is not None:
+            start = (start_time - START_TIME) // STEP_MS
+            return self.rows[start:min(end, start + limit)]
+        if end_time is not None:
+            end = min(end, (end_time - START_TIME) // STEP_MS + 1)
+        return self.rows[max(0, end - limit):end]
+
+    def advance(self):
+        self.position = min(self.position + 1, len(self.rows) - 1)
+
+
+def measure(function, min_time=0.2, repeat=5):
+    """Meilleur et médian temps par appel (s), avec un nombre d'appels adapté"""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'best_s': min(timings), 'median_s': statistics.median(timings), 'number': number}
+
+
+def indicator_cases(data):
+    """Cas (nom -> fonction) mesurés sur une fenêtre de bougies"""
+    sma_module = load_script('etherum-bot.py')
+    close = data['close'].to_numpy()
+    high = data['high'].to_numpy()
+    low = data['low'].to_numpy()
+    return {
+        'rsi.pandas': lambda: smart.rsi(data),
+        'rsi.numpy': lambda: rsi_np(close),
+        'macd.pandas': lambda: smart.macd(data),
+        'macd.numpy': lambda: macd_np(close),
+        'sma.pandas': lambda: sma_module.simple_moving_average(data, 50),
+        'sma.numpy': lambda: sma_np(close, 50),
+        'supertrend': lambda: supertrend.supertrend(data),
+        'supertrend.numpy': lambda: supertrend_np(high, low, close),
+        'engine.warm_up': lambda: IndicatorEngine().warm_up(close),
+    }
+
+
+def tick_case(rows, window, symbols):
+    """Itération complète de smart.py pour `symbols` symboles (réseau simulé)"""
+    states = []
+    for index in range(symbols):
+        fetcher = ReplayFetcher(rows, position=window - 1)
+        cache = CandleCache(f'SYM{index}USDT', '1m', capacity=window, fetcher=fetcher)
+        cache.load(window)
+        bot = smart.TradingBot(initial_balance=1000)
+        engine = IndicatorEngine(sma_periods=())
+
+        def fetch(symbol, interval, cache=cache, fetcher=fetcher):
+            fetcher.advance()
+            cache.refresh()
+            return cache.frame(window)
+
+        states.append((bot, engine, cache.symbol, fetch))
+    iteration = [0]
+
+    def run():
+        iteration[0] += 1
+        with muted():
+            for bot, engine, symbol, fetch in states:
+                smart.run_iteration(bot, engine, symbol, '1m', iteration[0], fetch=fetch)
+    return run
+
+
+def loop_signals(frames):
+    """Chemin du scanner sans --batch : chaque fonction de signal sur chaque symbole"""
+    functions = [load_strategy(name) for name in STRATEGIES]
+    with muted():
+        return {symbol: [function(data.copy()) for function in functions] for symbol, data in frames.items()}
+
+
+def run(windows=WINDOWS, symbol_counts=SYMBOL_COUNTS, name_filter=None, min_time=0.2, seed=0):
+    """Exécute tous les cas et renvoie la liste des résultats"""
+    def selected(name):
+        return name_filter is None or name_filter in name
+
+    results = []
+
+    def record(name, rows, symbols, function):
+        if not selected(name):
+            return
+        result = {'name': name, 'rows': rows, 'symbols': symbols, **measure(function, min_time)}
+        results.append(result)
+        print(f"{name:<18} {rows:>9} bougies {symbols:>3} symb.  {result['best_s'] * 1e3:>10.3f} ms",
+              file=sys.stderr)
+
+    for rows in windows:
+        data = synthetic_ohlcv(rows, seed)
+        for name, function in indicator_cases(data).items():
+            record(name, rows, 1, function)
+        if rows <= PARSE_MAX_ROWS and selected('parse'):
+            payload = synthetic_payload(rows, seed)
+            record('parse.klines', rows, 1, lambda: parse_klines(payload, ('open_time', 'close')).frame())
+        if selected('tick'):
+            # Une bougie de plus par appel ; en fin d'historique la dernière bougie est révisée
+            history = kline_rows(synthetic_ohlcv(rows + TICK_EXTRA_ROWS, seed))
+            for symbols in symbol_counts:
+                if rows * symbols <= TICK_MAX_CANDLES:
+                    record('tick.smart', rows, symbols, tick_case(history, rows, symbols))
+        if rows <= SIGNAL_MAX_ROWS and selected('signals'):
+            for symbols in symbol_counts:
+                frames = {f'SYM{index}USDT': synthetic_ohlcv(rows, seed + index) for index in range(symbols)}
+                record('signals.loop', rows, symbols, lambda: loop_signals(frames))
+                record('signals.matrix', rows, symbols, lambda: decide(frames, list(STRATEGIES)))
+    return results
+
+
+def compare(results, baseline, threshold=1.25):
+    """Ratios courant / référence ; renvoie les cas plus lents que `threshold`"""
+    reference = {(r['name'], r['rows'], r['symbols']): r['best_s'] for r in baseline['results']}
+    regressions = []
+    for result in results:
+        key = (result['name'], result['rows'], result['symbols'])
+        if key not in reference:
+            continue
+        ratio = result['best_s'] / reference[key]
+        flag = ' RÉGRESSION' if ratio > threshold else ''
+        print(f"{result['name']:<18} {result['rows']:>9} {result['symbols']:>3}  x{ratio:.2f}{flag}")
+        if ratio > threshold:
+            regressions.append({**result, 'ratio': ratio})
+    return regressions
+
+
+def environment(seed):
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'seed': seed,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks des indicateurs et de la boucle de trading")
+    parser.add_argument('--quick', action='store_true', help=f"Fenêtres {QUICK_WINDOWS} seulement")
+    parser.add_argument('--windows', help="Longueurs de fenêtre séparées par des virgules")
+    parser.add_argument('--symbols', default=','.join(map(str, SYMBOL_COUNTS)),
+                        help="Nombres de symboles pour l'itération complète")
+    parser.add_argument('--filter', help="Ne mesure que les cas dont le nom contient ce texte")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Durée minimale d'une répétition (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="Écrit les résultats JSON dans ce fichier")
+    parser.add_argument('--baseline', help="Compare à des résultats enregistrés avec --save")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Ratio de ralentissement toléré")
+    args = parser.parse_args()
+
+    if args.windows:
+        windows = tuple(int(w) for w in args.windows.split(','))
+    else:
+        windows = QUICK_WINDOWS if args.quick else WINDOWS
+    symbol_counts = tuple(int(s) for s in args.symbols.split(','))
+
+    results = run(windows, symbol_counts, args.filter, args.min_time, args.seed)
+    output = {'environment': environment(args.seed), 'results': results}
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        print(json.dumps(output, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de x{args.threshold}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
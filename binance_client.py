@@ -0,0 +1,179 @@
+"""Client HTTP Binance partagé par tous les bots.
+
+- Session `requests` avec connexions persistantes (pool keep-alive) et timeout.
+- Limiteur à seau de jetons sur le poids des requêtes, recalé sur l'en-tête
+  `X-MBX-USED-WEIGHT-1M` renvoyé par Binance.
+- Nouvelles tentatives avec backoff exponentiel et gigue (429/418/5xx, erreurs réseau).
+- Fusion des requêtes identiques en vol : plusieurs stratégies qui demandent les
+  mêmes klines au même moment partagent une seule requête.
+
+L'URL de base peut être redirigée vers un serveur local avec `BINANCE_API_URL`.
+"""
+import email.utils
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = os.environ.get('BINANCE_API_URL', 'https://api.binance.com').rstrip('/')
+KLINES_PATH = '/api/v3/klines'
+TIME_PATH = '/api/v3/time'
+KLINES_WEIGHT = 2
+WEIGHT_LIMIT = 6000  # Poids autorisé par minute et par IP (spot)
+USED_WEIGHT_HEADER = 'X-MBX-USED-WEIGHT-1M'
+
+
+class RateLimiter:
+    """Seau de jetons : `capacity` jetons, rechargés sur `period` secondes"""
+
+    def __init__(self, limit=WEIGHT_LIMIT, period=60.0, margin=0.8):
+        self.capacity = limit * margin  # Marge de sécurité sous la limite Binance
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, weight):
+        """Réserve `weight` jetons et renvoie l'attente nécessaire (s) avant d'envoyer"""
+        with self.lock:
+            self._refill()
+            self.tokens -= weight
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, weight):
+        """Version bloquante de `reserve()`"""
+        wait = self.reserve(weight)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def observe(self, used_weight):
+        """Recale le seau sur le poids réellement consommé annoncé par le serveur"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, self.capacity - used_weight)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Délai exponentiel avec gigue aléatoire (±50 %)"""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def retry_delay(retry_after, attempt):
+    """Délai demandé par `Retry-After` (secondes ou date HTTP), sinon backoff exponentiel"""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            when = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return backoff_delay(attempt)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)  # Date HTTP sans fuseau : GMT
+        return max(0.0, when.timestamp() - time.time())
+    return backoff_delay(attempt)
+
+
+class BinanceClient:
+    """Client REST partagé : pool de connexions, limitation de poids, retries, fusion"""
+
+    def __init__(self, base_url=API_URL, weight_limit=WEIGHT_LIMIT, timeout=10, max_retries=3, pool_size=20):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(weight_limit)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.used_weight = 0
+        self.coalesced = 0  # Requêtes servies par une requête déjà en vol
+
+    def get(self, path, params=None, weight=1):
+        """GET sur l'API ; les appels identiques simultanés partagent la même réponse"""
+        key = (path, tuple(sorted((params or {}).items())))
+        with self.lock:
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self.in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            response = self._request(path, params, weight)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def _request(self, path, params, weight):
+        url = self.base_url + path
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(weight)
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            used = response.headers.get(USED_WEIGHT_HEADER)
+            if used is not None:
+                self.used_weight = int(used)
+                self.limiter.observe(self.used_weight)
+
+            if response.status_code in (418, 429) or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                time.sleep(retry_delay(response.headers.get('Retry-After'), attempt))
+                continue
+            response.raise_for_status()
+            return response
+
+    def klines(self, symbol, interval, limit=100, start_time=None, end_time=None):
+        """Réponse brute de `/api/v3/klines`"""
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        if end_time is not None:
+            params['endTime'] = int(end_time)
+        return self.get(KLINES_PATH, params, weight=KLINES_WEIGHT)
+
+    def server_time(self):
+        """Heure du serveur Binance en millisecondes"""
+        return self.get(TIME_PATH, weight=1).json()['serverTime']
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Client partagé par tout le processus"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BinanceClient()
+        return _client
@@ -0,0 +1,261 @@
+"""Cache local de bougies par (symbole, intervalle) avec récupération incrémentale.
+
+Les bougies clôturées sont gardées dans un tampon circulaire NumPy. Après le
+premier chargement, seules les bougies à partir de la bougie en cours sont
+redemandées à Binance, et la bougie en cours est mise à jour sur place.
+"""
+import numpy as np
+import pandas as pd
+
+from binance_client import API_URL, KLINES_PATH, get_client
+from kline_parser import parse_klines
+from profiling import stage
+
+KLINES_URL = API_URL + KLINES_PATH
+MAX_LIMIT = 1000  # Nombre maximum de bougies par requête Binance
+FIELDS = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')
+
+
+def request_klines(symbol, interval, limit=MAX_LIMIT, start_time=None, end_time=None):
+    """Télécharge des klines depuis l'API REST de Binance (client partagé), décodées en colonnes"""
+    with stage('http'):
+        response = get_client().klines(symbol, interval, limit, start_time, end_time)
+    with stage('parse'):
+        return parse_klines(response.content, FIELDS)
+
+
+def kline_columns(page):
+    """Colonnes d'une page de klines ; les lignes JSON (fetchers de remplacement) sont décodées"""
+    return parse_klines(page, FIELDS) if isinstance(page, list) else page
+
+
+def interval_ms(interval):
+    """Durée d'un intervalle Binance ('1s', '1m', '4h', '1d', '1w'...) en millisecondes"""
+    units = {'s': 1000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+    unit = interval[-1:]
+    if unit == 'M':
+        # Bougies mensuelles : la durée varie d'un mois à l'autre, aucun pas fixe possible
+        raise ValueError(f"Intervalle mensuel non pris en charge : {interval}")
+    if unit not in units or not interval[:-1].isdigit():
+        raise ValueError(f"Intervalle Binance inconnu : {interval}")
+    return int(interval[:-1]) * units[unit]
+
+
+def parse_kline(row):
+    """Convertit une kline Binance en tuple (open_time, open, high, low, close, volume, close_time)"""
+    return (int(row[0]), float(row[1]), float(row[2]), float(row[3]),
+            float(row[4]), float(row[5]), int(row[6]))
+
+
+def frame_from_arrays(arrays):
+    """Construit le DataFrame des scripts (timestamp, open, high, low, close, volume)"""
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(arrays['open_time'], unit='ms'),
+        'open': arrays['open'],
+        'high': arrays['high'],
+        'low': arrays['low'],
+        'close': arrays['close'],
+        'volume': arrays['volume'],
+    })
+
+
+class CandleCache:
+    """Tampon circulaire des bougies clôturées + bougie en cours pour un symbole"""
+
+    def __init__(self, symbol, interval, capacity=1000, fetcher=request_klines, store=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.capacity = capacity
+        self.fetcher = fetcher
+        self.columns = {name: np.zeros(capacity, dtype=np.int64 if name.endswith('time') else np.float64)
+                        for name in FIELDS}
+        self.size = 0  # Nombre de bougies clôturées stockées
+        self.head = 0  # Prochain emplacement d'écriture
+        self.live = None  # Bougie en cours (tuple)
+        self.version = 0  # Incrémenté à chaque modification
+        self.store = store  # `KlineStore` optionnel : démarrage à chaud et persistance
+        self.persisted = None  # Dernier open_time connu du stock (évite de relire le stock à chaque tick)
+
+    def __len__(self):
+        return self.size + (self.live is not None)
+
+    @property
+    def last_closed_time(self):
+        """`close_time` de la dernière bougie clôturée, ou None"""
+        if self.size == 0:
+            return None
+        return int(self.columns['close_time'][(self.head - 1) % self.capacity])
+
+    def _append_closed(self, candle):
+        for name, value in zip(FIELDS, candle):
+            self.columns[name][self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def apply(self, candle):
+        """Intègre une bougie (nouvelle ou révision de la bougie en cours)"""
+        open_time = candle[0]
+        if self.live is not None and open_time < self.live[0]:
+            return False  # Bougie déjà clôturée et stockée
+        if self.live is not None and open_time > self.live[0]:
+            self._append_closed(self.live)
+        self.live = candle
+        self.version += 1
+        return True
+
+    def extend(self, page):
+        """Intègre une page de bougies triées en bloc ; la dernière devient la bougie en cours"""
+        open_time = page['open_time']
+        if self.live is not None:
+            start = int(np.searchsorted(open_time, self.live[0]))
+        elif self.size:
+            start = int(np.searchsorted(open_time, self.columns['open_time'][(self.head - 1) % self.capacity],
+                                        side='right'))
+        else:
+            start = 0
+        end = len(open_time)
+        if start >= end:
+            return 0  # Bougies déjà clôturées et stockées
+        if self.live is not None and open_time[start] > self.live[0]:
+            self._append_closed(self.live)
+        # Bougies clôturées écrites d'un bloc, seules les `capacity` dernières sont gardées
+        first = max(start, end - 1 - self.capacity)
+        closed = end - 1 - first
+        if closed > 0:
+            slots = (self.head + np.arange(closed)) % self.capacity
+            for name in FIELDS:
+                self.columns[name][slots] = page[name][first:end - 1]
+            self.head = (self.head + closed) % self.capacity
+            self.size = min(self.size + closed, self.capacity)
+        self.live = tuple(page[name][end - 1].item() for name in FIELDS)
+        self.version += 1
+        return end - start
+
+    def close_live(self, candle=None):
+        """Marque la bougie en cours comme clôturée (avec sa valeur finale si fournie)"""
+        if candle is not None:
+            self.apply(candle)
+        if self.live is not None:
+            self._append_closed(self.live)
+            self.live = None
+            self.version += 1
+
+    def load(self, count=None):
+        """Premier chargement : depuis le stock local si possible, sinon par pages de 1000"""
+        count = count or self.capacity
+        if self.store is not None and self.store.count(self.symbol, self.interval):
+            stored = self.store.tail(self.symbol, self.interval, min(count, self.capacity))
+            size = len(stored['open_time'])
+            for name in FIELDS[:-1]:
+                self.columns[name][:size] = stored[name]
+            self.columns['close_time'][:size] = stored['open_time'] + interval_ms(self.interval) - 1
+            self.size = size
+            self.head = size % self.capacity
+            self.version += 1
+            self.persisted = int(stored['open_time'][-1])
+            return self.refresh()
+
+        pages = []
+        received = 0
+        end_time = None
+        while received < count:
+            page = kline_columns(self.fetcher(self.symbol, self.interval, limit=min(MAX_LIMIT, count - received),
+                                              end_time=end_time))
+            if not len(page['open_time']):
+                break
+            pages.append(page)
+            received += len(page['open_time'])
+            end_time = int(page['open_time'][0]) - 1
+            if len(page['open_time']) < MAX_LIMIT:
+                break
+        if pages:
+            # Pages reçues de la plus récente à la plus ancienne
+            self.extend({name: np.concatenate([page[name] for page in reversed(pages)]) for name in FIELDS})
+        self.persist()
+        return received
+
+    def load_arrays(self, arrays, live=True):
+        """Charge des bougies déjà connues (checkpoint) ; la dernière est la bougie en cours si `live`"""
+        count = len(arrays['open_time'])
+        closed = count - (1 if live and count else 0)
+        size = min(closed, self.capacity)
+        for name in FIELDS:
+            self.columns[name][:size] = arrays[name][closed - size:closed]
+        self.size = size
+        self.head = size % self.capacity
+        self.live = tuple(arrays[name][-1].item() for name in FIELDS) if live and count else None
+        self.version += 1
+        return count
+
+    def refresh(self):
+        """Récupère uniquement les bougies à partir de la bougie en cours"""
+        if self.live is None and self.size == 0:
+            return self.load()
+        start_time = self.live[0] if self.live is not None else self.last_closed_time + 1
+        received = 0
+        while True:
+            page = kline_columns(self.fetcher(self.symbol, self.interval, limit=MAX_LIMIT, start_time=start_time))
+            self.extend(page)
+            received += len(page['open_time'])
+            # Après une longue interruption, il peut y avoir plus d'une page de retard
+            if len(page['open_time']) < MAX_LIMIT:
+                break
+            start_time = self.live[0]
+        self.persist()
+        return received
+
+    def persist(self):
+        """Ajoute au stock local les bougies clôturées qu'il n'a pas encore"""
+        if self.store is None or self.size == 0:
+            return 0
+        if self.persisted is None:
+            self.persisted = self.store.last_open_time(self.symbol, self.interval)
+        last_closed = int(self.columns['open_time'][(self.head - 1) % self.capacity])
+        if self.persisted is not None and self.persisted >= last_closed:
+            return 0  # Rien de nouveau : aucun accès au stock
+        closed = self.size
+        if self.persisted is not None:
+            closed = int(np.count_nonzero(self.columns['open_time'][:self.size] > self.persisted))
+        arrays = self.arrays(closed + (self.live is not None))
+        if self.live is not None:
+            arrays = {name: values[:-1] for name, values in arrays.items()}
+        # `append()` relit le stock et écarte ce qu'un autre écrivain aurait déjà ajouté
+        added = self.store.append(self.symbol, self.interval, arrays)
+        self.persisted = last_closed
+        return added
+
+    def arrays(self, limit=None):
+        """Dernières bougies (bougie en cours comprise) sous forme de tableaux NumPy"""
+        total = len(self)
+        limit = total if limit is None else min(limit, total)
+        closed = min(self.size, limit - (self.live is not None))
+        indices = (self.head - closed + np.arange(closed)) % self.capacity
+        arrays = {name: column[indices] for name, column in self.columns.items()}
+        if self.live is not None and limit > 0:
+            for name, value in zip(FIELDS, self.live):
+                arrays[name] = np.append(arrays[name], value)
+        return arrays
+
+    def frame(self, limit=None):
+        """DataFrame des bougies (une colonne par champ), au format attendu par les stratégies"""
+        return frame_from_arrays(self.arrays(limit))
+
+
+_caches = {}
+
+
+def get_cache(symbol, interval, capacity=1000):
+    """Cache partagé pour (symbole, intervalle)"""
+    key = (symbol, interval)
+    cache = _caches.get(key)
+    if cache is None or cache.capacity < capacity:
+        cache = _caches[key] = CandleCache(symbol, interval, capacity)
+    return cache
+
+
+def fetch_ohlcv_cached(symbol='ETHUSDT', interval='1m', limit=100):
+    """Dernières bougies en DataFrame, servies par le cache local (seules les nouvelles sont demandées)"""
+    cache = get_cache(symbol, interval, capacity=max(limit, 1000))
+    cache.refresh()
+    with stage('dataframe'):
+        return cache.frame(limit)
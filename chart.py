@@ -0,0 +1,247 @@
+"""Graphes de performance décimés, rendus sans fenêtre dans un fichier PNG.
+
+`plt.plot(historique)` puis `plt.show()` trace chaque point et bloque le
+processus : inutilisable pour une semaine de ticks à la seconde. Ici la série
+est d'abord réduite à environ un point par pixel de largeur :
+- `lttb()` (Largest-Triangle-Three-Buckets) garde dans chaque seau le point qui
+  forme le plus grand triangle avec ses voisins : la forme visuelle est conservée ;
+- `min_max()` garde le minimum et le maximum de chaque seau : aucun pic ni
+  creux (drawdown) n'est perdu.
+Le rendu passe par le canevas Agg de matplotlib (sans pyplot ni affichage) et
+le fichier est remplacé atomiquement. Son coût dépend de la largeur en pixels,
+pas de la longueur de l'historique.
+
+`LiveChart` est le mode incrémental : chaque valeur nette est agrégée en O(1)
+dans des seaux min/max (`MinMaxAccumulator`), et toutes les N valeurs le
+graphe est redessiné dans un thread d'arrière-plan. Si un rendu est encore en
+cours, seule la demande la plus récente est gardée : la boucle de trading
+n'attend jamais.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from profiling import Histogram
+
+WIDTH = 1200  # Pixels
+HEIGHT = 600
+DPI = 100
+TITLE = "Évolution de la valeur nette au fil du temps"
+X_LABEL = "Itérations"
+Y_LABEL = "Valeur nette en USD"
+LABEL = "Valeur nette ($)"
+
+
+def history_values(history):
+    """Valeurs d'une liste, d'un tableau ou d'un `NetWorthHistory` (journal compris)"""
+    if hasattr(history, 'records'):
+        return history.records()['value']
+    return np.asarray(history, dtype=np.float64)
+
+
+def lttb(y, points, x=None):
+    """Sous-échantillonnage Largest-Triangle-Three-Buckets à `points` points"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    if points >= n or points < 3:
+        return x, y
+    # Premier et dernier points gardés, les autres répartis en `points - 2` seaux
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[stop:edges[bucket + 2]].mean()
+            next_y = y[stop:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+
+def min_max(y, buckets, x=None):
+    """Minimum et maximum de chaque seau (dans l'ordre), plus le premier et le dernier point"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    if 2 * buckets + 2 >= n:
+        return x, y
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    valid = ~np.isnan(rows[:, 0])  # Les derniers seaux peuvent être vides
+    starts = np.arange(buckets)[valid] * size
+    indices = np.concatenate(([0, n - 1], starts + np.nanargmin(rows[valid], axis=1),
+                              starts + np.nanargmax(rows[valid], axis=1)))
+    indices = np.unique(indices)
+    return x[indices], y[indices]
+
+
+DECIMATORS = {'lttb': lambda y, width: lttb(y, width), 'minmax': lambda y, width: min_max(y, width // 2)}
+
+
+def decimate(values, width=WIDTH, method='lttb'):
+    """Environ `width` points représentatifs de la série"""
+    if method not in DECIMATORS:
+        raise ValueError(f"Méthode inconnue : {method} (disponibles : {', '.join(DECIMATORS)})")
+    return DECIMATORS[method](values, width)
+
+
+def render_points(x, y, path, width=WIDTH, height=HEIGHT, title=TITLE, label=LABEL):
+    """Trace des points déjà décimés dans un PNG (canevas Agg, remplacement atomique)"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(width / DPI, height / DPI), dpi=DPI)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.plot(x, y, label=label, color="blue", linewidth=1)
+    axes.set_title(title)
+    axes.set_xlabel(X_LABEL)
+    axes.set_ylabel(Y_LABEL)
+    axes.legend()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f'{path}.tmp'
+    figure.savefig(temporary, format='png')
+    os.replace(temporary, path)
+    return len(x)
+
+
+def render_png(history, path, width=WIDTH, height=HEIGHT, method='lttb', title=TITLE, label=LABEL):
+    """Graphe de tout l'historique, décimé à la largeur de l'image ; renvoie le nombre de points tracés"""
+    x, y = decimate(history_values(history), width, method)
+    return render_points(x, y, path, width, height, title, label)
+
+
+class MinMaxAccumulator:
+    """Seaux min/max d'une série sans fin : O(1) amorti par valeur, au plus 2 x `buckets` seaux
+
+    Quand le nombre de seaux atteint 2 x `buckets`, les seaux sont fusionnés deux
+    à deux et leur taille double.
+    """
+
+    def __init__(self, buckets=WIDTH // 2):
+        self.buckets = buckets
+        self.size = 1  # Valeurs par seau
+        self.count = 0
+        self.mins = []  # [(indice, valeur)] par seau
+        self.maxs = []
+        self.last = None
+
+    def append(self, value):
+        value = float(value)
+        index = self.count
+        self.count += 1
+        self.last = value
+        if index % self.size == 0:
+            if len(self.mins) == 2 * self.buckets:
+                self._merge()  # index = 2 x buckets x taille : reste un début de seau
+            self.mins.append((index, value))
+            self.maxs.append((index, value))
+            return
+        if value < self.mins[-1][1]:
+            self.mins[-1] = (index, value)
+        if value > self.maxs[-1][1]:
+            self.maxs[-1] = (index, value)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def _merge(self):
+        self.mins = [min(pair, key=lambda item: item[1]) for pair in zip(self.mins[::2], self.mins[1::2])]
+        self.maxs = [max(pair, key=lambda item: item[1]) for pair in zip(self.maxs[::2], self.maxs[1::2])]
+        self.size *= 2
+
+    def points(self):
+        """(x, y) : minimum et maximum de chaque seau dans l'ordre, puis la dernière valeur"""
+        if not self.count:
+            return np.zeros(0), np.zeros(0)
+        points = {}
+        for index, value in self.mins:
+            points[index] = value
+        for index, value in self.maxs:
+            points[index] = value
+        points[self.count - 1] = self.last
+        x = np.fromiter(sorted(points), dtype=np.float64, count=len(points))
+        return x, np.array([points[int(index)] for index in x])
+
+
+class LiveChart:
+    """Graphe mis à jour toutes les `every` valeurs, rendu dans un thread d'arrière-plan"""
+
+    def __init__(self, path, every=10, width=WIDTH, height=HEIGHT, title=TITLE, label=LABEL):
+        self.path = path
+        self.every = every
+        self.width = width
+        self.height = height
+        self.title = title
+        self.label = label
+        self.accumulator = MinMaxAccumulator(width // 2)  # ~ 2 points par seau -> ~ un point par pixel
+        self.render_time = Histogram()
+        self.renders = 0
+        self.skipped = 0  # Demandes remplacées par une plus récente avant d'être rendues
+        self.pending = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.thread = threading.Thread(target=self._run, name='live-chart', daemon=True)
+        self.thread.start()
+
+    def append(self, value):
+        """Nouvelle valeur nette (appelé à chaque tick)"""
+        self.accumulator.append(value)
+        if self.accumulator.count % self.every == 0:
+            self.request()
+
+    def extend(self, values):
+        """Historique existant (par exemple après une reprise depuis un checkpoint)"""
+        self.accumulator.extend(history_values(values))
+
+    def request(self):
+        """Demande un rendu des points actuels (O(largeur), sans attendre le rendu)"""
+        points = self.accumulator.points()
+        with self.lock:
+            if self.pending is not None:
+                self.skipped += 1
+            self.pending = points
+            self.idle.clear()
+        self.wake.set()
+
+    def _run(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                points, self.pending = self.pending, None
+            if points is not None and len(points[0]):
+                started = time.perf_counter_ns()
+                try:
+                    render_points(*points, self.path, self.width, self.height, self.title, self.label)
+                    self.renders += 1
+                except Exception as e:
+                    print(f"Erreur de rendu du graphe ({self.path}) : {e}")
+                self.render_time.record(time.perf_counter_ns() - started)
+            with self.lock:
+                if self.pending is None:
+                    self.idle.set()
+
+    def wait(self, timeout=None):
+        """Attend la fin des rendus demandés (fin de script)"""
+        return self.idle.wait(timeout)
+
+    def stats(self):
+        return {'renders': self.renders, 'skipped': self.skipped, 'points': self.accumulator.count,
+                'render': self.render_time.summary()}
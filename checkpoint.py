@@ -0,0 +1,226 @@
+"""Redémarrage à chaud : checkpoints de l'état d'un bot et de ses indicateurs.
+
+Un redémarrage repartait de zéro : solde initial, indicateurs à réchauffer sur
+tout l'historique et rafale de requêtes de klines. `Checkpointer` écrit
+périodiquement un instantané compact :
+- `<nom>.json` : attributs persistés du bot (`PERSISTED` : soldes, prix
+  d'achat, positions, accumulateurs de performance, curseurs des journaux) et
+  état de l'`IndicatorEngine` ;
+- `<nom>.history.npz` : historiques en listes des scripts sans journal, en
+  colonnes typées plutôt qu'en JSON ;
+- `<nom>.npz` : les dernières bougies du `CandleCache` (moins souvent).
+Chaque fichier est écrit à côté puis renommé (`os.replace`) : un arrêt brutal
+laisse toujours le checkpoint précédent intact.
+
+Au démarrage, `restore()` recharge le tout en quelques millisecondes ; le cache
+ne redemande ensuite que les bougies manquantes depuis l'arrêt (une requête).
+
+    checkpoint = Checkpointer('checkpoints/smart/ETHUSDT.json', bot, engine, get_cache('ETHUSDT', '1m'))
+    iteration = checkpoint.restore()
+    while True:
+        iteration += 1
+        ...
+        checkpoint.maybe_save(iteration)
+"""
+import atexit
+import json
+import os
+import time
+
+import numpy as np
+
+from candle_cache import FIELDS
+from profiling import stage
+
+CHECKPOINT_VERSION = 2
+# Attributs d'état d'un `TradingBot` ; les attributs dérivés (`trades_note`...) sont recalculés au démarrage
+PERSISTED = ('balance', 'crypto_balance', 'eth_balance', 'buy_price', 'entry_value',
+             'trade_history', 'net_worth_history', 'analytics')
+
+
+def write_json(path, state):
+    """Écrit `state` en JSON compact (remplacement atomique)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(temporary, path)
+
+
+def read_json(path):
+    """Checkpoint JSON, ou None s'il est absent ou illisible"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Checkpoint illisible ignoré ({path}) : {e}")
+        return None
+
+
+def write_npz(path, arrays):
+    """Écrit des tableaux dans un .npz (remplacement atomique)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temporary, path)
+
+
+def write_arrays(path, arrays, live):
+    """Écrit les colonnes de bougies dans un .npz (remplacement atomique)"""
+    write_npz(path, dict(arrays, live=np.array(live)))
+
+
+def read_arrays(path):
+    """(colonnes, live) d'un .npz de bougies, ou None"""
+    try:
+        with np.load(path) as stored:
+            return {name: stored[name] for name in FIELDS}, bool(stored['live'])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Bougies du checkpoint ignorées ({path}) : {e}")
+        return None
+
+
+def read_history(path):
+    """Historiques en colonnes d'un .npz, ou {} s'il est absent ou illisible"""
+    try:
+        with np.load(path) as stored:
+            return {name: stored[name] for name in stored.files}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Historiques du checkpoint ignorés ({path}) : {e}")
+        return {}
+
+
+def history_columns(name, values):
+    """Colonnes d'une liste d'historique : tuples transposés, ou valeurs simples"""
+    if values and isinstance(values[0], tuple):
+        return {f'{name}.{i}': np.array(column) for i, column in enumerate(zip(*values))}
+    return {name: np.array(values, dtype=float)}
+
+
+def history_list(name, entry, arrays):
+    """Liste reconstruite depuis les colonnes de `history_columns()` (tronquée à la longueur du checkpoint)"""
+    length = entry['length']
+    if entry['columns']:
+        columns = [arrays[f'{name}.{i}'][:length].tolist() for i in range(entry['columns'])]
+        return list(zip(*columns))
+    return arrays[name][:length].tolist() if name in arrays else []
+
+
+def bot_state(bot):
+    """Attributs `PERSISTED` d'un `TradingBot` : (état JSON, colonnes des historiques en listes)"""
+    state, arrays = {}, {}
+    for name in PERSISTED:
+        if not hasattr(bot, name):
+            continue
+        value = getattr(bot, name)
+        if isinstance(value, list):
+            # trade_history / net_worth_history des scripts sans ledger : dans le .npz, pas en JSON
+            columns = history_columns(name, value)
+            arrays.update(columns)
+            state[name] = {'length': len(value), 'columns': len(columns) if name not in columns else 0}
+        elif hasattr(value, 'state') and hasattr(value, 'load_state'):
+            state[name] = {'state': value.state()}
+        else:
+            state[name] = value
+    return state, arrays
+
+
+def restore_bot(bot, state, arrays=None):
+    """Applique un état produit par `bot_state()` ; un journal incohérent garde son contenu sur disque"""
+    for name, value in state.items():
+        if name not in PERSISTED:
+            continue
+        current = getattr(bot, name, None)
+        if isinstance(value, dict) and 'state' in value and hasattr(current, 'load_state'):
+            try:
+                current.load_state(value['state'])
+            except ValueError as e:
+                print(f"Historique {name} du checkpoint ignoré : {e}")
+        elif isinstance(value, dict) and 'length' in value:
+            setattr(bot, name, history_list(name, value, arrays or {}))
+        else:
+            setattr(bot, name, value)
+
+
+class Checkpointer:
+    """Sauvegarde périodique et reprise d'un bot, de son moteur d'indicateurs et de son cache"""
+
+    def __init__(self, path, bot, engine=None, cache=None, every=1, candles_every=10, candles_limit=None):
+        self.path = path
+        self.candles_path = os.path.splitext(path)[0] + '.npz'
+        self.history_path = os.path.splitext(path)[0] + '.history.npz'
+        self.bot = bot
+        self.engine = engine
+        self.cache = cache
+        self.every = every
+        self.candles_every = candles_every
+        self.candles_limit = candles_limit  # Bougies gardées (fenêtre de la stratégie), None = tout le cache
+        self.iteration = 0
+        atexit.register(self.close)
+
+    def restore(self):
+        """Recharge le dernier checkpoint ; renvoie l'itération atteinte (0 sans checkpoint)
+
+        Un journal qui ne correspond plus au checkpoint (remplacé, tronqué) est signalé et gardé tel quel.
+        """
+        started = time.perf_counter()
+        state = read_json(self.path)
+        if state is None or state.get('version') != CHECKPOINT_VERSION:
+            return 0
+        restore_bot(self.bot, state['bot'], read_history(self.history_path))
+        if self.engine is not None and state.get('engine') is not None:
+            try:
+                self.engine.load_state(state['engine'])
+            except (KeyError, ValueError) as e:
+                print(f"État des indicateurs ignoré : {e}")
+                self.engine.reset()  # Reconstruit depuis les bougies au premier `sync()`
+        candles = 0
+        if self.cache is not None and not len(self.cache):
+            stored = read_arrays(self.candles_path)
+            if stored is not None:
+                candles = self.cache.load_arrays(*stored)
+        self.iteration = state['iteration']
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"Reprise à l'itération {self.iteration} depuis {self.path} "
+              f"({candles} bougies locales, {elapsed:.1f} ms)")
+        return self.iteration
+
+    def save(self, iteration, candles=False):
+        """Écrit le checkpoint de l'itération (et les bougies si `candles`)"""
+        with stage('checkpoint'):
+            self.iteration = iteration
+            state = {
+                'version': CHECKPOINT_VERSION,
+                'saved_at': int(time.time() * 1000),
+                'iteration': iteration,
+                'engine': self.engine.state() if self.engine is not None else None,
+            }
+            state['bot'], history = bot_state(self.bot)
+            if history:
+                # Avant le JSON : un arrêt entre les deux laisse des colonnes trop longues, tronquées à la reprise
+                write_npz(self.history_path, history)
+            write_json(self.path, state)
+            if candles and self.cache is not None and len(self.cache):
+                write_arrays(self.candles_path, self.cache.arrays(self.candles_limit), self.cache.live is not None)
+
+    def maybe_save(self, iteration):
+        """Checkpoint toutes les `every` itérations, bougies toutes les `candles_every`"""
+        self.iteration = iteration
+        if iteration % self.every == 0:
+            self.save(iteration, candles=iteration % self.candles_every == 0)
+
+    def close(self):
+        """Dernier checkpoint complet à l'arrêt du script"""
+        if self.iteration:
+            self.save(self.iteration, candles=True)
@@ -0,0 +1,104 @@
+"""Point d'entrée non interactif des bots (déploiement supervisé ou en conteneur).
+
+Stratégies, symboles, intervalle, capital et paramètres de risque sont donnés
+en arguments ou dans un fichier de configuration (.json, ou .toml) dont les
+clés reprennent les noms des options ; les arguments priment sur le fichier.
+
+    python cli.py --strategies combined --symbols ETHUSDT --stop-loss 0.02 --take-profit 0.05
+    python cli.py --config bot.toml --iterations 10
+
+Les modules lourds (pandas, scripts des stratégies) ne sont importés qu'après
+l'analyse des arguments, `inquirer` et `matplotlib` jamais : aucun menu
+interactif ni graphe. Le temps jusqu'au premier signal est affiché.
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import os
+
+from strategies import STRATEGIES, parse_symbols  # Sans dépendance lourde
+
+CONFIG_KEYS = ('strategies', 'symbols', 'interval', 'balance', 'stop_loss', 'take_profit', 'journal',
+               'iterations', 'verbose')
+
+
+def load_config(path):
+    """Options lues dans un fichier .json ou .toml"""
+    if os.path.splitext(path)[1] == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    else:
+        with open(path) as f:
+            config = json.load(f)
+    config = {key.replace('-', '_'): value for key, value in config.items()}
+    unknown = set(config) - set(CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"Clés inconnues dans {path} : {', '.join(sorted(unknown))}")
+    # Listes acceptées dans le fichier pour les stratégies et les symboles
+    for key in ('strategies', 'symbols'):
+        if isinstance(config.get(key), list):
+            config[key] = ','.join(config[key])
+    return config
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bots de trading sans interaction")
+    parser.add_argument('--config', help="Fichier de configuration .json ou .toml")
+    parser.add_argument('--strategies', default='combined',
+                        help=f"Stratégies séparées par des virgules ({', '.join(STRATEGIES)})")
+    parser.add_argument('--symbols', default='ETHUSDT', help="Symboles séparés par des virgules, ou @fichier")
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--balance', type=float, default=1000, help="Capital fictif par bot")
+    parser.add_argument('--stop-loss', type=float, help="Stop-Loss en fraction (0.02 = 2 %%)")
+    parser.add_argument('--take-profit', type=float, help="Take-Profit en fraction (0.05 = 5 %%)")
+    parser.add_argument('--journal', help="Répertoire des journaux de transactions")
+    parser.add_argument('--iterations', type=int, help="Nombre de bougies (illimité par défaut)")
+    parser.add_argument('--verbose', action='store_true', help="Affiche la sortie de chaque bot")
+    return parser
+
+
+def parse_args(argv=None):
+    """Arguments de la ligne de commande complétés par le fichier de configuration"""
+    parser = build_parser()
+    args, _ = parser.parse_known_args(argv)
+    if args.config:
+        try:
+            parser.set_defaults(**load_config(args.config))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from portfolio import Portfolio
+
+    imported = time.perf_counter()
+    strategies = [name.strip() for name in args.strategies.split(',') if name.strip()]
+    symbols = parse_symbols(args.symbols)
+    bot_options = {'stop_loss_percent': args.stop_loss, 'take_profit_percent': args.take_profit}
+    portfolio = Portfolio(strategies, symbols, args.interval, args.balance, args.journal,
+                          quiet=not args.verbose, bot_options=bot_options)
+    ready = time.perf_counter()
+
+    portfolio.step()
+    first_signal = time.perf_counter()
+    portfolio.report()
+    print(f"Premier signal après {(first_signal - STARTED) * 1000:.0f} ms "
+          f"(imports {(imported - STARTED) * 1000:.0f} ms, bots {(ready - imported) * 1000:.0f} ms, "
+          f"données et signaux {(first_signal - ready) * 1000:.0f} ms)")
+
+    if args.iterations is None or args.iterations > 1:
+        from scheduler import CandleScheduler
+        scheduler = CandleScheduler()
+        scheduler.add_job('CLI', args.interval, lambda job, boundary: (portfolio.step(), portfolio.report()))
+        scheduler.run(None if args.iterations is None else args.iterations - 1)
+
+
+if __name__ == '__main__':
+    main()
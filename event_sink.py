@@ -0,0 +1,269 @@
+"""Sortie non bloquante des bots : événements structurés écrits par lots.
+
+Chaque `print` de la boucle était une écriture synchrone sur un terminal ou un
+tube qui peut être lent : si la sortie n'est pas lue, la boucle de trading
+s'arrête. Ici les bots appellent `emit(type, message, **champs)` : l'événement
+(transaction, signal, performance...) est ajouté à une file bornée en mémoire,
+et un thread d'arrière-plan l'écrit par lots vers une ou plusieurs sorties :
+- console : le `message` (gabarit `str.format`) est rendu dans le thread,
+  avec le même texte que les anciens `print` ;
+- jsonl : un objet JSON par ligne (type, heure, champs) ;
+- binaire : lots `pickle` ajoutés au fichier, relus par `read_events()`.
+
+Quand la file est pleine, `emit()` ne bloque jamais : selon la politique, le
+nouvel événement (`drop_new`) ou le plus ancien (`drop_old`) est perdu et
+compté ; le nombre d'événements perdus est signalé sur la sortie.
+
+Variables d'environnement lues par `get_sink()` :
+- BOT_EVENTS : sorties séparées par des virgules, `console` (par défaut),
+  `jsonl:chemin`, `bin:chemin` ou `none`
+- BOT_EVENTS_POLICY : `drop_new` (par défaut) ou `drop_old`
+- BOT_EVENTS_CAPACITY : taille de la file (10000 par défaut)
+"""
+import atexit
+import contextlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import deque
+
+POLICIES = ('drop_new', 'drop_old')
+
+
+def render(record):
+    """Texte console d'un événement (time, kind, message, fields, quiet)"""
+    _, kind, message, fields, _ = record
+    if not message:
+        return f"{kind} {fields}"
+    try:
+        return message.format(**fields)
+    except (KeyError, IndexError, ValueError) as e:
+        return f"{kind} {fields} (gabarit invalide : {e})"
+
+
+def as_dict(record):
+    event_time, kind, _, fields, _ = record
+    return {'time': event_time, 'kind': kind, **fields}
+
+
+class ConsoleOutput:
+    """Texte des événements sur la sortie standard (ou `stream`), une écriture par lot"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, records):
+        lines = [render(record) for record in records if not record[4]]
+        if lines:
+            stream = self.stream or sys.stdout
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+
+    def close(self):
+        pass
+
+
+class JsonLinesOutput:
+    """Un objet JSON par ligne, ajouté au fichier"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'a')
+
+    def write(self, records):
+        self.file.write(''.join(json.dumps(as_dict(record), default=str) + '\n' for record in records))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class BinaryOutput:
+    """Lots d'événements sérialisés avec `pickle`, ajoutés au fichier"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'ab')
+
+    def write(self, records):
+        pickle.dump([as_dict(record) for record in records], self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_events(path):
+    """Relit les événements d'un fichier jsonl ou binaire"""
+    if path.endswith('.jsonl'):
+        with open(path) as f:
+            for line in f:
+                yield json.loads(line)
+        return
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+class EventSink:
+    """File bornée d'événements vidée par lots dans un thread d'arrière-plan"""
+
+    def __init__(self, outputs, capacity=10000, policy='drop_new', flush_interval=0.1, batch_size=256):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue : {policy} (disponibles : {', '.join(POLICIES)})")
+        self.outputs = list(outputs)
+        self.capacity = capacity
+        self.policy = policy
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = deque(maxlen=capacity if policy == 'drop_old' else None)
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()  # Garde l'ordre entre le thread et `flush()`
+        self.emitted = 0
+        self.dropped = 0
+        self.reported_drops = 0
+        self.written = 0
+        self.quiet = 0  # > 0 dans `muted()`
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='event-sink', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def emit(self, kind, message='', **fields):
+        """Ajoute un événement sans jamais attendre la sortie"""
+        record = (time.time() * 1000, kind, message, fields, self.quiet > 0)
+        with self.condition:
+            self.emitted += 1
+            if len(self.queue) >= self.capacity:
+                self.dropped += 1
+                if self.policy == 'drop_new':
+                    return False
+            self.queue.append(record)  # drop_old : la deque borne écarte le plus ancien
+            if len(self.queue) >= self.batch_size:
+                self.condition.notify()
+        return True
+
+    @contextlib.contextmanager
+    def muted(self):
+        """Événements gardés dans les fichiers mais pas affichés sur la console"""
+        self.quiet += 1
+        try:
+            yield
+        finally:
+            self.quiet -= 1
+
+    def _drain(self):
+        with self.condition:
+            records = list(self.queue)
+            self.queue.clear()
+            dropped = self.dropped - self.reported_drops
+            self.reported_drops = self.dropped
+        if dropped:
+            records.append((time.time() * 1000, 'dropped',
+                            "[event_sink] {count} événements perdus (file pleine)", {'count': dropped}, False))
+        return records
+
+    def _write(self):
+        with self.write_lock:
+            records = self._drain()
+            if not records:
+                return 0
+            for output in self.outputs:
+                try:
+                    output.write(records)
+                except Exception as e:
+                    print(f"Erreur de sortie des événements ({type(output).__name__}) : {e}", file=sys.stderr)
+            self.written += len(records)
+            return len(records)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.closed and len(self.queue) < self.batch_size:
+                    self.condition.wait(self.flush_interval)
+                closed = self.closed
+            self._write()
+            if closed:
+                return
+
+    def flush(self):
+        """Écrit immédiatement les événements en attente (dans le thread appelant)"""
+        self._write()
+
+    def close(self):
+        if self.closed:
+            return
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join(timeout=5)
+        if self.thread.is_alive():
+            return  # Sortie bloquée : on n'attend pas plus à l'arrêt
+        self.flush()
+        for output in self.outputs:
+            output.close()
+
+    def stats(self):
+        return {'emitted': self.emitted, 'written': self.written, 'dropped': self.dropped,
+                'pending': len(self.queue), 'policy': self.policy}
+
+
+def outputs_from_spec(spec):
+    """'console,jsonl:events.jsonl,bin:events.bin' -> sorties"""
+    outputs = []
+    for item in spec.split(','):
+        kind, _, path = item.strip().partition(':')
+        if kind == 'console':
+            outputs.append(ConsoleOutput())
+        elif kind == 'jsonl':
+            outputs.append(JsonLinesOutput(path or 'events.jsonl'))
+        elif kind == 'bin':
+            outputs.append(BinaryOutput(path or 'events.bin'))
+        elif kind not in ('', 'none'):
+            raise ValueError(f"Sortie d'événements inconnue : {kind}")
+    return outputs
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """Sortie partagée du processus, configurée par les variables d'environnement"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = EventSink(outputs_from_spec(os.environ.get('BOT_EVENTS', 'console')),
+                                  capacity=int(os.environ.get('BOT_EVENTS_CAPACITY', 10000)),
+                                  policy=os.environ.get('BOT_EVENTS_POLICY', 'drop_new'))
+    return _sink
+
+
+def set_sink(sink):
+    """Remplace la sortie partagée (l'ancienne est vidée et fermée)"""
+    global _sink
+    with _sink_lock:
+        previous, _sink = _sink, sink
+    if previous is not None:
+        previous.close()
+    return sink
+
+
+def emit(kind, message='', **fields):
+    return get_sink().emit(kind, message, **fields)
+
+
+def muted():
+    return get_sink().muted()
@@ -0,0 +1,119 @@
+"""Registre d'indicateurs partagé entre stratégies.
+
+Plusieurs stratégies sur le même symbole calculent les mêmes indicateurs
+(RSI(14) et MACD(12,26,9) pour HF_trading.py et smart.py, SMA_50/SMA_200/RSI
+pour les deux bots etherum). Le registre calcule chaque indicateur une seule
+fois par mise à jour de bougie, sous la clé (symbole, intervalle, indicateur,
+paramètres, longueur de fenêtre), et sert à toutes les stratégies le même
+tableau en lecture seule : le DataFrame reçu n'est plus modifié. Les jeux de
+paramètres qui ne sont plus demandés sont évincés (LRU).
+
+La longueur de fenêtre fait partie de la clé car les EMA dépendent de la
+première bougie : un RSI sur 100 bougies (bots RSI/MACD) et un RSI sur 200
+bougies (bots SMA) sont deux entrées distinctes.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from vectorized import macd_np, rsi_np, sma_np, supertrend_np
+
+# Indicateur -> (colonnes d'entrée, fonction vectorisée)
+INDICATORS = {
+    'rsi': (('close',), rsi_np),
+    'sma': (('close',), sma_np),
+    'macd': (('close',), macd_np),
+    'supertrend': (('high', 'low', 'close'), supertrend_np),
+}
+
+# Colonne utilisée par les scripts -> (indicateur, paramètres, sortie)
+COLUMNS = {
+    'RSI': ('rsi', (14,), None),
+    'MACD_Line': ('macd', (12, 26, 9), 0),
+    'Signal_Line': ('macd', (12, 26, 9), 1),
+    'SMA_50': ('sma', (50,), None),
+    'SMA_200': ('sma', (200,), None),
+    'Supertrend': ('supertrend', (10, 3), 0),
+}
+
+
+def source_version(data):
+    """Identifie l'état des bougies : `version` d'un CandleCache, sinon la dernière bougie d'un DataFrame"""
+    version = getattr(data, 'version', None)
+    if isinstance(version, int):
+        return version
+    if not len(data):
+        return (0,)
+    last = tuple(float(data[column].iat[-1]) for column in ('open', 'high', 'low', 'close') if column in data)
+    return (len(data), data['timestamp'].iat[0], data['timestamp'].iat[-1]) + last
+
+
+def _columns(data, names):
+    if hasattr(data, 'arrays'):  # CandleCache
+        arrays = data.arrays()
+        return [arrays[name] for name in names]
+    return [data[name].to_numpy(dtype=np.float64) for name in names]
+
+
+def _read_only(result):
+    for array in (result if isinstance(result, tuple) else (result,)):
+        array.setflags(write=False)
+    return result
+
+
+class IndicatorRegistry:
+    """Indicateurs mémoïsés par (symbole, intervalle, indicateur, paramètres, fenêtre), éviction LRU"""
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # clé -> (version des bougies, résultat)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, symbol, interval, name, params, data):
+        """Résultat de l'indicateur `name(*params)` sur `data` (DataFrame ou CandleCache)"""
+        key = (symbol, interval, name, tuple(params), len(data))
+        version = source_version(data)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        inputs, function = INDICATORS[name]
+        result = _read_only(function(*_columns(data, inputs), *params))
+        self.entries[key] = (version, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def column(self, symbol, interval, column, data):
+        """Série complète d'une colonne de `COLUMNS` (tableau en lecture seule)"""
+        name, params, output = COLUMNS[column]
+        result = self.get(symbol, interval, name, params, data)
+        return result if output is None else result[output]
+
+    def last_row(self, symbol, interval, data, columns):
+        """Dernières valeurs des colonnes demandées, plus 'close' (remplace `data.iloc[-1]`)"""
+        row = {column: float(self.column(symbol, interval, column, data)[-1]) for column in columns}
+        row['close'] = float(_columns(data, ('close',))[0][-1])
+        return row
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+
+_registry = None
+
+
+def get_registry():
+    """Registre partagé par tout le processus"""
+    global _registry
+    if _registry is None:
+        _registry = IndicatorRegistry()
+    return _registry
@@ -0,0 +1,413 @@
+"""Indicateurs incrémentaux : mise à jour en O(1) à chaque bougie.
+
+Chaque indicateur garde un état "validé" (bougies clôturées) et la valeur de la
+bougie en cours. `update()` ajoute une nouvelle bougie, `revise()` corrige le
+prix de la bougie en cours. Les résultats correspondent aux versions pandas de
+`rsi()`, `macd()` et `simple_moving_average()` des scripts, et de `supertrend_np()`.
+"""
+from collections import deque
+import itertools
+import math
+
+NAN = float('nan')
+
+
+class IncrementalSMA:
+    """Moyenne mobile simple sur une fenêtre glissante (somme courante)"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+
+    def update(self, value):
+        """Ajoute une nouvelle valeur à la fenêtre"""
+        self.window.append(value)
+        self.total += value
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        return self.value
+
+    def revise(self, value):
+        """Remplace la dernière valeur de la fenêtre"""
+        if not self.window:
+            return self.update(value)
+        self.total += value - self.window[-1]
+        self.window[-1] = value
+        return self.value
+
+    @property
+    def value(self):
+        if len(self.window) < self.period:
+            return NAN
+        return self.total / self.period
+
+    def state(self):
+        return {'window': list(self.window), 'total': self.total}
+
+    def load_state(self, state):
+        self.window = deque(state['window'])
+        self.total = state['total']
+
+
+class IncrementalEMA:
+    """EMA équivalente à `ewm(span=..., adjust=False).mean()`"""
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.previous = None  # EMA de la bougie précédente (validée)
+        self.value = NAN
+
+    def update(self, value):
+        """Valide la bougie en cours et démarre une nouvelle bougie"""
+        if not math.isnan(self.value):
+            self.previous = self.value
+        return self.revise(value)
+
+    def revise(self, value):
+        """Recalcule l'EMA avec le nouveau prix de la bougie en cours"""
+        if self.previous is None:
+            self.value = value
+        else:
+            self.value = self.previous + self.alpha * (value - self.previous)
+        return self.value
+
+    def state(self):
+        return {'previous': self.previous, 'value': None if math.isnan(self.value) else self.value}
+
+    def load_state(self, state):
+        self.previous = state['previous']
+        self.value = NAN if state['value'] is None else state['value']
+
+
+class IncrementalRSI:
+    """RSI à moyennes simples, identique à `rsi()` des scripts"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.last_close = None
+        self.previous_close = None  # Clôture de l'avant-dernière bougie
+        self.gains = IncrementalSMA(period)
+        self.losses = IncrementalSMA(period)
+
+    def _delta(self, close):
+        # La première variation vaut 0 (comme `delta.where(delta > 0, 0)` sur NaN)
+        if self.previous_close is None:
+            return 0.0
+        return close - self.previous_close
+
+    def update(self, close):
+        """Ajoute une nouvelle bougie"""
+        self.previous_close = self.last_close
+        self.last_close = close
+        delta = self._delta(close)
+        self.gains.update(max(delta, 0.0))
+        self.losses.update(max(-delta, 0.0))
+        return self.value
+
+    def revise(self, close):
+        """Corrige la clôture de la bougie en cours"""
+        if self.last_close is None:
+            return self.update(close)
+        self.last_close = close
+        delta = self._delta(close)
+        self.gains.revise(max(delta, 0.0))
+        self.losses.revise(max(-delta, 0.0))
+        return self.value
+
+    @property
+    def value(self):
+        gain = self.gains.value
+        loss = self.losses.value
+        if math.isnan(gain) or math.isnan(loss):
+            return NAN
+        if loss == 0:
+            return NAN if gain == 0 else 100.0
+        return 100 - (100 / (1 + gain / loss))
+
+    def state(self):
+        return {'last_close': self.last_close, 'previous_close': self.previous_close,
+                'gains': self.gains.state(), 'losses': self.losses.state()}
+
+    def load_state(self, state):
+        self.last_close = state['last_close']
+        self.previous_close = state['previous_close']
+        self.gains.load_state(state['gains'])
+        self.losses.load_state(state['losses'])
+
+
+class IncrementalMACD:
+    """MACD (ligne MACD et ligne de signal), identique à `macd()` des scripts"""
+
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9):
+        self.fast = IncrementalEMA(fast_period)
+        self.slow = IncrementalEMA(slow_period)
+        self.signal = IncrementalEMA(signal_period)
+
+    def update(self, close):
+        """Ajoute une nouvelle bougie"""
+        macd_line = self.fast.update(close) - self.slow.update(close)
+        return macd_line, self.signal.update(macd_line)
+
+    def revise(self, close):
+        """Corrige la clôture de la bougie en cours"""
+        macd_line = self.fast.revise(close) - self.slow.revise(close)
+        return macd_line, self.signal.revise(macd_line)
+
+    @property
+    def value(self):
+        return self.fast.value - self.slow.value, self.signal.value
+
+    def state(self):
+        return {'fast': self.fast.state(), 'slow': self.slow.state(), 'signal': self.signal.state()}
+
+    def load_state(self, state):
+        for name in ('fast', 'slow', 'signal'):
+            getattr(self, name).load_state(state[name])
+
+
+class IndicatorEngine:
+    """Regroupe RSI, MACD, SMA (et Supertrend si demandé) d'un symbole, tenus à jour bougie par bougie"""
+
+    def __init__(self, rsi_period=14, macd_periods=(12, 26, 9), sma_periods=(50, 200), supertrend_params=None):
+        self.rsi_period = rsi_period
+        self.macd_periods = tuple(macd_periods)
+        self.sma_periods = tuple(sma_periods)
+        self.supertrend_params = tuple(supertrend_params) if supertrend_params else None  # (période, multiplicateur)
+        self.reset()
+
+    def reset(self):
+        """Remet tous les indicateurs à zéro"""
+        self.rsi = IncrementalRSI(self.rsi_period)
+        self.macd = IncrementalMACD(*self.macd_periods)
+        self.smas = {period: IncrementalSMA(period) for period in self.sma_periods}
+        self.supertrend = IncrementalSupertrend(*self.supertrend_params) if self.supertrend_params else None
+        self.last_timestamp = None
+        self.count = 0
+
+    def update(self, close, high=None, low=None):
+        """Nouvelle bougie : la bougie précédente est considérée clôturée"""
+        self.rsi.update(close)
+        self.macd.update(close)
+        for sma in self.smas.values():
+            sma.update(close)
+        if self.supertrend is not None:
+            self.supertrend.update(close if high is None else high, close if low is None else low, close)
+        self.count += 1
+        return self.values()
+
+    def revise(self, close, high=None, low=None):
+        """Nouveau prix pour la bougie en cours"""
+        if self.count == 0:
+            return self.update(close, high, low)
+        self.rsi.revise(close)
+        self.macd.revise(close)
+        for sma in self.smas.values():
+            sma.revise(close)
+        if self.supertrend is not None:
+            self.supertrend.revise(close if high is None else high, close if low is None else low, close)
+        return self.values()
+
+    def warm_up(self, closes, highs=None, lows=None):
+        """Initialise l'état à partir d'un historique de clôtures (et des extrêmes pour le Supertrend)"""
+        if highs is None or lows is None:
+            highs = lows = [None] * len(closes)
+        for close, high, low in zip(closes, highs, lows):
+            self.update(float(close), None if high is None else float(high), None if low is None else float(low))
+        return self.values()
+
+    def values(self):
+        """Dernières valeurs, avec les mêmes noms que les colonnes des scripts"""
+        macd_line, signal_line = self.macd.value
+        values = {'RSI': self.rsi.value, 'MACD_Line': macd_line, 'Signal_Line': signal_line}
+        for period, sma in self.smas.items():
+            values[f'SMA_{period}'] = sma.value
+        if self.supertrend is not None:
+            values['Supertrend'] = self.supertrend.value
+        return values
+
+    def sync(self, data):
+        """Met l'état à jour depuis le DataFrame renvoyé par `fetch_ohlcv_cached()`
+
+        Si la dernière bougie est la même qu'au tick précédent, seule sa clôture est
+        révisée. Si une seule nouvelle bougie est apparue, la précédente est
+        finalisée puis la nouvelle ajoutée. Sinon l'état est reconstruit.
+        """
+        timestamps = data['timestamp']
+        closes = data['close']
+        last_timestamp = timestamps.iloc[-1]
+        extremes = self.supertrend is not None and 'high' in data and 'low' in data
+
+        def candle(position):
+            if not extremes:
+                return (float(closes.iloc[position]),)
+            return (float(closes.iloc[position]), float(data['high'].iloc[position]),
+                    float(data['low'].iloc[position]))
+
+        if self.last_timestamp is not None and last_timestamp == self.last_timestamp:
+            self.revise(*candle(-1))
+        elif (self.last_timestamp is not None and len(data) > 1
+              and timestamps.iloc[-2] == self.last_timestamp):
+            self.revise(*candle(-2))
+            self.update(*candle(-1))
+        else:
+            self.reset()
+            if extremes:
+                self.warm_up(closes.to_numpy(), data['high'].to_numpy(), data['low'].to_numpy())
+            else:
+                self.warm_up(closes.to_numpy())
+
+        self.last_timestamp = last_timestamp
+        return self.values()
+
+    def state(self):
+        """État complet sérialisable en JSON (checkpoint pour un redémarrage à chaud)"""
+        last_timestamp = self.last_timestamp
+        if last_timestamp is not None and hasattr(last_timestamp, 'value'):
+            last_timestamp = int(last_timestamp.value)  # pd.Timestamp -> ns
+        return {
+            'rsi_period': self.rsi_period,
+            'macd_periods': list(self.macd_periods),
+            'sma_periods': list(self.sma_periods),
+            'count': self.count,
+            'last_timestamp': last_timestamp,
+            'rsi': self.rsi.state(),
+            'macd': self.macd.state(),
+            'smas': {str(period): sma.state() for period, sma in self.smas.items()},
+            'supertrend_params': list(self.supertrend_params) if self.supertrend_params else None,
+            'supertrend': self.supertrend.state() if self.supertrend is not None else None,
+        }
+
+    def load_state(self, state):
+        """Restaure un état produit par `state()` avec les mêmes paramètres"""
+        if (state['rsi_period'] != self.rsi_period or tuple(state['macd_periods']) != self.macd_periods
+                or tuple(state['sma_periods']) != self.sma_periods
+                or tuple(state.get('supertrend_params') or ()) != (self.supertrend_params or ())):
+            raise ValueError("Paramètres d'indicateurs différents de ceux du checkpoint")
+        self.reset()
+        self.count = state['count']
+        self.rsi.load_state(state['rsi'])
+        self.macd.load_state(state['macd'])
+        for period, sma in self.smas.items():
+            sma.load_state(state['smas'][str(period)])
+        if self.supertrend is not None:
+            self.supertrend.load_state(state['supertrend'])
+        if state['last_timestamp'] is not None:
+            import pandas as pd
+            self.last_timestamp = pd.Timestamp(state['last_timestamp'])
+
+
+class RollingExtremum:
+    """Maximum (ou minimum) glissant en O(1) amorti grâce à une file monotone"""
+
+    def __init__(self, period, maximum=True):
+        self.period = period
+        self.maximum = maximum
+        self.queue = deque()  # (index, valeur), valeurs monotones
+        self.index = 0
+
+    def _better(self, a, b):
+        return a >= b if self.maximum else a <= b
+
+    def update(self, value):
+        """Ajoute une valeur et renvoie l'extremum de la fenêtre"""
+        while self.queue and self._better(value, self.queue[-1][1]):
+            self.queue.pop()
+        self.queue.append((self.index, value))
+        if self.queue[0][0] <= self.index - self.period:
+            self.queue.popleft()
+        self.index += 1
+        return self.value
+
+    def peek(self, value):
+        """Extremum qu'aurait la fenêtre si `value` était ajoutée, sans modifier l'état"""
+        if self.index + 1 < self.period:
+            return NAN
+        # Seul le premier élément de la file peut sortir de la fenêtre à l'ajout suivant
+        for index, candidate in itertools.islice(self.queue, 2):
+            if index > self.index - self.period:
+                return candidate if self._better(candidate, value) else value
+        return value
+
+    @property
+    def value(self):
+        if self.index < self.period:
+            return NAN
+        return self.queue[0][1]
+
+    def state(self):
+        return {'queue': [list(item) for item in self.queue], 'index': self.index}
+
+    def load_state(self, state):
+        self.queue = deque(tuple(item) for item in state['queue'])
+        self.index = state['index']
+
+
+class IncrementalSupertrend:
+    """Supertrend bougie par bougie, identique à `supertrend_np()` sur le même historique
+
+    Les bougies validées font avancer les extremums et la tendance ; la bougie en
+    cours est calculée à partir de cet état sans le modifier, ce qui permet de la
+    réviser (`revise()`) à chaque nouveau prix.
+    """
+
+    def __init__(self, period=10, multiplier=3):
+        self.period = period
+        self.multiplier = multiplier
+        self.highest = RollingExtremum(period, maximum=True)
+        self.lowest = RollingExtremum(period, maximum=False)
+        self.upper_band = NAN  # Bandes et tendance de la dernière bougie validée
+        self.lower_band = NAN
+        self.in_uptrend = True
+        self.current = None  # (high, low, close) de la bougie en cours
+        self.value = NAN
+
+    def _step(self, high, low, close):
+        """(bande haute, bande basse, tendance, valeur) d'une bougie qui suit les bougies validées"""
+        atr = self.highest.peek(high) - self.lowest.peek(low)
+        hl2 = (high + low) / 2
+        # Comparaison avec les bandes de la bougie précédente (NaN -> pas de changement)
+        in_uptrend = self.in_uptrend
+        if close > self.upper_band:
+            in_uptrend = True
+        elif close < self.lower_band:
+            in_uptrend = False
+        upper_band = hl2 + (self.multiplier * atr)
+        lower_band = hl2 - (self.multiplier * atr)
+        if self.highest.index == 0:
+            value = 0.0
+        else:
+            value = upper_band if in_uptrend else lower_band
+        return upper_band, lower_band, in_uptrend, value
+
+    def update(self, high, low, close):
+        """Valide la bougie en cours et démarre une nouvelle bougie"""
+        if self.current is not None:
+            self.upper_band, self.lower_band, self.in_uptrend, _ = self._step(*self.current)
+            self.highest.update(self.current[0])
+            self.lowest.update(self.current[1])
+        return self.revise(high, low, close)
+
+    def revise(self, high, low, close):
+        """Recalcule la bougie en cours avec ses nouveaux prix"""
+        self.current = (high, low, close)
+        self.value = self._step(high, low, close)[3]
+        return self.value
+
+    def state(self):
+        return {'highest': self.highest.state(), 'lowest': self.lowest.state(),
+                'upper_band': None if math.isnan(self.upper_band) else self.upper_band,
+                'lower_band': None if math.isnan(self.lower_band) else self.lower_band,
+                'in_uptrend': self.in_uptrend, 'current': self.current}
+
+    def load_state(self, state):
+        self.highest.load_state(state['highest'])
+        self.lowest.load_state(state['lowest'])
+        self.upper_band = NAN if state['upper_band'] is None else state['upper_band']
+        self.lower_band = NAN if state['lower_band'] is None else state['lower_band']
+        self.in_uptrend = state['in_uptrend']
+        self.current = None
+        self.value = NAN
+        if state['current'] is not None:
+            self.revise(*state['current'])
@@ -0,0 +1,102 @@
+"""Décodage rapide des klines Binance vers des tableaux NumPy typés.
+
+Le JSON compact renvoyé par `/api/v3/klines` est découpé directement en octets
+(sans `json.loads` ni DataFrame intermédiaire) et seules les colonnes demandées
+sont converties. Le DataFrame n'est construit que si l'appelant le demande.
+"""
+import json
+
+import numpy as np
+
+# Position de chaque champ dans une kline Binance
+FIELD_INDEX = {
+    'open_time': 0,
+    'open': 1,
+    'high': 2,
+    'low': 3,
+    'close': 4,
+    'volume': 5,
+    'close_time': 6,
+    'quote_asset_volume': 7,
+    'number_of_trades': 8,
+    'taker_buy_base_asset_volume': 9,
+    'taker_buy_quote_asset_volume': 10,
+}
+INT_FIELDS = {'open_time', 'close_time', 'number_of_trades'}
+ROW_WIDTH = 12
+OHLCV = ('open_time', 'open', 'high', 'low', 'close', 'volume')
+
+
+class KlineArrays:
+    """Colonnes décodées, avec DataFrame construit à la demande"""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def frame(self):
+        """DataFrame au format de `fetch_ohlcv()` (`open_time` devient `timestamp`), construit à l'appel"""
+        import pandas as pd
+        columns = {}
+        for name, values in self.arrays.items():
+            if name == 'open_time':
+                columns['timestamp'] = pd.to_datetime(values, unit='ms')
+            else:
+                columns[name] = values
+        return pd.DataFrame(columns)
+
+
+def _split_fields(payload):
+    """Découpe le JSON compact en liste de champs (octets), ou None si le format est inattendu"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    stripped = payload.strip()
+    if stripped.startswith(b'{'):
+        error = json.loads(stripped)
+        raise ValueError(f"Réponse d'erreur Binance : {error.get('code')} {error.get('msg')}")
+    body = stripped.translate(None, b'[]" \n\r\t')
+    if not body:
+        return []
+    parts = body.split(b',')
+    if len(parts) % ROW_WIDTH:
+        return None
+    return parts
+
+
+def parse_klines(payload, fields=OHLCV, out=None):
+    """Décode une réponse klines (octets, texte ou liste déjà décodée)
+
+    Seuls les champs de `fields` sont convertis. Si `out` (dict de tableaux
+    préalloués) est fourni, les valeurs y sont écrites et des vues sur la partie
+    remplie sont renvoyées.
+    """
+    for name in fields:
+        if name not in FIELD_INDEX:
+            raise ValueError(f"Champ de kline inconnu : {name}")
+
+    parts = None if isinstance(payload, list) else _split_fields(payload)
+    if parts is None:
+        rows = payload if isinstance(payload, list) else json.loads(payload)
+        columns = {name: [row[FIELD_INDEX[name]] for row in rows] for name in fields}
+    else:
+        columns = {name: parts[FIELD_INDEX[name]::ROW_WIDTH] for name in fields}
+
+    arrays = {}
+    for name, values in columns.items():
+        converter, dtype = (int, np.int64) if name in INT_FIELDS else (float, np.float64)
+        converted = list(map(converter, values))
+        if out is not None:
+            target = out[name][:len(converted)]
+            target[:] = converted
+            arrays[name] = target
+        else:
+            arrays[name] = np.array(converted, dtype=dtype)
+    return KlineArrays(arrays)
@@ -0,0 +1,146 @@
+"""Stockage disque colonnaire des bougies, lu par memory mapping.
+
+Une colonne par fichier binaire à largeur fixe (int64 pour `open_time`,
+float64 pour open/high/low/close/volume) dans `racine/SYMBOLE/INTERVALLE/`.
+Les ajouts sont en fin de fichier uniquement et dédupliqués sur `open_time`.
+La lecture renvoie des vues `np.memmap` sans copie ; un intervalle de temps se
+découpe par recherche dichotomique sur `open_time`.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+COLUMNS = {
+    'open_time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+
+
+class KlineStore:
+    """Magasin de bougies en colonnes, un répertoire par (symbole, intervalle)"""
+
+    def __init__(self, root='klines'):
+        self.root = root
+
+    def directory(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _column_path(self, symbol, interval, column):
+        return os.path.join(self.directory(symbol, interval), f'{column}.bin')
+
+    def count(self, symbol, interval):
+        """Nombre de bougies complètes (toutes colonnes écrites)"""
+        counts = []
+        for column, dtype in COLUMNS.items():
+            path = self._column_path(symbol, interval, column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            counts.append(size // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def last_open_time(self, symbol, interval):
+        """`open_time` de la dernière bougie stockée, ou None"""
+        count = self.count(symbol, interval)
+        if count == 0:
+            return None
+        return int(self._map(symbol, interval, 'open_time', count)[-1])
+
+    def _map(self, symbol, interval, column, count):
+        if count == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self._column_path(symbol, interval, column), dtype=COLUMNS[column],
+                         mode='r', shape=(count,))
+
+    def append(self, symbol, interval, arrays):
+        """Ajoute les bougies plus récentes que la dernière stockée, renvoie le nombre ajouté"""
+        open_time = np.asarray(arrays['open_time'], dtype=np.int64)
+        if len(open_time) == 0:
+            return 0
+        order = np.argsort(open_time, kind='stable')
+        # Déduplication : une seule bougie par open_time (la dernière reçue), et rien d'antérieur au stock
+        sorted_times = open_time[order]
+        keep_last = np.append(sorted_times[1:] != sorted_times[:-1], True)
+        order = order[keep_last]
+        last = self.last_open_time(symbol, interval)
+        if last is not None:
+            order = order[open_time[order] > last]
+        if len(order) == 0:
+            return 0
+
+        os.makedirs(self.directory(symbol, interval), exist_ok=True)
+        count = self.count(symbol, interval)
+        # `open_time` est écrit en dernier : une écriture interrompue laisse des colonnes plus
+        # longues, qui sont tronquées ici avant d'ajouter
+        for column in [*[name for name in COLUMNS if name != 'open_time'], 'open_time']:
+            dtype = COLUMNS[column]
+            path = self._column_path(symbol, interval, column)
+            with open(path, 'ab') as f:
+                f.truncate(count * np.dtype(dtype).itemsize)
+                np.asarray(arrays[column], dtype=dtype)[order].tofile(f)
+        return len(order)
+
+    def read(self, symbol, interval, start=None, end=None):
+        """Colonnes pour open_time dans [start, end) (ms), en vues memmap sans copie"""
+        count = self.count(symbol, interval)
+        columns = {column: self._map(symbol, interval, column, count) for column in COLUMNS}
+        first = 0 if start is None else int(np.searchsorted(columns['open_time'], start, 'left'))
+        last = count if end is None else int(np.searchsorted(columns['open_time'], end, 'left'))
+        return {column: values[first:last] for column, values in columns.items()}
+
+    def tail(self, symbol, interval, count):
+        """Les `count` dernières bougies stockées"""
+        total = self.count(symbol, interval)
+        columns = {column: self._map(symbol, interval, column, total) for column in COLUMNS}
+        return {column: values[max(0, total - count):] for column, values in columns.items()}
+
+    def frame(self, symbol, interval, start=None, end=None):
+        """DataFrame des scripts pour l'intervalle demandé"""
+        from candle_cache import frame_from_arrays
+        return frame_from_arrays(self.read(symbol, interval, start, end))
+
+
+def download(store, symbol, interval, days, fetcher=None):
+    """Complète le stock avec l'historique Binance des `days` derniers jours"""
+    from candle_cache import MAX_LIMIT, interval_ms, kline_columns, request_klines
+    fetcher = fetcher or request_klines
+    step = interval_ms(interval)
+    now = int(time.time() * 1000)
+    last = store.last_open_time(symbol, interval)
+    start_time = last + step if last is not None else now - days * 86_400_000
+    total = 0
+    while start_time < now:
+        page = kline_columns(fetcher(symbol, interval, limit=MAX_LIMIT, start_time=start_time))
+        # La dernière bougie renvoyée peut être en cours : seules les bougies clôturées sont gardées
+        closed = page['close_time'] < now
+        if not closed.any():
+            break
+        arrays = {column: page[column][closed].astype(dtype) for column, dtype in COLUMNS.items()}
+        total += store.append(symbol, interval, arrays)
+        start_time = int(arrays['open_time'][-1]) + step
+        if len(page['open_time']) < MAX_LIMIT:
+            break
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Télécharge l'historique de bougies dans le stock local")
+    parser.add_argument('symbol')
+    parser.add_argument('interval', nargs='?', default='1m')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--root', default='klines')
+    args = parser.parse_args()
+
+    store = KlineStore(args.root)
+    start = time.perf_counter()
+    added = download(store, args.symbol, args.interval, args.days)
+    print(f"{added} bougies ajoutées en {time.perf_counter() - start:.1f}s, "
+          f"{store.count(args.symbol, args.interval)} au total")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Historiques bornés en mémoire pour les boucles longues.
+
+`TradeLedger` et `NetWorthHistory` remplacent les listes `trade_history` et
+`net_worth_history` de `TradingBot`. Les valeurs sont stockées en colonnes
+typées dans un tampon circulaire de taille fixe. Avec un fichier journal, les
+enregistrements sont aussi ajoutés (par lots) à un fichier binaire en ajout
+seul, qui garde tout l'historique consultable. La mémoire reste constante
+quelle que soit la durée d'exécution.
+
+Les deux classes gardent l'interface de liste utilisée par les scripts
+(`append`, `len`, indexation, itération).
+"""
+import atexit
+import os
+import time
+
+import numpy as np
+
+SIDES = ('BUY', 'SELL', 'SHORT', 'COVER')
+TRADE_DTYPE = np.dtype([('timestamp', '<i8'), ('side', 'i1'), ('price', '<f8'), ('quantity', '<f8')])
+NET_WORTH_DTYPE = np.dtype([('timestamp', '<i8'), ('value', '<f8')])
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def cumulative_note(history):
+    """Précision pour un historique repris d'un journal existant (compteurs cumulés)"""
+    resumed = getattr(history, 'resumed', 0)
+    return f" (cumulé : {resumed} avant ce démarrage)" if resumed else ''
+
+
+def journal_path(directory, name):
+    """Chemin du journal `name` dans `directory`, ou None sans répertoire"""
+    return os.path.join(directory, name) if directory else None
+
+
+class RecordJournal:
+    """Tampon circulaire d'enregistrements structurés + journal binaire optionnel"""
+
+    def __init__(self, dtype, capacity=4096, path=None, flush_every=256):
+        self.dtype = dtype
+        self.capacity = capacity
+        self.path = path
+        self.flush_every = min(flush_every, capacity)
+        self.buffer = np.zeros(capacity, dtype=dtype)
+        self.count = 0  # Nombre total d'enregistrements depuis l'origine
+        self.flushed = 0  # Enregistrements déjà écrits dans le journal
+        self.start = 0  # Premier enregistrement qui a pu passer par le tampon (les précédents sont sur disque)
+        self.resumed = 0  # Enregistrements repris d'un journal existant à l'ouverture
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(path):
+                # Reprise : l'historique existant reste consultable depuis le disque
+                self.count = self.flushed = os.path.getsize(path) // dtype.itemsize
+                with open(path, 'ab') as f:
+                    f.truncate(self.count * dtype.itemsize)
+                self.start = self.resumed = self.count
+            atexit.register(self.flush)
+
+    def __len__(self):
+        return self.count
+
+    def append(self, record):
+        if self.path is not None and self.count - self.flushed >= self.capacity:
+            self.flush()  # Ne jamais écraser un enregistrement non écrit
+        self.buffer[self.count % self.capacity] = record
+        self.count += 1
+        if self.path is not None and self.count - self.flushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Écrit dans le journal les enregistrements en attente"""
+        if self.path is None or self.flushed == self.count:
+            return
+        pending = self._from_buffer(self.flushed, self.count)
+        with open(self.path, 'ab') as f:
+            pending.tofile(f)
+        self.flushed = self.count
+
+    def _from_buffer(self, start, stop):
+        indices = np.arange(start, stop) % self.capacity
+        return self.buffer[indices]
+
+    def records(self, start=None, stop=None):
+        """Enregistrements [start, stop) sous forme de tableau structuré
+
+        Sans journal, `start` vaut par défaut le plus ancien enregistrement encore en mémoire.
+        """
+        oldest_in_memory = max(self.start, self.count - self.capacity)
+        if start is None:
+            start = 0 if self.path is not None else oldest_in_memory
+        stop = self.count if stop is None else min(stop, self.count)
+        start = max(0, start)
+        if start >= stop:
+            return np.zeros(0, dtype=self.dtype)
+        parts = []
+        if start < oldest_in_memory:
+            if self.path is None:
+                raise IndexError("Enregistrement sorti du tampon et aucun journal configuré")
+            self.flush()
+            journal = np.memmap(self.path, dtype=self.dtype, mode='r', shape=(self.flushed,))
+            parts.append(np.array(journal[start:min(stop, oldest_in_memory)]))
+            start = oldest_in_memory
+        if start < stop:
+            parts.append(self._from_buffer(start, stop))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def between(self, since=None, until=None):
+        """Enregistrements dont le timestamp (ms) est dans [since, until)"""
+        records = self.records()
+        mask = np.ones(len(records), dtype=bool)
+        if since is not None:
+            mask &= records['timestamp'] >= since
+        if until is not None:
+            mask &= records['timestamp'] < until
+        return records[mask]
+
+    def state(self):
+        """État pour un checkpoint : avec un journal, le fichier sur disque fait foi"""
+        if self.path is not None:
+            self.flush()
+            return {'path': self.path, 'count': self.count}
+        return {'records': self.records().tolist()}
+
+    def load_state(self, state):
+        """Restaure les enregistrements en mémoire, ou vérifie que le journal rouvert correspond au checkpoint"""
+        if 'records' not in state:
+            if state['path'] != self.path:
+                raise ValueError(f"Journal {self.path} différent de celui du checkpoint ({state['path']})")
+            if self.count < state['count']:
+                raise ValueError(f"Journal {self.path} incomplet : {self.count} enregistrements, "
+                                 f"{state['count']} attendus par le checkpoint")
+            if self.count > state['count']:
+                # Enregistrements écrits après le dernier checkpoint : le checkpoint fait foi
+                self.flush()
+                with open(self.path, 'ab') as f:
+                    f.truncate(state['count'] * self.dtype.itemsize)
+                self.count = self.flushed = self.start = state['count']
+            return
+        records = np.array([tuple(record) for record in state['records']], dtype=self.dtype)[-self.capacity:]
+        self.buffer[:len(records)] = records
+        self.count = self.flushed = len(records)
+        self.start = 0
+
+    def _index(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("index hors limites")
+        return index
+
+
+class TradeLedger(RecordJournal):
+    """Historique des transactions : colonnes côté / prix / quantité / timestamp"""
+
+    def __init__(self, capacity=4096, path=None, flush_every=256):
+        super().__init__(TRADE_DTYPE, capacity, path, flush_every)
+
+    def append(self, trade):
+        """Ajoute un tuple (côté, prix, quantité) comme dans `trade_history.append(...)`"""
+        side, price, quantity = trade
+        super().append((now_ms(), SIDES.index(side), price, quantity))
+
+    @staticmethod
+    def _as_tuple(record):
+        return SIDES[record['side']], float(record['price']), float(record['quantity'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        index = self._index(index)
+        return self._as_tuple(self.records(index, index + 1)[0])
+
+    def __iter__(self):
+        for record in self.records():
+            yield self._as_tuple(record)
+
+
+class NetWorthHistory(RecordJournal):
+    """Historique de la valeur nette, une valeur float64 horodatée par itération"""
+
+    def __init__(self, capacity=4096, path=None, flush_every=256):
+        super().__init__(NET_WORTH_DTYPE, capacity, path, flush_every)
+
+    def append(self, value):
+        super().append((now_ms(), value))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            return self.records(start, stop)['value'][::step]
+        index = self._index(index)
+        return float(self.records(index, index + 1)['value'][0])
+
+    def __iter__(self):
+        return iter(self.records()['value'].tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.records()['value']
+        return values if dtype is None else values.astype(dtype)
@@ -0,0 +1,113 @@
+"""Signaux de tout l'univers de paires en un seul appel NumPy.
+
+Au lieu d'appeler `rsi()`, `macd()` et la fonction de signal une fois par
+symbole sur un petit DataFrame, les bougies de tous les symboles sont empilées
+en matrices (symboles x temps) et chaque règle de décision produit un vecteur
+de codes HOLD/BUY/SELL/SHORT/COVER (codes de backtest.py). Le coût d'un cycle
+reste proche de celui d'un seul symbole : le surcoût par appel de pandas n'est
+payé qu'une fois.
+
+Seule la dernière valeur des indicateurs est nécessaire : SMA et RSI ne sont
+calculés que sur la fin de la fenêtre. Les EMA du MACD et l'état du Supertrend
+dépendent de tout l'historique de la fenêtre et sont calculés en entier, comme
+dans les scripts.
+"""
+import numpy as np
+
+from backtest import BUY, COVER, HOLD, SELL, SHORT, SIGNAL_NAMES
+from vectorized import macd_np, rsi_np, sma_np, supertrend_np
+
+COLUMNS = ('high', 'low', 'close')
+
+
+def stack_frames(frames, columns=COLUMNS):
+    """{symbole: DataFrame} -> [(symboles, {colonne: matrice})], groupés par nombre de bougies"""
+    groups = {}
+    for symbol, data in frames.items():
+        groups.setdefault(len(data), []).append(symbol)
+    stacked = []
+    for length, symbols in groups.items():
+        if length == 0:
+            continue
+        matrices = {column: np.vstack([frames[symbol][column].to_numpy(dtype=np.float64) for symbol in symbols])
+                    for column in columns if all(column in frames[symbol] for symbol in symbols)}
+        stacked.append((symbols, matrices))
+    return stacked
+
+
+def last_sma(close, period):
+    """Dernière valeur de `sma_np` pour chaque ligne"""
+    return sma_np(close[..., -period:], period)[..., -1]
+
+
+def last_rsi(close, period=14):
+    """Dernière valeur de `rsi_np` pour chaque ligne (seules les `period` dernières variations comptent)"""
+    return rsi_np(close[..., -(period + 1):], period)[..., -1]
+
+
+def rsi_macd_decisions(matrices, rsi_period=14, fast_period=12, slow_period=26, signal_period=9):
+    """`combined_trade_signal` / `ultra_aggressive_trade_signal` pour chaque ligne"""
+    close = matrices['close']
+    rsi_values = last_rsi(close, rsi_period)
+    macd_line, signal_line = macd_np(close, fast_period, slow_period, signal_period)
+    macd_line, signal_line = macd_line[..., -1], signal_line[..., -1]
+    decisions = np.full(close.shape[:-1], HOLD, dtype=np.int8)
+    decisions[(rsi_values < 30) & (macd_line > signal_line)] = BUY
+    decisions[(rsi_values > 70) & (macd_line < signal_line)] = SELL
+    return decisions
+
+
+def supertrend_decisions(matrices, period=10, multiplier=3):
+    """`trade_signal` de supertrend.py pour chaque ligne"""
+    values, _ = supertrend_np(matrices['high'], matrices['low'], matrices['close'], period, multiplier)
+    close, values = matrices['close'][..., -1], values[..., -1]
+    decisions = np.full(close.shape, HOLD, dtype=np.int8)
+    decisions[close > values] = BUY
+    decisions[close < values] = SELL
+    return decisions
+
+
+def sma_rsi_decisions(matrices, fast_period=50, slow_period=200, rsi_period=14, allow_short=False):
+    """`trade_signal` de etherum-bot.py (et short-etherum.py avec `allow_short`) pour chaque ligne"""
+    close = matrices['close']
+    fast = last_sma(close, fast_period)
+    slow = last_sma(close, slow_period)
+    rsi_values = last_rsi(close, rsi_period)
+    decisions = np.full(close.shape[:-1], HOLD, dtype=np.int8)
+    if allow_short:
+        decisions[(fast > slow) & (rsi_values > 70)] = COVER
+        decisions[(fast < slow) & (rsi_values < 30)] = SHORT
+    decisions[(fast < slow) & (rsi_values > 70)] = SELL
+    decisions[(fast > slow) & (rsi_values < 30)] = BUY
+    return decisions
+
+
+def sma_rsi_short_decisions(matrices, fast_period=50, slow_period=200, rsi_period=14):
+    return sma_rsi_decisions(matrices, fast_period, slow_period, rsi_period, allow_short=True)
+
+
+# Mêmes noms que strategies.STRATEGIES
+DECISIONS = {
+    'ultra_aggressive': rsi_macd_decisions,
+    'combined': rsi_macd_decisions,
+    'supertrend': supertrend_decisions,
+    'sma_rsi': sma_rsi_decisions,
+    'sma_rsi_short': sma_rsi_short_decisions,
+}
+
+
+def decide(frames, strategy_names):
+    """{symbole: DataFrame} -> {symbole: {stratégie: 'BUY'/'SELL'/'HOLD'...}}"""
+    for name in strategy_names:
+        if name not in DECISIONS:
+            raise ValueError(f"Stratégie inconnue : {name} (disponibles : {', '.join(DECISIONS)})")
+    results = {symbol: {} for symbol in frames}
+    for symbols, matrices in stack_frames(frames):
+        computed = {}
+        for name in strategy_names:
+            function = DECISIONS[name]
+            if function not in computed:  # combined et ultra_aggressive partagent la même règle
+                computed[function] = function(matrices)
+            for symbol, code in zip(symbols, computed[function]):
+                results[symbol][name] = SIGNAL_NAMES[code]
+    return results
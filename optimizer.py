@@ -0,0 +1,261 @@
+"""Optimisation des paramètres de stratégie et de risque par balayage parallèle.
+
+Les combinaisons (grille complète ou tirage aléatoire) sont évaluées avec
+`backtest.run_backtest()` dans un pool de processus. Les tableaux de bougies
+sont placés une seule fois en mémoire partagée : chaque worker les relit sans
+copie. Chaque résultat est ajouté à un fichier JSON lines qui sert de point de
+reprise : relancer le même balayage (même stratégie, même symbole, mêmes
+données) saute les combinaisons déjà évaluées.
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+from multiprocessing import shared_memory
+
+from backtest import run_backtest
+
+COLUMNS = ('open', 'high', 'low', 'close')
+
+DEFAULT_GRIDS = {
+    'ultra_aggressive': {
+        'rsi_period': [7, 10, 14, 21],
+        'fast_period': [8, 12, 16],
+        'slow_period': [21, 26, 34],
+        'signal_period': [7, 9, 12],
+    },
+    'combined': {
+        'rsi_period': [7, 10, 14, 21],
+        'fast_period': [8, 12, 16],
+        'slow_period': [21, 26, 34],
+        'signal_period': [7, 9, 12],
+        'stop_loss_percent': [0.01, 0.02, 0.03],
+        'take_profit_percent': [0.03, 0.05, 0.08],
+    },
+    'supertrend': {
+        'period': [7, 10, 14, 20],
+        'multiplier': [1, 1.5, 2, 3, 4],
+        'stop_loss_percent': [0.01, 0.02, 0.03],
+        'take_profit_percent': [0.03, 0.05, 0.08],
+    },
+    'sma_rsi': {
+        'fast_period': [20, 50, 100],
+        'slow_period': [100, 200, 300],
+        'rsi_period': [7, 14, 21],
+    },
+    'sma_rsi_short': {
+        'fast_period': [20, 50, 100],
+        'slow_period': [100, 200, 300],
+        'rsi_period': [7, 14, 21],
+    },
+}
+
+
+def is_valid(params):
+    """Écarte les combinaisons incohérentes (moyenne rapide plus lente que la lente)"""
+    return params.get('fast_period', 0) < params.get('slow_period', float('inf'))
+
+
+def grid_combinations(grid):
+    """Toutes les combinaisons de la grille"""
+    names = sorted(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(zip(names, values))
+        if is_valid(params):
+            yield params
+
+
+def random_combinations(grid, count, seed=0):
+    """`count` combinaisons distinctes tirées au hasard dans la grille"""
+    rng = random.Random(seed)
+    names = sorted(grid)
+    total = 1
+    for name in names:
+        total *= len(grid[name])
+    seen = set()
+    attempts = 0
+    while len(seen) < count and attempts < count * 20 and len(seen) < total:
+        attempts += 1
+        params = {name: rng.choice(grid[name]) for name in names}
+        key = params_key(params)
+        if key not in seen and is_valid(params):
+            seen.add(key)
+            yield params
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def sweep_context(strategy, data, symbol=None, interval=None, initial_balance=1000):
+    """Ce qui identifie un balayage : stratégie, marché et empreinte des données"""
+    open_time = data.get('open_time') if hasattr(data, 'get') else None
+    return {
+        'strategy': strategy,
+        'symbol': symbol,
+        'interval': interval,
+        'initial_balance': initial_balance,
+        'rows': len(data['close']),
+        'first_open_time': int(open_time[0]) if open_time is not None and len(open_time) else None,
+        'last_open_time': int(open_time[-1]) if open_time is not None and len(open_time) else None,
+    }
+
+
+class SharedCandles:
+    """Bloc de mémoire partagée contenant les colonnes OHLC en float64"""
+
+    def __init__(self, data):
+        length = len(data['close'])
+        self.shape = (len(COLUMNS), length)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, 8 * len(COLUMNS) * length))
+        block = np.ndarray(self.shape, dtype=np.float64, buffer=self.memory.buf)
+        for row, name in enumerate(COLUMNS):
+            block[row] = data[name] if name in data else data['close']
+
+    @property
+    def descriptor(self):
+        """Ce qu'il faut transmettre aux workers pour s'attacher au bloc"""
+        return self.memory.name, self.shape
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+_worker = {}
+
+
+def _attach(name, shape):
+    """Initialisation d'un worker : vues NumPy sur la mémoire partagée, sans copie"""
+    memory = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+    _worker['memory'] = memory  # Garde la référence tant que le worker vit
+    _worker['data'] = {column: block[row] for row, column in enumerate(COLUMNS)}
+
+
+def _evaluate(task):
+    strategy, params, initial_balance = task
+    result = run_backtest(strategy, _worker['data'], initial_balance, **params)
+    equity = result.equity
+    drawdown = 0.0
+    if len(equity):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = float(np.nanmin(equity / np.maximum.accumulate(equity) - 1))
+    return {
+        'params': params,
+        'final_net_worth': result.final_net_worth,
+        'profit': result.profit,
+        'trades': len(result.trades),
+        'max_drawdown': drawdown,
+    }
+
+
+def load_checkpoint(path, context=None):
+    """Résultats déjà calculés (une ligne JSON par combinaison) pour ce balayage
+
+    Les lignes d'un autre balayage (stratégie, symbole ou données différents) sont ignorées.
+    """
+    results = {}
+    other = 0
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Dernière ligne tronquée par un arrêt brutal
+                if context is not None and record.get('context') != context:
+                    other += 1
+                    continue
+                results[params_key(record['params'])] = record
+    if other:
+        print(f"{other} résultats d'un autre balayage ignorés dans {path}")
+    return results
+
+
+def write_ranking(results, path, metric='profit'):
+    """Écrit les résultats triés par `metric` décroissant dans un CSV"""
+    ranked = sorted(results, key=lambda record: record[metric], reverse=True)
+    names = sorted({name for record in ranked for name in record['params']})
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['rank', *names, 'final_net_worth', 'profit', 'trades', 'max_drawdown'])
+        for rank, record in enumerate(ranked, 1):
+            writer.writerow([rank, *(record['params'].get(name) for name in names),
+                             record['final_net_worth'], record['profit'], record['trades'], record['max_drawdown']])
+    return ranked
+
+
+def sweep(strategy, data, combinations, output, initial_balance=1000, processes=None, metric='profit', chunksize=4,
+          symbol=None, interval=None):
+    """Évalue les combinaisons en parallèle, avec reprise depuis `output` (même balayage uniquement)"""
+    context = sweep_context(strategy, data, symbol, interval, initial_balance)
+    done = load_checkpoint(output, context)
+    tasks = [(strategy, params, initial_balance) for params in combinations if params_key(params) not in done]
+    print(f"{len(done)} combinaisons déjà évaluées, {len(tasks)} à calculer")
+
+    shared = SharedCandles(data)
+    start = time.perf_counter()
+    try:
+        with open(output, 'a') as f, multiprocessing.Pool(processes, _attach, shared.descriptor) as pool:
+            for count, record in enumerate(pool.imap_unordered(_evaluate, tasks, chunksize), 1):
+                record['context'] = context
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                done[params_key(record['params'])] = record
+                if count % 100 == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{count}/{len(tasks)} combinaisons ({count / elapsed:.1f}/s)")
+    finally:
+        shared.close()
+
+    ranking_path = os.path.splitext(output)[0] + '_ranked.csv'
+    ranked = write_ranking(list(done.values()), ranking_path, metric)
+    print(f"Classement écrit dans {ranking_path}")
+    return ranked
+
+
+def main():
+    from candle_cache import CandleCache
+    from kline_store import KlineStore
+
+    parser = argparse.ArgumentParser(description="Balayage des paramètres d'une stratégie")
+    parser.add_argument('--strategy', default='combined', choices=sorted(DEFAULT_GRIDS))
+    parser.add_argument('--symbol', default='ETHUSDT')
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--candles', type=int, default=5000)
+    parser.add_argument('--store', help="Lit l'historique dans ce stock local (kline_store.py) au lieu de l'API")
+    parser.add_argument('--grid', type=json.loads, help="Grille JSON, ex. '{\"rsi_period\": [7, 14]}'")
+    parser.add_argument('--random', type=int, default=0, help="Nombre de tirages aléatoires (0 = grille complète)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--metric', default='profit', choices=['profit', 'final_net_worth', 'max_drawdown'])
+    parser.add_argument('--output', default='sweep.jsonl')
+    args = parser.parse_args()
+
+    if args.store:
+        data = KlineStore(args.store).tail(args.symbol, args.interval, args.candles)
+    else:
+        cache = CandleCache(args.symbol, args.interval, capacity=args.candles)
+        cache.load()
+        data = cache.arrays()
+
+    grid = args.grid or DEFAULT_GRIDS[args.strategy]
+    combinations = random_combinations(grid, args.random, args.seed) if args.random else grid_combinations(grid)
+    ranked = sweep(args.strategy, data, combinations, args.output, processes=args.processes, metric=args.metric,
+                   symbol=args.symbol, interval=args.interval)
+    for record in ranked[:10]:
+        print(f"{record[args.metric]:.4f} {record['params']}")
+
+
+if __name__ == '__main__':
+    main()
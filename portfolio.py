@@ -0,0 +1,191 @@
+"""Plusieurs stratégies sur plusieurs symboles dans un seul processus.
+
+Chaque couple (stratégie, symbole) a son propre `TradingBot`, celui du script
+de la stratégie. Les données de marché sont partagées : un seul cache de
+bougies par symbole, rafraîchi une fois par bougie (en parallèle pour tous les
+symboles), et les indicateurs sont calculés une seule fois par symbole grâce au
+registre partagé. La valeur nette totale du portefeuille est affichée à chaque
+bougie.
+
+Usage : python portfolio.py --strategies combined,supertrend --symbols BTCUSDT,ETHUSDT
+"""
+import argparse
+import contextlib
+import inspect
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from candle_cache import get_cache
+from event_sink import get_sink, muted
+from indicator_registry import get_registry
+from scheduler import CandleScheduler
+from strategies import (DEFAULT_WINDOW, STRATEGIES, SYMBOLS, WINDOWS, load_strategy, parse_symbols,
+                        required_candles, strategy_module)
+ACTIONS = {'BUY': 'buy', 'SELL': 'sell', 'SHORT': 'short', 'COVER': 'cover'}
+
+
+def accepts(function, name):
+    return name in inspect.signature(function).parameters
+
+
+class StrategySlot:
+    """Une stratégie sur un symbole, avec son propre TradingBot"""
+
+    def __init__(self, strategy, symbol, initial_balance=1000, journal_root=None, bot_options=None):
+        self.strategy = strategy
+        self.symbol = symbol
+        self.signal_function = load_strategy(strategy)
+        bot_class = strategy_module(strategy).TradingBot
+        # Paramètres de risque transmis aux seuls bots qui les acceptent
+        kwargs = {name: value for name, value in (bot_options or {}).items()
+                  if value is not None and accepts(bot_class, name)}
+        if journal_root and accepts(bot_class, 'journal_dir'):
+            kwargs['journal_dir'] = os.path.join(journal_root, strategy, symbol)
+        self.bot = bot_class(initial_balance, **kwargs)
+        self.window = WINDOWS.get(strategy, DEFAULT_WINDOW)
+        # Les bots etherum n'ont pas de paramètre `iteration`
+        self.with_iteration = accepts(self.bot.buy, 'iteration')
+        self.last_signal = 'HOLD'
+
+    def _call(self, method, price, iteration):
+        return method(price, iteration) if self.with_iteration else method(price)
+
+    @property
+    def holdings(self):
+        return getattr(self.bot, 'crypto_balance', getattr(self.bot, 'eth_balance', 0))
+
+    def net_worth(self, price):
+        """Même calcul que `show_performance()` du script"""
+        return self.bot.balance + self.holdings * price
+
+    def step(self, data, price, iteration, registry, interval):
+        """Signal, ordre éventuel, Stop-Loss/Take-Profit et suivi de performance"""
+        signal = self.signal_function(data, registry=registry, symbol=self.symbol, interval=interval)
+        method = getattr(self.bot, ACTIONS.get(signal, ''), None)
+        if method is not None:
+            self._call(method, price, iteration)
+        if hasattr(self.bot, 'manage_risk') and self.bot.manage_risk(price, iteration) == 'SELL':
+            self.bot.sell(price, iteration)
+        self._call(self.bot.show_performance, price, iteration)
+        self.last_signal = signal
+        return signal
+
+
+class Portfolio:
+    """Toutes les stratégies x symboles alimentées par un flux de bougies par symbole"""
+
+    def __init__(self, strategies, symbols, interval='1m', initial_balance=1000, journal_root=None,
+                 quiet=True, registry=None, workers=8, bot_options=None):
+        self.interval = interval
+        self.quiet = quiet
+        self.registry = registry or get_registry()
+        self.slots = {symbol: [StrategySlot(strategy, symbol, initial_balance, journal_root, bot_options)
+                               for strategy in strategies]
+                      for symbol in symbols}
+        capacity = max(1000, required_candles(strategies))
+        self.caches = {symbol: get_cache(symbol, interval, capacity) for symbol in symbols}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.prices = {}
+        self.iteration = 0
+
+    @property
+    def initial_value(self):
+        return sum(slot.bot.initial_balance for slots in self.slots.values() for slot in slots)
+
+    def refresh(self):
+        """Une seule récupération par symbole, en parallèle ; renvoie {symbole: erreur}"""
+        futures = {symbol: self.executor.submit(cache.refresh) for symbol, cache in self.caches.items()}
+        errors = {}
+        for symbol, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                errors[symbol] = e
+        return errors
+
+    def step(self):
+        """Une bougie : rafraîchit les flux puis fait avancer tous les bots"""
+        self.iteration += 1
+        errors = self.refresh()
+        for symbol, error in errors.items():
+            print(f"[{symbol}] Données indisponibles : {error}")
+
+        with muted() if self.quiet else contextlib.nullcontext():
+            for symbol, slots in self.slots.items():
+                if symbol in errors or not len(self.caches[symbol]):
+                    continue
+                # Une fenêtre par longueur demandée, partagée par les stratégies du symbole
+                frames = {}
+                for slot in slots:
+                    if slot.window not in frames:
+                        frames[slot.window] = self.caches[symbol].frame(slot.window)
+                price = float(frames[slots[0].window]['close'].iloc[-1])
+                self.prices[symbol] = price
+                for slot in slots:
+                    try:
+                        slot.step(frames[slot.window], price, self.iteration, self.registry, self.interval)
+                    except Exception as e:
+                        print(f"[{slot.strategy}/{symbol}] Erreur : {e}", file=sys.stderr)
+        return errors
+
+    def net_worth(self):
+        """Valeur nette totale (au dernier prix connu de chaque symbole)"""
+        return sum(slot.net_worth(self.prices[symbol])
+                   for symbol, slots in self.slots.items() if symbol in self.prices
+                   for slot in slots)
+
+    def by_strategy(self):
+        totals = {}
+        for symbol, slots in self.slots.items():
+            if symbol not in self.prices:
+                continue
+            for slot in slots:
+                totals[slot.strategy] = totals.get(slot.strategy, 0.0) + slot.net_worth(self.prices[symbol])
+        return totals
+
+    def report(self):
+        if not self.quiet:
+            get_sink().flush()  # Sortie des bots avant le récapitulatif
+        net_worth = self.net_worth()
+        print(f"\n--- Bougie {self.iteration} : {len(self.prices)} symboles ---")
+        for strategy, value in self.by_strategy().items():
+            signals = ' '.join(f"{symbol}:{slot.last_signal}" for symbol, slots in self.slots.items()
+                               for slot in slots if slot.strategy == strategy)
+            print(f"{strategy:<18} {value:>12.2f} USD  {signals}")
+        print(f"Valeur nette du portefeuille : {net_worth:.2f} USD "
+              f"(Profit/Pertes : {net_worth - self.initial_value:.2f} USD)")
+
+    def run(self, iterations=None, scheduler=None):
+        """Première itération immédiate, puis une à chaque clôture de bougie"""
+        self.step()
+        self.report()
+        if iterations is not None and iterations <= 1:
+            return
+        scheduler = scheduler or CandleScheduler()
+        scheduler.add_job('PORTFOLIO', self.interval, lambda job, boundary: (self.step(), self.report()))
+        scheduler.run(None if iterations is None else iterations - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stratégies x symboles dans un seul processus")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES),
+                        help=f"Stratégies séparées par des virgules ({', '.join(STRATEGIES)})")
+    parser.add_argument('--symbols', default=','.join(SYMBOLS), help="Symboles, ou @fichier")
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--balance', type=float, default=1000, help="Capital fictif par bot")
+    parser.add_argument('--journal', help="Répertoire des journaux de transactions")
+    parser.add_argument('--iterations', type=int, help="Nombre de bougies (illimité par défaut)")
+    parser.add_argument('--verbose', action='store_true', help="Affiche la sortie de chaque bot")
+    args = parser.parse_args()
+
+    strategies = [name.strip() for name in args.strategies.split(',') if name.strip()]
+    symbols = parse_symbols(args.symbols)
+    portfolio = Portfolio(strategies, symbols, args.interval, args.balance, args.journal, quiet=not args.verbose)
+    print(f"{len(strategies)} stratégies x {len(symbols)} symboles = "
+          f"{len(strategies) * len(symbols)} bots, {len(symbols)} flux de données")
+    portfolio.run(args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Instrumentation de la boucle de trading : latence par étape et profilage.
+
+`stage('nom')` chronomètre un bloc avec `perf_counter_ns` et alimente un
+histogramme à seaux fixes (1-2-5 par décade, de 1 µs à 10 s) : p50/p99/max par
+étape sans garder les mesures. Les histogrammes peuvent être écrits dans un
+fichier JSON ou lus en local par HTTP.
+
+Variables d'environnement lues par `LoopProfiler.from_env()` :
+- BOT_METRICS_FILE : fichier JSON réécrit toutes les BOT_METRICS_EVERY itérations (100 par défaut)
+- BOT_METRICS_PORT : port HTTP local qui sert les histogrammes
+- BOT_PROFILE_ITERATIONS : active cProfile pendant N itérations
+"""
+import bisect
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bornes supérieures des seaux en nanosecondes : 1, 2, 5, 10, 20, 50 µs ... 10 s
+BUCKET_BOUNDS_NS = [mantissa * 10 ** exponent * 1000 for exponent in range(8) for mantissa in (1, 2, 5)][:-2]
+
+
+class Histogram:
+    """Histogramme à seaux fixes d'une durée en nanosecondes"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_NS, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, q):
+        """Borne supérieure du seau contenant le quantile `q` (0-1), en ns"""
+        if not self.count:
+            return 0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKET_BOUNDS_NS[index] if index < len(BUCKET_BOUNDS_NS) else self.max_ns
+        return self.max_ns
+
+    def summary(self):
+        """Statistiques en millisecondes"""
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ns / self.count / 1e6 if self.count else 0.0,
+            'p50_ms': min(self.percentile(0.5), self.max_ns) / 1e6,
+            'p99_ms': min(self.percentile(0.99), self.max_ns) / 1e6,
+            'max_ms': self.max_ns / 1e6,
+        }
+
+
+class _Stage:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+class StageTimers:
+    """Histogrammes de latence par étape"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def stage(self, name):
+        """Gestionnaire de contexte qui chronomètre le bloc"""
+        return _Stage(self.histogram(name))
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def dump(self, path):
+        """Écrit les statistiques dans un fichier JSON (remplacement atomique)"""
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        os.replace(temporary, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Sert les statistiques en JSON sur http://host:port/ dans un thread"""
+        timers = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(timers.summary(), indent=2).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def report(self):
+        lines = [f"{'étape':<12} {'n':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<12} {stats['count']:>7} {stats['p50_ms']:>9.3f} "
+                         f"{stats['p99_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+        return '\n'.join(lines)
+
+
+TIMERS = StageTimers()
+stage = TIMERS.stage
+
+
+class LoopProfiler:
+    """Crochets de fin d'itération : export des métriques et cProfile sur N itérations"""
+
+    def __init__(self, timers=TIMERS, metrics_file=None, metrics_every=100, port=None,
+                 profile_iterations=0, profile_file='profile.out'):
+        self.timers = timers
+        self.metrics_file = metrics_file
+        self.metrics_every = metrics_every
+        self.profile_iterations = profile_iterations
+        self.profile_file = profile_file
+        self.profiler = None
+        self.profiled = 0
+        if port:
+            timers.serve(port)
+        if profile_iterations:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @classmethod
+    def from_env(cls, timers=TIMERS):
+        port = os.environ.get('BOT_METRICS_PORT')
+        return cls(timers,
+                   metrics_file=os.environ.get('BOT_METRICS_FILE'),
+                   metrics_every=int(os.environ.get('BOT_METRICS_EVERY', 100)),
+                   port=int(port) if port else None,
+                   profile_iterations=int(os.environ.get('BOT_PROFILE_ITERATIONS', 0)))
+
+    def after_iteration(self, iteration):
+        if self.profiler is not None:
+            self.profiled += 1
+            if self.profiled >= self.profile_iterations:
+                self.profiler.disable()
+                self.profiler.dump_stats(self.profile_file)
+                output = io.StringIO()
+                pstats.Stats(self.profiler, stream=output).sort_stats('cumulative').print_stats(20)
+                print(output.getvalue())
+                print(f"Profil de {self.profiled} itérations écrit dans {self.profile_file}")
+                self.profiler = None
+        if self.metrics_file and iteration % self.metrics_every == 0:
+            self.timers.dump(self.metrics_file)
@@ -0,0 +1,192 @@
+"""Bougies 5m/15m/1h/4h... dérivées incrémentalement d'un seul flux 1m.
+
+Chaque intervalle cible garde l'agrégat des bougies 1m déjà clôturées de sa
+bougie en cours (ouverture, plus haut, plus bas, volume). La bougie cible en
+cours est cet agrégat combiné à la bougie 1m en cours : une révision de la
+bougie 1m (nouveau prix) ne coûte donc que O(1) par intervalle, sans jamais
+reparcourir les bougies 1m. La bougie cible est clôturée dès que la dernière
+bougie 1m de sa période est clôturée.
+
+Les bougies cibles sont stockées dans des `CandleCache` (sans récupération
+réseau) : `frame()`, `arrays()` et `version` fonctionnent comme pour un
+intervalle téléchargé, y compris avec le registre d'indicateurs.
+
+    feed = MultiTimeframeFeed('ETHUSDT', ('5m', '1h'), history=200 * 60)
+    feed.refresh()  # Une seule requête 1m
+    trend = feed.frame('1h', 200)
+"""
+import numpy as np
+
+from candle_cache import CandleCache, get_cache, interval_ms
+
+
+def _no_fetch(*args, **kwargs):
+    raise RuntimeError("Intervalle dérivé : alimenté par le Resampler, pas par l'API")
+
+
+class _Bucket:
+    """Agrégat des bougies de base clôturées d'une bougie cible en cours"""
+
+    __slots__ = ('open_time', 'open', 'high', 'low', 'volume', 'last_base')
+
+    def __init__(self, open_time, open_):
+        self.open_time = open_time
+        self.open = open_
+        self.high = -np.inf
+        self.low = np.inf
+        self.volume = 0.0
+        self.last_base = None  # open_time de la dernière bougie de base intégrée
+
+    def fold(self, candle):
+        self.high = max(self.high, candle[2])
+        self.low = min(self.low, candle[3])
+        self.volume += candle[5]
+        self.last_base = candle[0]
+
+
+class Resampler:
+    """Agrège des bougies de base (1m) en plusieurs intervalles supérieurs"""
+
+    def __init__(self, symbol, base_interval='1m', intervals=('5m', '15m', '1h', '4h'), capacity=1000):
+        self.symbol = symbol
+        self.base_interval = base_interval
+        self.base_step = interval_ms(base_interval)
+        self.steps = {}
+        for interval in intervals:
+            step = interval_ms(interval)
+            if step % self.base_step:
+                raise ValueError(f"{interval} n'est pas un multiple de {base_interval}")
+            self.steps[interval] = step
+        self.caches = {interval: CandleCache(symbol, interval, capacity, fetcher=_no_fetch)
+                       for interval in intervals}
+        self.buckets = dict.fromkeys(intervals)  # Agrégat en cours par intervalle
+        self.live = None  # Bougie de base en cours (non clôturée)
+
+    def update(self, candle, closed=False):
+        """Bougie de base (tuple de `CandleCache`), nouvelle ou révisée ; `closed` si définitive"""
+        open_time = candle[0]
+        if self.live is not None and open_time < self.live[0]:
+            return False  # Déjà intégrée
+        if self.live is not None and open_time > self.live[0]:
+            # La bougie de base précédente est terminée sans message de clôture
+            self._close_base(self.live)
+        self.live = None
+        if closed:
+            self._close_base(candle)
+        else:
+            self.live = candle
+            for interval in self.caches:
+                self._publish(interval, candle)
+        return True
+
+    def _bucket(self, interval, candle):
+        step = self.steps[interval]
+        start = candle[0] // step * step
+        bucket = self.buckets[interval]
+        if bucket is None or bucket.open_time != start:
+            if bucket is not None and self.caches[interval].live is not None:
+                self.caches[interval].close_live()  # Période précédente terminée (trou dans les données)
+            bucket = self.buckets[interval] = _Bucket(start, candle[1])
+        return bucket
+
+    def _publish(self, interval, live):
+        """Met à jour la bougie cible en cours = agrégat clôturé + bougie de base en cours"""
+        bucket = self._bucket(interval, live)
+        self.caches[interval].apply((bucket.open_time, bucket.open, max(bucket.high, live[2]),
+                                     min(bucket.low, live[3]), live[4], bucket.volume + live[5],
+                                     bucket.open_time + self.steps[interval] - 1))
+
+    def _close_base(self, candle):
+        for interval, cache in self.caches.items():
+            bucket = self._bucket(interval, candle)
+            if bucket.last_base is not None and candle[0] <= bucket.last_base:
+                continue
+            bucket.fold(candle)
+            end = bucket.open_time + self.steps[interval]
+            cache.apply((bucket.open_time, bucket.open, bucket.high, bucket.low, candle[4], bucket.volume,
+                         end - 1))
+            if candle[0] + self.base_step >= end:
+                cache.close_live()
+                self.buckets[interval] = None
+
+    def warm_up(self, arrays, live=True):
+        """Historique de base (colonnes de `CandleCache.arrays()`), agrégé en bloc
+
+        La dernière bougie est considérée en cours si `live`.
+        """
+        open_time = np.asarray(arrays['open_time'], dtype=np.int64)
+        count = len(open_time) - (1 if live and len(open_time) else 0)
+        for interval, step in self.steps.items():
+            if count == 0:
+                break
+            starts_of = open_time[:count] // step * step
+            starts = np.flatnonzero(np.r_[True, starts_of[1:] != starts_of[:-1]])
+            ends = np.r_[starts[1:], count]
+            highs = np.maximum.reduceat(arrays['high'][:count], starts)
+            lows = np.minimum.reduceat(arrays['low'][:count], starts)
+            volumes = np.add.reduceat(arrays['volume'][:count], starts)
+            cache = self.caches[interval]
+            for group, (first, last) in enumerate(zip(starts, ends)):
+                bucket_start = int(starts_of[first])
+                candle = (bucket_start, float(arrays['open'][first]), float(highs[group]), float(lows[group]),
+                          float(arrays['close'][last - 1]), float(volumes[group]), bucket_start + step - 1)
+                if group < len(starts) - 1 or int(open_time[last - 1]) + self.base_step >= bucket_start + step:
+                    cache.close_live(candle)
+                else:
+                    # Période inachevée : devient l'agrégat en cours
+                    bucket = self.buckets[interval] = _Bucket(bucket_start, candle[1])
+                    bucket.high, bucket.low, bucket.volume = candle[2], candle[3], candle[5]
+                    bucket.last_base = int(open_time[last - 1])
+                    cache.apply(candle)
+        if live and len(open_time):
+            self.update(tuple(arrays[name][-1].item() for name in
+                              ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')))
+
+    def frame(self, interval, limit=None):
+        return self.caches[interval].frame(limit)
+
+    def arrays(self, interval, limit=None):
+        return self.caches[interval].arrays(limit)
+
+
+class MultiTimeframeFeed:
+    """Un seul téléchargement 1m par symbole, tous les intervalles servis localement"""
+
+    def __init__(self, symbol, intervals=('5m', '15m', '1h', '4h'), base_interval='1m', history=1000,
+                 capacity=1000, base=None):
+        self.base = base if base is not None else get_cache(symbol, base_interval, capacity=max(history, 1000))
+        self.history = history  # Bougies de base chargées au démarrage (ex. 200 x 60 pour SMA_200 en 1h)
+        self.resampler = Resampler(symbol, base_interval, intervals, capacity)
+        self.last_seen = None  # open_time de la bougie de base la plus récente transmise
+
+    def refresh(self):
+        """Rafraîchit la bougie de base puis propage uniquement les bougies nouvelles ou révisées"""
+        if self.last_seen is None:
+            if not len(self.base):
+                self.base.load(self.history)
+            else:
+                self.base.refresh()
+            arrays = self.base.arrays()
+            self.resampler.warm_up(arrays, live=self.base.live is not None)
+        else:
+            self.base.refresh()
+            if not len(self.base):
+                return
+            newest = self.base.live[0] if self.base.live is not None else self.base.last_closed_time
+            count = min(len(self.base), int((newest - self.last_seen) // self.resampler.base_step) + 2)
+            arrays = self.base.arrays(count)
+            last = len(arrays['open_time']) - 1
+            for index in np.flatnonzero(arrays['open_time'] >= self.last_seen):
+                candle = tuple(arrays[name][index].item() for name in
+                               ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time'))
+                self.resampler.update(candle, closed=index < last or self.base.live is None)
+        if len(self.base):
+            self.last_seen = int(self.base.arrays(1)['open_time'][-1])
+
+    def frame(self, interval, limit=None):
+        if interval == self.base.interval:
+            return self.base.frame(limit)
+        return self.resampler.frame(interval, limit)
+
+    def cache(self, interval):
+        return self.base if interval == self.base.interval else self.resampler.caches[interval]
@@ -0,0 +1,143 @@
+"""Scanner multi-symboles sans interaction.
+
+Exécute les fonctions de signal existantes sur tous les symboles de
+`select_crypto()` (ou une liste fournie) à chaque cycle. Les klines sont
+récupérées en parallèle sur une session aiohttp partagée, avec une limite de
+requêtes simultanées. Chaque cycle affiche sa durée et le débit en symboles/s.
+
+Avec `--batch`, les signaux de tous les symboles sont calculés en un seul appel
+sur des matrices (symboles x temps) par matrix_signals.py.
+"""
+import argparse
+import asyncio
+import contextlib
+import time
+
+import aiohttp
+
+from binance_client import KLINES_WEIGHT, USED_WEIGHT_HEADER, get_client
+from candle_cache import KLINES_URL
+from event_sink import muted
+from kline_parser import parse_klines
+from matrix_signals import decide
+from strategies import STRATEGIES, SYMBOLS, load_strategy, parse_symbols, required_candles
+
+
+async def fetch_frame(session, semaphore, symbol, interval, limit, url=KLINES_URL):
+    """Télécharge les klines d'un symbole et renvoie le DataFrame des scripts"""
+    params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+    # Même limiteur de poids que les bots en REST synchrone
+    limiter = get_client().limiter
+    async with semaphore:
+        await asyncio.sleep(limiter.reserve(KLINES_WEIGHT))
+        async with session.get(url, params=params) as response:
+            used = response.headers.get(USED_WEIGHT_HEADER)
+            if used is not None:
+                limiter.observe(int(used))
+            response.raise_for_status()
+            payload = await response.read()
+    return parse_klines(payload).frame()
+
+
+def evaluate(data, signal_functions, quiet=True):
+    """Applique chaque fonction de signal sur une copie des données"""
+    signals = {}
+    with muted() if quiet else contextlib.nullcontext():
+        for name, function in signal_functions.items():
+            signals[name] = function(data.copy())
+    return signals
+
+
+async def scan_once(session, symbols, signal_functions, interval='1m', limit=100, concurrency=20, quiet=True,
+                    url=KLINES_URL, batch=False):
+    """Un cycle de scan : renvoie ({symbole: {stratégie: signal}}, {symbole: erreur}, statistiques)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    frames = await asyncio.gather(*(fetch_frame(session, semaphore, symbol, interval, limit, url)
+                                    for symbol in symbols), return_exceptions=True)
+    fetched = time.perf_counter()
+
+    results, errors = {}, {}
+    valid = {}
+    for symbol, data in zip(symbols, frames):
+        if isinstance(data, Exception):
+            errors[symbol] = data
+        else:
+            valid[symbol] = data
+    if batch:
+        results = decide(valid, list(signal_functions))
+    else:
+        for symbol, data in valid.items():
+            results[symbol] = evaluate(data, signal_functions, quiet)
+    end = time.perf_counter()
+
+    stats = {
+        'symbols': len(symbols),
+        'fetch_time': fetched - start,
+        'signal_time': end - fetched,
+        'wall_time': end - start,
+        'symbols_per_second': len(symbols) / (end - start) if end > start else float('inf'),
+    }
+    return results, errors, stats
+
+
+async def scan(symbols, strategy_names, interval='1m', limit=None, concurrency=20, cycles=1, every=0, quiet=True,
+               url=KLINES_URL, batch=False):
+    """Boucle de scan, `cycles=0` pour tourner indéfiniment ; `limit=None` : fenêtre des stratégies"""
+    required = required_candles(strategy_names)
+    if limit is None:
+        limit = required
+    elif limit < required:
+        print(f"--limit {limit} trop court pour {', '.join(strategy_names)} : {required} bougies demandées")
+        limit = required
+    signal_functions = {name: load_strategy(name) for name in strategy_names}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=10)
+    cycle = 0
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        while cycles == 0 or cycle < cycles:
+            cycle += 1
+            results, errors, stats = await scan_once(session, symbols, signal_functions, interval, limit,
+                                                     concurrency, quiet, url, batch)
+            report(cycle, results, errors, stats)
+            if every:
+                await asyncio.sleep(max(0.0, every - stats['wall_time']))
+    return results
+
+
+def report(cycle, results, errors, stats):
+    """Affiche les signaux non neutres et les statistiques du cycle"""
+    print(f"\n--- Cycle {cycle} ---")
+    for symbol, signals in results.items():
+        active = {name: signal for name, signal in signals.items() if signal != 'HOLD'}
+        if active:
+            print(f"{symbol} : {active}")
+    for symbol, error in errors.items():
+        print(f"{symbol} : erreur {error}")
+    print(f"{stats['symbols']} symboles en {stats['wall_time']:.3f}s "
+          f"(téléchargement {stats['fetch_time']:.3f}s, signaux {stats['signal_time']:.3f}s) "
+          f"-> {stats['symbols_per_second']:.1f} symboles/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scanner de signaux multi-symboles")
+    parser.add_argument('--symbols', type=parse_symbols, default=SYMBOLS,
+                        help="BTCUSDT,ETHUSDT,... ou @fichier (par défaut : la liste de select_crypto)")
+    parser.add_argument('--strategies', default='ultra_aggressive,combined,sma_rsi',
+                        help=f"Stratégies parmi : {', '.join(STRATEGIES)}")
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--limit', type=int, help="Bougies par symbole (par défaut : la fenêtre des stratégies)")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--cycles', type=int, default=1, help="0 = sans fin")
+    parser.add_argument('--every', type=float, default=0, help="Période entre deux cycles (s)")
+    parser.add_argument('--verbose', action='store_true', help="Affiche la sortie des fonctions de signal")
+    parser.add_argument('--batch', action='store_true', help="Tous les symboles en un appel matriciel")
+    args = parser.parse_args()
+
+    strategy_names = [name.strip() for name in args.strategies.split(',') if name.strip()]
+    asyncio.run(scan(args.symbols, strategy_names, args.interval, args.limit, args.concurrency,
+                     args.cycles, args.every, quiet=not args.verbose, batch=args.batch))
+
+
+if __name__ == '__main__':
+    main()
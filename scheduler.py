@@ -0,0 +1,173 @@
+"""Planificateur aligné sur la clôture des bougies.
+
+Au lieu d'un `time.sleep` fixe, chaque tâche (symbole, intervalle, stratégie)
+est réveillée juste après la frontière de bougie de son intervalle, mesurée
+sur l'heure du serveur Binance (le décalage de l'horloge locale est recalé
+périodiquement). Toutes les tâches partagent une seule file de minuteurs :
+celles qui tombent sur la même frontière sont exécutées ensemble.
+
+Avec le simulateur local (simulator.py), le temps serveur peut s'écouler plus
+vite que le temps réel : `BINANCE_TIME_SCALE` (ex. 1000) raccourcit d'autant
+les attentes.
+
+Les bots RSI/MACD et Supertrend se réveillent à chaque clôture. Pour suivre
+aussi la bougie en cours (ancien polling à la seconde), `BOT_LIVE_POLL` donne
+la période en secondes entre deux itérations (désactivé par défaut).
+"""
+import heapq
+import itertools
+import os
+import time
+
+from candle_cache import interval_ms
+
+TIME_SCALE = float(os.environ.get('BINANCE_TIME_SCALE', 1))  # Secondes serveur par seconde réelle
+LIVE_POLL = float(os.environ.get('BOT_LIVE_POLL', 0))  # Période de suivi de la bougie en cours, 0 = à la clôture
+
+
+class ServerClock:
+    """Horloge recalée sur `/api/v3/time`"""
+
+    def __init__(self, fetch_server_time=None, resync_every=600, scale=TIME_SCALE):
+        self.fetch_server_time = fetch_server_time
+        self.resync_every = resync_every  # Secondes entre deux recalages
+        self.scale = scale
+        self.offset_ms = 0.0
+        self.local_anchor_ms = self.server_anchor_ms = time.time() * 1000
+        self.synced_at = None
+
+    def sync(self):
+        """Mesure le décalage serveur - local (milieu de l'aller-retour)"""
+        if self.fetch_server_time is None:
+            from binance_client import get_client
+            self.fetch_server_time = get_client().server_time
+        before = time.time() * 1000
+        server_time = self.fetch_server_time()
+        after = time.time() * 1000
+        self.local_anchor_ms = (before + after) / 2
+        self.server_anchor_ms = server_time
+        self.offset_ms = server_time - self.local_anchor_ms
+        self.synced_at = time.monotonic()
+        return self.offset_ms
+
+    def now_ms(self):
+        if self.synced_at is None or time.monotonic() - self.synced_at > self.resync_every:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Recalage de l'horloge impossible ({e}), décalage conservé : {self.offset_ms:.0f} ms")
+                self.synced_at = time.monotonic()
+        return self.server_anchor_ms + (time.time() * 1000 - self.local_anchor_ms) * self.scale
+
+
+class LocalClock:
+    """Horloge locale sans recalage (tests)"""
+
+    offset_ms = 0.0
+    scale = 1.0
+
+    def now_ms(self):
+        return time.time() * 1000
+
+
+def next_boundary(now_ms, step_ms):
+    """Prochaine frontière de bougie strictement après `now_ms`"""
+    return (int(now_ms) // step_ms + 1) * step_ms
+
+
+class Job:
+    def __init__(self, symbol, interval, callback, name=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.step_ms = interval_ms(interval)
+        self.callback = callback
+        self.name = name or f'{symbol}@{interval}'
+        self.runs = 0
+        self.missed = 0  # Frontières sautées parce que la tâche était en retard
+        self.lateness_ms = 0.0  # Retard du dernier réveil par rapport à la frontière
+        self.active = True
+
+
+class CandleScheduler:
+    """File de minuteurs unique pour de nombreuses tâches alignées sur les bougies"""
+
+    def __init__(self, clock=None, grace=0.25):
+        self.clock = clock or ServerClock()
+        self.grace_ms = grace * 1000  # Délai après la frontière, le temps que Binance clôture la bougie
+        self.queue = []
+        self.counter = itertools.count()
+        self.running = False
+
+    def add_job(self, symbol, interval, callback, name=None):
+        """Ajoute une tâche `callback(job, boundary_ms)` appelée à chaque clôture"""
+        job = Job(symbol, interval, callback, name)
+        self._schedule(job, next_boundary(self.clock.now_ms(), job.step_ms))
+        return job
+
+    def remove_job(self, job):
+        job.active = False  # Retirée de la file au prochain passage
+
+    def _schedule(self, job, boundary):
+        heapq.heappush(self.queue, (boundary + self.grace_ms, next(self.counter), boundary, job))
+
+    def run_pending(self):
+        """Exécute toutes les tâches échues, renvoie le nombre exécuté"""
+        now = self.clock.now_ms()
+        executed = 0
+        while self.queue and self.queue[0][0] <= now:
+            _, _, boundary, job = heapq.heappop(self.queue)
+            if not job.active:
+                continue
+            job.lateness_ms = now - boundary
+            try:
+                job.callback(job, boundary)
+            except Exception as e:
+                print(f"[{job.name}] Erreur : {e}")
+            job.runs += 1
+            executed += 1
+            # Si la tâche a pris du retard, les frontières manquées sont sautées
+            following = next_boundary(max(now, self.clock.now_ms()), job.step_ms)
+            job.missed += max(0, (following - boundary) // job.step_ms - 1)
+            self._schedule(job, following)
+        return executed
+
+    def run(self, max_runs=None):
+        """Boucle principale : dort jusqu'à la prochaine échéance puis exécute"""
+        self.running = True
+        total = 0
+        while self.running and self.queue and (max_runs is None or total < max_runs):
+            wait = (self.queue[0][0] - self.clock.now_ms()) / 1000 / self.clock.scale
+            if wait > 0:
+                time.sleep(wait)
+            total += self.run_pending()
+        return total
+
+    def stop(self):
+        self.running = False
+
+
+_clock = None
+
+
+def sleep_until_next_candle(interval, grace=0.25, clock=None):
+    """Remplace un `time.sleep` fixe : dort jusqu'à juste après la prochaine clôture"""
+    global _clock
+    if clock is None:
+        _clock = _clock or ServerClock()
+        clock = _clock
+    now = clock.now_ms()
+    wake = next_boundary(now, interval_ms(interval)) + grace * 1000
+    time.sleep(max(0.0, (wake - now) / 1000 / clock.scale))
+
+
+def sleep_scaled(seconds, scale=TIME_SCALE):
+    """`time.sleep` en secondes serveur : raccourci par `BINANCE_TIME_SCALE` avec le simulateur"""
+    time.sleep(seconds / scale)
+
+
+def wait_next_tick(interval, poll=LIVE_POLL):
+    """Attente entre deux itérations : jusqu'à la prochaine clôture, ou `poll` secondes si demandé"""
+    if poll:
+        sleep_scaled(poll)
+    else:
+        sleep_until_next_candle(interval)
@@ -1,7 +1,10 @@
-import requests
-import time
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
+from candle_cache import fetch_ohlcv_cached
+from event_sink import emit
+from profiling import LoopProfiler, stage
+from scheduler import sleep_until_next_candle
+from indicators import IndicatorEngine
+from chart import LiveChart
 
 class TradingBot:
     def __init__(self, initial_balance):
@@ -16,57 +19,45 @@ class TradingBot:
             self.eth_balance = self.balance / price
             self.trade_history.append(("BUY", price, self.eth_balance))
             self.balance = 0
-            print(f"Achat simulé : {self.eth_balance} ETH à {price} USD")
+            emit('trade', "Achat simulé : {quantity} ETH à {price} USD", side='BUY', price=price,
+                 quantity=self.eth_balance)
 
     def sell(self, price):
         if self.eth_balance > 0:
             self.balance = self.eth_balance * price
             self.trade_history.append(("SELL", price, self.balance))
             self.eth_balance = 0
-            print(f"Vente simulée : {self.balance} USD à {price} USD")
+            emit('trade', "Vente simulée : {value} USD à {price} USD", side='SELL', price=price, value=self.balance)
 
     def short(self, price):
         if self.balance > 0:
             self.eth_balance = -(self.balance / price)  # Quantité négative d'ETH pour simuler un short
             self.trade_history.append(("SHORT", price, self.eth_balance))
             self.balance = 0
-            print(f"Short simulé : {self.eth_balance} ETH à {price} USD")
+            emit('trade', "Short simulé : {quantity} ETH à {price} USD", side='SHORT', price=price,
+                 quantity=self.eth_balance)
 
     def cover(self, price):
         if self.eth_balance < 0:  # Si on est en position short
             self.balance = -self.eth_balance * price
             self.trade_history.append(("COVER", price, self.balance))
             self.eth_balance = 0
-            print(f"Cover simulé : {self.balance} USD à {price} USD")
+            emit('trade', "Cover simulé : {value} USD à {price} USD", side='COVER', price=price, value=self.balance)
 
     def show_performance(self, current_price):
         net_worth = self.balance + (self.eth_balance * current_price)
         profit = net_worth - self.initial_balance
         self.net_worth_history.append(net_worth)
-        print(f"\nPerformance actuelle :")
-        print(f"Valeur nette : {net_worth:.2f} USD")
-        print(f"Profit/Pertes : {profit:.2f} USD")
-        print(f"Transactions totales : {len(self.trade_history)}")
+        emit('performance', "\nPerformance actuelle :\nValeur nette : {net_worth:.2f} USD\n"
+             "Profit/Pertes : {profit:.2f} USD\nTransactions totales : {trades}",
+             price=current_price, net_worth=net_worth, profit=profit, trades=len(self.trade_history))
 
-    def plot_performance(self):
-        plt.figure(figsize=(12, 6))
-        plt.plot(self.net_worth_history, label="Valeur nette ($)", color="blue")
-        plt.title("Évolution de la valeur nette au fil du temps")
-        plt.xlabel("Itérations")
-        plt.ylabel("Valeur nette en USD")
-        plt.legend()
-        plt.show()
+    def plot_performance(self, path=os.path.join('charts', 'short-etherum.png')):
+        """Graphe de la valeur nette enregistré en PNG (décimé, sans fenêtre bloquante)"""
+        from chart import render_png  # matplotlib importé seulement pour le graphe
 
-
-def fetch_ohlcv(symbol='ETHUSDT', interval='1m', limit=100):
-    url = f'https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}'
-    response = requests.get(url)
-    data = response.json()
-
-    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df['close'] = df['close'].astype(float)
-    return df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+        render_png(self.net_worth_history, path)
+        emit('chart', "Graphe enregistré : {path}", path=path)
 
 
 def simple_moving_average(data, period=14):
@@ -79,11 +70,18 @@ def rsi(data, period=14):
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
-def trade_signal(data):
-    data['SMA_50'] = simple_moving_average(data, 50)
-    data['SMA_200'] = simple_moving_average(data, 200)
-    data['RSI'] = rsi(data)
-    last_row = data.iloc[-1]
+def trade_signal(data, registry=None, symbol=None, interval='1m', engine=None):
+    if registry is not None:
+        # SMA/RSI partagés en lecture seule avec l'autre bot SMA du même symbole
+        last_row = registry.last_row(symbol, interval, data, ('SMA_50', 'SMA_200', 'RSI'))
+    elif engine is not None:
+        # Mise à jour incrémentale des SMA_50/SMA_200 et du RSI : seule la dernière bougie est recalculée
+        last_row = engine.sync(data)
+    else:
+        data['SMA_50'] = simple_moving_average(data, 50)
+        data['SMA_200'] = simple_moving_average(data, 200)
+        data['RSI'] = rsi(data)
+        last_row = data.iloc[-1]
 
     if last_row['SMA_50'] > last_row['SMA_200'] and last_row['RSI'] < 30:
         return 'BUY'
@@ -99,27 +97,38 @@ def main():
     bot = TradingBot(initial_balance=1000)  # Capital fictif de 1000 USD
     symbol = 'ETHUSDT'
     interval = '1m'
-
-    for _ in range(30):  # On limite à 30 itérations pour l'affichage du graphe
-        data = fetch_ohlcv(symbol, interval)
-        signal = trade_signal(data)
-        price = data['close'].iloc[-1]
-
-        if signal == 'BUY':
-            bot.buy(price)
-        elif signal == 'SELL':
-            bot.sell(price)
-        elif signal == 'SHORT':
-            bot.short(price)
-        elif signal == 'COVER':
-            bot.cover(price)
-        else:
-            print('Aucune action. En attente du prochain signal...')
-
-        bot.show_performance(price)
-
-        time.sleep(60)  # Attendre une minute avant la prochaine itération
-
+    engine = IndicatorEngine()  # SMA_50, SMA_200 et RSI(14)
+    live_chart = LiveChart(os.path.join('charts', 'short-etherum-live.png'), every=5)  # Rendu en arrière-plan
+    profiler = LoopProfiler.from_env()
+
+    for iteration in range(1, 31):  # On limite à 30 itérations pour l'affichage du graphe
+        with stage('tick'):
+            with stage('fetch'):
+                data = fetch_ohlcv_cached(symbol, interval, limit=200)  # 200 bougies pour la SMA_200
+            with stage('signal'):
+                signal = trade_signal(data, symbol=symbol, interval=interval, engine=engine)
+            price = data['close'].iloc[-1]
+
+            with stage('execution'):
+                if signal == 'BUY':
+                    bot.buy(price)
+                elif signal == 'SELL':
+                    bot.sell(price)
+                elif signal == 'SHORT':
+                    bot.short(price)
+                elif signal == 'COVER':
+                    bot.cover(price)
+                else:
+                    emit('hold', "Aucune action. En attente du prochain signal...")
+
+            with stage('performance'):
+                bot.show_performance(price)
+                live_chart.append(bot.net_worth_history[-1])
+        profiler.after_iteration(iteration)
+
+        sleep_until_next_candle(interval)  # Réveil juste après la clôture de la bougie
+
+    live_chart.wait(timeout=5)
     bot.plot_performance()
 
 if __name__ == '__main__':
@@ -0,0 +1,296 @@
+"""Simulateur local de l'API Binance pour tester les bots hors ligne.
+
+Sert `/api/v3/klines`, `/api/v3/time`, `/api/v3/ping` et le flux combiné
+`/stream?streams=...` (kline et trade) à partir de bougies enregistrées
+(`KlineStore`) ou synthétiques, rejouées sur une horloge accélérée (`--speed`).
+La bougie en cours est construite progressivement, comme sur Binance. Une
+latence et des erreurs (429 avec Retry-After, 5xx) peuvent être injectées pour
+tester les retries et le limiteur.
+
+Les scripts n'ont pas à être modifiés, seules les URL sont redirigées :
+    python simulator.py --speed 1000 --symbols BTCUSDT,ETHUSDT
+    BINANCE_API_URL=http://127.0.0.1:8765 BINANCE_STREAM_URL=ws://127.0.0.1:8765/stream \\
+        BINANCE_TIME_SCALE=1000 python smart.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+from aiohttp import WSMsgType, web
+
+from binance_client import USED_WEIGHT_HEADER
+from candle_cache import MAX_LIMIT, interval_ms
+from kline_store import KlineStore
+from strategies import parse_symbols
+
+DEFAULT_LIMIT = 500
+WARMUP_CANDLES = 1000  # Historique disponible au démarrage de la simulation
+
+
+def synthetic_klines(rows, step_ms, start_time=None, seed=0, price=2000.0):
+    """Bougies en marche aléatoire (colonnes du `KlineStore`)"""
+    rng = np.random.default_rng(seed)
+    if start_time is None:
+        start_time = (int(time.time() * 1000) // step_ms - rows) * step_ms
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    open_ = np.concatenate(([price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, rows)) * close
+    return {
+        'open_time': start_time + np.arange(rows, dtype=np.int64) * step_ms,
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.random(rows) * 100,
+    }
+
+
+class MarketReplay:
+    """Bougies d'un symbole, révélées au fil de l'horloge simulée"""
+
+    def __init__(self, symbol, arrays, step_ms):
+        self.symbol = symbol
+        self.open_time = np.asarray(arrays['open_time'], dtype=np.int64)
+        self.columns = {name: np.asarray(arrays[name], dtype=np.float64)
+                        for name in ('open', 'high', 'low', 'close', 'volume')}
+        self.step_ms = step_ms
+
+    def live_index(self, now_ms):
+        """Index de la bougie en cours à `now_ms` (-1 avant le début des données)"""
+        return int(np.searchsorted(self.open_time, now_ms, side='right')) - 1
+
+    def candle(self, index, now_ms):
+        """(open_time, open, high, low, close, volume, close_time, clôturée) à `now_ms`"""
+        open_time = int(self.open_time[index])
+        open_, high, low, close, volume = (float(self.columns[name][index])
+                                           for name in ('open', 'high', 'low', 'close', 'volume'))
+        fraction = (now_ms - open_time) / self.step_ms
+        closed = fraction >= 1
+        if not closed:
+            # Bougie en cours : le prix progresse de l'ouverture vers la clôture enregistrée
+            close = open_ + (close - open_) * fraction
+            high = max(open_, close) + (high - max(open_, float(self.columns['close'][index]))) * fraction
+            low = min(open_, close) - (min(open_, float(self.columns['close'][index])) - low) * fraction
+            volume *= fraction
+        return open_time, open_, high, low, close, volume, open_time + self.step_ms - 1, closed
+
+    def klines(self, now_ms, limit=DEFAULT_LIMIT, start_time=None, end_time=None):
+        """Lignes au format de `/api/v3/klines` visibles à `now_ms`"""
+        stop = self.live_index(now_ms) + 1
+        if end_time is not None:
+            stop = min(stop, int(np.searchsorted(self.open_time, end_time, side='right')))
+        if start_time is not None:
+            start = int(np.searchsorted(self.open_time, start_time, side='left'))
+            stop = min(stop, start + limit)
+        else:
+            start = max(0, stop - limit)
+        rows = []
+        for index in range(start, stop):
+            open_time, open_, high, low, close, volume, close_time, _ = self.candle(index, now_ms)
+            rows.append([open_time, f'{open_:.8f}', f'{high:.8f}', f'{low:.8f}', f'{close:.8f}',
+                         f'{volume:.8f}', close_time, f'{volume * close:.8f}', 0, '0.00000000',
+                         '0.00000000', '0'])
+        return rows
+
+
+class ExchangeSimulator:
+    """Serveur aiohttp qui imite l'API REST et le flux WebSocket de Binance"""
+
+    def __init__(self, markets, interval='1m', speed=1.0, start_time=None, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, seed=0, stream_period=1.0):
+        self.markets = markets  # {symbole: MarketReplay}
+        self.interval = interval
+        self.speed = speed
+        if start_time is None:
+            # Démarre après WARMUP_CANDLES bougies pour que l'historique soit disponible
+            first = min(int(market.open_time[min(WARMUP_CANDLES, len(market.open_time) - 1)])
+                        for market in markets.values())
+            start_time = first
+        self.sim_start = start_time
+        self.real_start = time.time()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stream_period = stream_period  # Secondes simulées entre deux messages du flux
+        self.requests = 0
+        self.errors = 0
+        self.sockets = set()  # Flux WebSocket ouverts
+        self.weight_minute = None
+        self.used_weight = 0
+
+    def now_ms(self):
+        """Heure simulée (ms)"""
+        return self.sim_start + (time.time() - self.real_start) * 1000 * self.speed
+
+    def _count_weight(self, weight):
+        minute = int(time.time() // 60)
+        if minute != self.weight_minute:
+            self.weight_minute, self.used_weight = minute, 0
+        self.used_weight += weight
+        return self.used_weight
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        self.requests += 1
+        if self.latency_ms or self.jitter_ms:
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms))
+            await asyncio.sleep(delay / 1000)
+        if request.path.startswith('/api/') and self.random.random() < self.error_rate:
+            self.errors += 1
+            if self.random.random() < 0.5:
+                return web.json_response({'code': -1003, 'msg': 'Too many requests.'}, status=429,
+                                         headers={'Retry-After': '1'})
+            return web.json_response({'code': -1001, 'msg': 'Internal error.'}, status=503)
+        return await handler(request)
+
+    @staticmethod
+    def error(code, message, status=400):
+        return web.json_response({'code': code, 'msg': message}, status=status)
+
+    async def ping(self, request):
+        return web.json_response({}, headers={USED_WEIGHT_HEADER: str(self._count_weight(1))})
+
+    async def server_time(self, request):
+        return web.json_response({'serverTime': int(self.now_ms())},
+                                 headers={USED_WEIGHT_HEADER: str(self._count_weight(1))})
+
+    async def klines(self, request):
+        query = request.query
+        market = self.markets.get(query.get('symbol', '').upper())
+        if market is None:
+            return self.error(-1121, 'Invalid symbol.')
+        if query.get('interval') != self.interval:
+            return self.error(-1120, f"Intervalle non simulé (disponible : {self.interval}).")
+        try:
+            limit = min(int(query.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+            start_time = int(query['startTime']) if 'startTime' in query else None
+            end_time = int(query['endTime']) if 'endTime' in query else None
+        except ValueError:
+            return self.error(-1100, 'Illegal characters found in a parameter.')
+        rows = market.klines(self.now_ms(), limit, start_time, end_time)
+        body = json.dumps(rows, separators=(',', ':'))
+        return web.Response(text=body, content_type='application/json',
+                            headers={USED_WEIGHT_HEADER: str(self._count_weight(2))})
+
+    def _events(self, subscriptions, last_index):
+        """Messages kline/trade à envoyer maintenant pour chaque abonnement"""
+        now = self.now_ms()
+        event_time = int(time.time() * 1000)  # Heure réelle : la latence mesurée reste significative
+        messages = []
+        for stream, symbol, kind in subscriptions:
+            market = self.markets[symbol]
+            index = market.live_index(now)
+            if index < 0:
+                continue
+            if kind == 'kline':
+                previous = last_index.get(stream)
+                # Clôture des bougies terminées depuis le dernier message, puis bougie en cours
+                start = index if previous is None else min(previous, index)
+                for i in range(start, index + 1):
+                    open_time, open_, high, low, close, volume, close_time, closed = market.candle(i, now)
+                    messages.append({'stream': stream, 'data': {
+                        'e': 'kline', 'E': event_time, 's': symbol,
+                        'k': {'t': open_time, 'T': close_time, 's': symbol, 'i': self.interval,
+                              'o': f'{open_:.8f}', 'h': f'{high:.8f}', 'l': f'{low:.8f}',
+                              'c': f'{close:.8f}', 'v': f'{volume:.8f}', 'x': closed}}})
+                last_index[stream] = index
+            else:
+                close = market.candle(index, now)[4]
+                messages.append({'stream': stream, 'data': {
+                    'e': 'trade', 'E': event_time, 's': symbol, 'p': f'{close:.8f}',
+                    'q': f'{self.random.random():.8f}', 'T': event_time}})
+        return messages
+
+    async def stream(self, request):
+        subscriptions = []
+        for name in request.query.get('streams', '').split('/'):
+            symbol, _, kind = name.partition('@')
+            symbol = symbol.upper()
+            if symbol in self.markets and (kind == f'kline_{self.interval}' or kind == 'trade'):
+                subscriptions.append((name, symbol, 'kline' if kind.startswith('kline') else 'trade'))
+
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        last_index = {}
+        period = max(0.01, self.stream_period / self.speed)
+
+        async def reader():
+            async for msg in ws:
+                if msg.type in (WSMsgType.CLOSE, WSMsgType.ERROR):
+                    break
+
+        reading = asyncio.create_task(reader())
+        self.sockets.add(ws)
+        try:
+            while not ws.closed and not reading.done():
+                for message in self._events(subscriptions, last_index):
+                    await ws.send_str(json.dumps(message, separators=(',', ':')))
+                await asyncio.sleep(period)
+        except ConnectionResetError:
+            pass
+        finally:
+            self.sockets.discard(ws)
+            reading.cancel()
+        return ws
+
+    async def drop_streams(self):
+        """Ferme tous les flux ouverts (coupure simulée) ; renvoie leur nombre"""
+        sockets = list(self.sockets)
+        for ws in sockets:
+            await ws.close()
+        return len(sockets)
+
+    def app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get('/api/v3/ping', self.ping)
+        app.router.add_get('/api/v3/time', self.server_time)
+        app.router.add_get('/api/v3/klines', self.klines)
+        app.router.add_get('/stream', self.stream)
+        return app
+
+
+def load_markets(symbols, interval, store_root=None, candles=100_000, seed=0):
+    """Marchés depuis le `KlineStore`, ou synthétiques si le symbole n'y est pas"""
+    step = interval_ms(interval)
+    store = KlineStore(store_root) if store_root else None
+    markets = {}
+    for offset, symbol in enumerate(symbols):
+        if store is not None and store.count(symbol, interval):
+            arrays = store.read(symbol, interval)
+        else:
+            arrays = synthetic_klines(candles, step, seed=seed + offset)
+        markets[symbol] = MarketReplay(symbol, arrays, step)
+    return markets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur local de l'API Binance")
+    parser.add_argument('--symbols', default='BTCUSDT,ETHUSDT', help="Symboles, ou @fichier")
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--store', help="Rejoue les bougies de ce KlineStore (sinon données synthétiques)")
+    parser.add_argument('--candles', type=int, default=100_000, help="Bougies synthétiques par symbole")
+    parser.add_argument('--speed', type=float, default=1.0, help="Accélération du temps (ex. 1000)")
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de réponses 429/503")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    markets = load_markets(parse_symbols(args.symbols), args.interval, args.store, args.candles, args.seed)
+    simulator = ExchangeSimulator(markets, args.interval, args.speed, latency_ms=args.latency_ms,
+                                  jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed)
+    base = f'{args.host}:{args.port}'
+    print(f"Simulateur : {', '.join(markets)} en {args.interval}, x{args.speed:g}")
+    print(f"BINANCE_API_URL=http://{base} BINANCE_STREAM_URL=ws://{base}/stream "
+          f"BINANCE_TIME_SCALE={args.speed:g}")
+    web.run_app(simulator.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
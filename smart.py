@@ -1,16 +1,31 @@
-import requests
-import time
-import pandas as pd
-import numpy as np
-import inquirer  # Pour la sélection interactive
+import os
+from candle_cache import fetch_ohlcv_cached, get_cache
+from checkpoint import Checkpointer
+from profiling import LoopProfiler, stage
+from scheduler import wait_next_tick
+from event_sink import emit
+from analytics import StreamingAnalytics
+from ledger import NetWorthHistory, TradeLedger, cumulative_note, journal_path
+from indicators import IndicatorEngine
+from triggers import guard_from_env, guard_lock
+
+PERFORMANCE_MESSAGE = ("\nPerformance après itération {iteration}:\n"
+                       "Valeur nette : {net_worth:.2f} USD\n"
+                       "Profit/Pertes : {profit:.2f} USD\n"
+                       "Transactions totales : {trades}{trades_note}\n"
+                       "Drawdown max : {max_drawdown:.2%}, Sharpe : {sharpe:.3f}, "
+                       "Réussite : {win_rate:.0%} ({closed_trades} trades, PnL moyen {average_trade_pnl:.2f} USD)")
 
 class TradingBot:
-    def __init__(self, initial_balance, stop_loss_percent=0.02, take_profit_percent=0.05):
+    def __init__(self, initial_balance, stop_loss_percent=0.02, take_profit_percent=0.05, journal_dir=None):
         self.initial_balance = initial_balance
         self.balance = initial_balance  # Capital fictif en USD
         self.crypto_balance = 0  # Quantité de crypto détenue (générique)
-        self.trade_history = []  # Historique des transactions
-        self.net_worth_history = []  # Historique de la valeur nette
+        self.trade_history = TradeLedger(path=journal_path(journal_dir, 'trades.bin'))  # Historique des transactions
+        self.trades_note = cumulative_note(self.trade_history)  # Journal repris : compteur cumulé
+        self.net_worth_history = NetWorthHistory(path=journal_path(journal_dir, 'net_worth.bin'))  # Historique de la valeur nette
+        self.analytics = StreamingAnalytics()  # Statistiques de performance en O(1)
+        self.entry_value = 0  # Montant investi lors du dernier achat
         self.stop_loss_percent = stop_loss_percent  # Stop Loss en pourcentage
         self.take_profit_percent = take_profit_percent  # Take Profit en pourcentage
         self.buy_price = 0  # Prix d'achat pour le calcul des SL et TP
@@ -21,8 +36,10 @@ class TradingBot:
             self.crypto_balance = self.balance / price
             self.buy_price = price
             self.trade_history.append(("BUY", price, self.crypto_balance))
+            self.entry_value = self.balance
             self.balance = 0
-            print(f"[{iteration}] Achat simulé : {self.crypto_balance:.4f} crypto à {price:.2f} USD")
+            emit('trade', "[{iteration}] Achat simulé : {quantity:.4f} crypto à {price:.2f} USD",
+                 side='BUY', iteration=iteration, price=price, quantity=self.crypto_balance)
 
     def sell(self, price, iteration):
         """Vendre la crypto et actualiser le solde"""
@@ -30,17 +47,21 @@ class TradingBot:
             self.balance = self.crypto_balance * price
             self.trade_history.append(("SELL", price, self.balance))
             self.crypto_balance = 0
-            print(f"[{iteration}] Vente simulée : {self.balance:.2f} USD à {price:.2f} USD")
+            self.analytics.record_trade(self.balance - self.entry_value)
+            emit('trade', "[{iteration}] Vente simulée : {value:.2f} USD à {price:.2f} USD",
+                 side='SELL', iteration=iteration, price=price, value=self.balance)
 
     def show_performance(self, current_price, iteration):
         """Afficher la performance du bot à chaque itération"""
         net_worth = self.balance + (self.crypto_balance * current_price)
         profit = net_worth - self.initial_balance
         self.net_worth_history.append(net_worth)
-        print(f"\nPerformance après itération {iteration}:")
-        print(f"Valeur nette : {net_worth:.2f} USD")
-        print(f"Profit/Pertes : {profit:.2f} USD")
-        print(f"Transactions totales : {len(self.trade_history)}")
+        self.analytics.update_net_worth(net_worth)
+        emit('performance', PERFORMANCE_MESSAGE, iteration=iteration, price=current_price, net_worth=net_worth,
+             profit=profit, trades=len(self.trade_history), trades_note=self.trades_note,
+             max_drawdown=self.analytics.max_drawdown,
+             sharpe=self.analytics.sharpe, win_rate=self.analytics.win_rate, closed_trades=self.analytics.trades,
+             average_trade_pnl=self.analytics.average_trade_pnl)
 
     def manage_risk(self, price, iteration):
         """Gérer le Stop-Loss et Take-Profit"""
@@ -49,25 +70,16 @@ class TradingBot:
             take_profit_price = self.buy_price * (1 + self.take_profit_percent)
 
             if price <= stop_loss_price:
-                print(f"[{iteration}] Stop-Loss atteint à {price:.2f} USD. Vente effectuée.")
+                emit('risk', "[{iteration}] Stop-Loss atteint à {price:.2f} USD. Vente effectuée.",
+                     trigger='stop_loss', iteration=iteration, price=price)
                 return 'SELL'
             elif price >= take_profit_price:
-                print(f"[{iteration}] Take-Profit atteint à {price:.2f} USD. Vente effectuée.")
+                emit('risk', "[{iteration}] Take-Profit atteint à {price:.2f} USD. Vente effectuée.",
+                     trigger='take_profit', iteration=iteration, price=price)
                 return 'SELL'
         return 'HOLD'
 
 
-def fetch_ohlcv(symbol='ETHUSDT', interval='1m', limit=100):
-    """Récupère les données OHLCV (Open, High, Low, Close, Volume) pour une paire donnée"""
-    url = f'https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}'
-    response = requests.get(url)
-    data = response.json()
-
-    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df['close'] = df['close'].astype(float)
-    return df[['timestamp', 'close']]
-
 def rsi(data, period=14):
     """Calcul du RSI (Relative Strength Index)"""
     delta = data['close'].diff()
@@ -85,14 +97,24 @@ def macd(data, fast_period=12, slow_period=26, signal_period=9):
     signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
     return macd_line, signal_line
 
-def combined_trade_signal(data):
+def combined_trade_signal(data, engine=None, registry=None, symbol=None, interval='1m'):
     """Signaux de trading combinés RSI et MACD"""
-    data['RSI'] = rsi(data)
-    data['MACD_Line'], data['Signal_Line'] = macd(data)
-
-    last_row = data.iloc[-1]
+    if registry is not None:
+        # Indicateurs partagés en lecture seule avec les autres stratégies du symbole
+        with stage('indicators'):
+            last_row = registry.last_row(symbol, interval, data, ('RSI', 'MACD_Line', 'Signal_Line'))
+    elif engine is not None:
+        # Mise à jour incrémentale : seule la dernière bougie est recalculée
+        with stage('indicators'):
+            last_row = engine.sync(data)
+    else:
+        with stage('indicators'):
+            data['RSI'] = rsi(data)
+            data['MACD_Line'], data['Signal_Line'] = macd(data)
+            last_row = data.iloc[-1]
     
-    print(f"RSI: {last_row['RSI']:.2f}, MACD Line: {last_row['MACD_Line']:.2f}, Signal Line: {last_row['Signal_Line']:.2f}")
+    emit('indicators', "RSI: {RSI:.2f}, MACD Line: {MACD_Line:.2f}, Signal Line: {Signal_Line:.2f}",
+         symbol=symbol, RSI=last_row['RSI'], MACD_Line=last_row['MACD_Line'], Signal_Line=last_row['Signal_Line'])
 
     # RSI < 30 et MACD croise au-dessus de la ligne de signal -> Achat
     if last_row['RSI'] < 30 and last_row['MACD_Line'] > last_row['Signal_Line']:
@@ -104,6 +126,8 @@ def combined_trade_signal(data):
 
 def select_crypto():
     """Sélectionne une cryptomonnaie à trader via un menu interactif"""
+    import inquirer  # Importé seulement pour le menu interactif (démarrage plus rapide)
+
     questions = [
         inquirer.List('crypto',
                       message="Choisissez la cryptomonnaie à trader",
@@ -113,41 +137,64 @@ def select_crypto():
     answers = inquirer.prompt(questions)
     return answers['crypto']
 
+def run_iteration(bot, engine, symbol, interval, iteration, fetch=fetch_ohlcv_cached, guard=None):
+    """Une itération de la boucle : données, signal, ordres, risque et affichage"""
+    with stage('tick'):
+        with stage('fetch'):
+            data = fetch(symbol, interval)
+        with stage('signal'):
+            signal = combined_trade_signal(data, engine)
+        price = data['close'].iloc[-1]
+
+        with stage('print'):
+            emit('tick', "\n--- Iteration {iteration} ---\nPrix actuel : {price:.2f} USD",
+                 iteration=iteration, symbol=symbol, price=price, signal=signal)
+
+        # Ordres sous le verrou du BotGuard : ses sorties arrivent depuis le thread du flux
+        with guard_lock(guard):
+            # Vérifie si une action est nécessaire
+            with stage('execution'):
+                if signal == 'BUY':
+                    bot.buy(price, iteration)
+                elif signal == 'SELL':
+                    bot.sell(price, iteration)
+                else:
+                    emit('hold', "[{iteration}] Aucune action. En attente du prochain signal...", iteration=iteration)
+
+                # Gestion du Stop-Loss et Take-Profit
+                action = bot.manage_risk(price, iteration)
+                if action == 'SELL':
+                    bot.sell(price, iteration)
+                if guard is not None:
+                    guard.sync(iteration)  # Bracket posé ou annulé selon la position
+
+            with stage('performance'):
+                bot.show_performance(price, iteration)
+    return signal
+
 def main():
     """Fonction principale"""
-   
+
     symbol = select_crypto()
 
     print(f"Vous avez sélectionné {symbol} pour le trading.")
-    
-    bot = TradingBot(initial_balance=1000)  
-    interval = '1m'
 
-    iteration = 0
-    while True:  
+    bot = TradingBot(initial_balance=1000, journal_dir=os.path.join('journal', 'smart', symbol))
+    engine = IndicatorEngine(sma_periods=())
+    interval = '1m'
+    profiler = LoopProfiler.from_env()
+    # Reprise à chaud : soldes, indicateurs et bougies du dernier checkpoint
+    checkpoint = Checkpointer(os.path.join('checkpoints', 'smart', f'{symbol}.json'), bot, engine,
+                              get_cache(symbol, interval), candles_limit=100)
+
+    iteration = checkpoint.restore()
+    guard = guard_from_env(bot, symbol, interval)  # BOT_TRADE_TRIGGERS=1 : Stop-Loss/Take-Profit à chaque transaction
+    while True:
         iteration += 1
-        data = fetch_ohlcv(symbol, interval)
-        signal = combined_trade_signal(data)
-        price = data['close'].iloc[-1]
-
-        print(f"\n--- Iteration {iteration} ---")
-        print(f"Prix actuel : {price:.2f} USD")
-
-        # Vérifie si une action est nécessaire
-        if signal == 'BUY':
-            bot.buy(price, iteration)
-        elif signal == 'SELL':
-            bot.sell(price, iteration)
-        else:
-            print(f"[{iteration}] Aucune action. En attente du prochain signal...")
-
-        # Gestion du Stop-Loss et Take-Profit
-        action = bot.manage_risk(price, iteration)
-        if action == 'SELL':
-            bot.sell(price, iteration)
-
-        bot.show_performance(price, iteration)
-        time.sleep(1)  # Une pause de 1 seconde entre les itérations
+        run_iteration(bot, engine, symbol, interval, iteration, guard=guard)
+        checkpoint.maybe_save(iteration)
+        profiler.after_iteration(iteration)
+        wait_next_tick(interval)  # Réveil après la clôture (BOT_LIVE_POLL pour suivre la bougie en cours)
 
 if __name__ == '__main__':
     main()
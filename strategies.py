@@ -0,0 +1,71 @@
+"""Registre des stratégies existantes, chargées à la demande depuis les scripts.
+
+Les scripts `etherum-bot.py` et `short-etherum.py` ne sont pas importables
+directement (tiret dans le nom) : ils sont chargés par chemin de fichier.
+"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Même liste que dans `select_crypto()`
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'XRPUSDT', 'ADAUSDT', 'LTCUSDT', 'SOLUSDT', 'DOGEUSDT', 'SHIBUSDT']
+
+# nom -> (script, fonction de signal)
+STRATEGIES = {
+    'ultra_aggressive': ('HF_trading.py', 'ultra_aggressive_trade_signal'),
+    'combined': ('smart.py', 'combined_trade_signal'),
+    'supertrend': ('supertrend.py', 'trade_signal'),
+    'sma_rsi': ('etherum-bot.py', 'trade_signal'),
+    'sma_rsi_short': ('short-etherum.py', 'trade_signal'),
+}
+
+DEFAULT_WINDOW = 100
+WINDOWS = {'sma_rsi': 200, 'sma_rsi_short': 200}  # Bougies nécessaires (SMA_200)
+
+
+def required_candles(names):
+    """Nombre de bougies nécessaires aux stratégies `names`"""
+    return max((WINDOWS.get(name, DEFAULT_WINDOW) for name in names), default=DEFAULT_WINDOW)
+
+
+def parse_symbols(value):
+    """Liste séparée par des virgules, ou `@fichier` avec un symbole par ligne"""
+    if value.startswith('@'):
+        with open(value[1:]) as f:
+            return [line.strip().upper() for line in f if line.strip()]
+    return [symbol.strip().upper() for symbol in value.split(',') if symbol.strip()]
+
+
+def load_script(filename):
+    """Importe un script du dépôt (une seule fois) et renvoie son module"""
+    module_name = os.path.splitext(filename)[0].replace('-', '_')
+    module = sys.modules.get(module_name)
+    if module is None:
+        if ROOT not in sys.path:
+            sys.path.insert(0, ROOT)
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            del sys.modules[module_name]
+            raise
+    return module
+
+
+def load_strategy(name):
+    """Renvoie la fonction de signal d'une stratégie"""
+    if name not in STRATEGIES:
+        raise ValueError(f"Stratégie inconnue : {name} (disponibles : {', '.join(STRATEGIES)})")
+    filename, function = STRATEGIES[name]
+    return getattr(load_script(filename), function)
+
+
+def strategy_module(name):
+    """Module (script) qui définit la stratégie"""
+    if name not in STRATEGIES:
+        raise ValueError(f"Stratégie inconnue : {name} (disponibles : {', '.join(STRATEGIES)})")
+    return load_script(STRATEGIES[name][0])
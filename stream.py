@@ -0,0 +1,157 @@
+"""Source de données en streaming (WebSocket Binance) à la place du polling REST.
+
+Les messages kline/trade mettent à jour les `CandleCache` et déclenchent le
+callback de stratégie dès leur arrivée. En cas de déconnexion, le flux se
+reconnecte et comble le trou via l'API REST (`CandleCache.refresh()`).
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import aiohttp
+
+from candle_cache import CandleCache
+
+STREAM_URL = os.environ.get('BINANCE_STREAM_URL', 'wss://stream.binance.com:9443/stream')
+
+
+def kline_from_message(kline):
+    """Convertit le champ `k` d'un message kline en tuple de `CandleCache`"""
+    return (int(kline['t']), float(kline['o']), float(kline['h']), float(kline['l']),
+            float(kline['c']), float(kline['v']), int(kline['T']))
+
+
+class KlineStream:
+    """Flux kline (et optionnellement trade) pour plusieurs symboles"""
+
+    def __init__(self, symbols, interval='1m', on_candle=None, on_trade=None, url=STREAM_URL,
+                 caches=None, trades=False, reconnect_delay=1, max_reconnect_delay=30):
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.interval = interval
+        self.on_candle = on_candle
+        self.on_trade = on_trade
+        self.url = url
+        self.trades = trades
+        self.caches = caches or {symbol: CandleCache(symbol, interval) for symbol in self.symbols}
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.latencies = deque(maxlen=10000)  # Délai événement -> traitement, en ms
+        self.reconnections = 0
+        self.handler_errors = 0
+        self._stopped = False
+
+    def stream_names(self):
+        names = [f'{symbol.lower()}@kline_{self.interval}' for symbol in self.symbols]
+        if self.trades:
+            names += [f'{symbol.lower()}@trade' for symbol in self.symbols]
+        return names
+
+    async def backfill(self):
+        """Comble les bougies manquées via REST (chargement initial ou après une coupure)"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, cache.refresh) for cache in self.caches.values()))
+
+    async def _notify(self, callback, *args):
+        if callback is None:
+            return
+        # Une erreur de la stratégie ne doit pas couper le flux des autres symboles
+        try:
+            result = callback(*args)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            self.handler_errors += 1
+            print(f"Erreur dans {getattr(callback, '__name__', callback)} ({args[0]}) : {e!r}")
+
+    async def handle_message(self, message):
+        """Traite un message du flux combiné"""
+        data = message.get('data', message)
+        event_type = data.get('e')
+        symbol = data.get('s')
+        cache = self.caches.get(symbol)
+        if cache is None:
+            return
+
+        if event_type == 'kline':
+            kline = data['k']
+            cache.apply(kline_from_message(kline))
+            await self._notify(self.on_candle, symbol, cache, bool(kline['x']))
+        elif event_type == 'trade':
+            price = float(data['p'])
+            if cache.live is not None:
+                # La bougie en cours suit le dernier prix entre deux messages kline
+                open_time, open_, high, low, _, volume, close_time = cache.live
+                cache.live = (open_time, open_, max(high, price), min(low, price),
+                              price, volume + float(data['q']), close_time)
+                cache.version += 1
+            await self._notify(self.on_trade, symbol, price, int(data['T']))
+        else:
+            return
+
+        if 'E' in data:
+            self.latencies.append(time.time() * 1000 - data['E'])
+
+    async def run(self):
+        """Boucle de connexion / lecture avec reconnexion exponentielle"""
+        delay = self.reconnect_delay
+        url = f"{self.url}?streams={'/'.join(self.stream_names())}"
+        async with aiohttp.ClientSession() as session:
+            while not self._stopped:
+                try:
+                    async with session.ws_connect(url, heartbeat=30) as ws:
+                        await self.backfill()
+                        delay = self.reconnect_delay
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self.handle_message(json.loads(msg.data))
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                            if self._stopped:
+                                return
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    print(f"Flux interrompu ({e}), reconnexion dans {delay}s")
+                if self._stopped:
+                    return
+                self.reconnections += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def stop(self):
+        self._stopped = True
+
+    def latency_stats(self):
+        """Latence événement -> traitement (ms) : moyenne, médiane et maximum"""
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        return {
+            'count': len(values),
+            'mean': sum(values) / len(values),
+            'p50': values[len(values) // 2],
+            'max': values[-1],
+        }
+
+
+def main():
+    """Exécute `combined_trade_signal` de smart.py à chaque mise à jour de bougie"""
+    from smart import combined_trade_signal
+
+    symbols = sys.argv[1:] or ['ETHUSDT']
+
+    def on_candle(symbol, cache, closed):
+        data = cache.frame(100)
+        signal = combined_trade_signal(data)
+        print(f"{symbol} {'clôture' if closed else 'en cours'} : {data['close'].iloc[-1]:.2f} -> {signal}")
+
+    stream = KlineStream(symbols, '1m', on_candle=on_candle)
+    try:
+        asyncio.run(stream.run())
+    except KeyboardInterrupt:
+        print(f"Latence : {stream.latency_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,31 @@
-import requests
-import time
-import pandas as pd
-import numpy as np
-import inquirer  # Pour la sélection interactive
+import os
+from candle_cache import fetch_ohlcv_cached
+from profiling import LoopProfiler, stage
+from scheduler import wait_next_tick
+from event_sink import emit
+from analytics import StreamingAnalytics
+from ledger import NetWorthHistory, TradeLedger, cumulative_note, journal_path
+from indicators import IndicatorEngine
+from triggers import guard_from_env, guard_lock
+from vectorized import supertrend_np
+
+PERFORMANCE_MESSAGE = ("\nPerformance après itération {iteration}:\n"
+                       "Valeur nette : {net_worth:.2f} USD\n"
+                       "Profit/Pertes : {profit:.2f} USD\n"
+                       "Transactions totales : {trades}{trades_note}\n"
+                       "Drawdown max : {max_drawdown:.2%}, Sharpe : {sharpe:.3f}, "
+                       "Réussite : {win_rate:.0%} ({closed_trades} trades, PnL moyen {average_trade_pnl:.2f} USD)")
 
 class TradingBot:
-    def __init__(self, initial_balance, stop_loss_percent=0.02, take_profit_percent=0.05):
+    def __init__(self, initial_balance, stop_loss_percent=0.02, take_profit_percent=0.05, journal_dir=None):
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.crypto_balance = 0
-        self.trade_history = []
-        self.net_worth_history = []
+        self.trade_history = TradeLedger(path=journal_path(journal_dir, 'trades.bin'))
+        self.trades_note = cumulative_note(self.trade_history)  # Journal repris : compteur cumulé
+        self.net_worth_history = NetWorthHistory(path=journal_path(journal_dir, 'net_worth.bin'))
+        self.analytics = StreamingAnalytics()
+        self.entry_value = 0
         self.stop_loss_percent = stop_loss_percent
         self.take_profit_percent = take_profit_percent
         self.buy_price = 0
@@ -20,24 +35,30 @@ class TradingBot:
             self.crypto_balance = self.balance / price
             self.buy_price = price
             self.trade_history.append(("BUY", price, self.crypto_balance))
+            self.entry_value = self.balance
             self.balance = 0
-            print(f"[{iteration}] Achat simulé : {self.crypto_balance:.4f} crypto à {price:.2f} USD")
+            emit('trade', "[{iteration}] Achat simulé : {quantity:.4f} crypto à {price:.2f} USD",
+                 side='BUY', iteration=iteration, price=price, quantity=self.crypto_balance)
 
     def sell(self, price, iteration):
         if self.crypto_balance > 0:
             self.balance = self.crypto_balance * price
             self.trade_history.append(("SELL", price, self.balance))
             self.crypto_balance = 0
-            print(f"[{iteration}] Vente simulée : {self.balance:.2f} USD à {price:.2f} USD")
+            self.analytics.record_trade(self.balance - self.entry_value)
+            emit('trade', "[{iteration}] Vente simulée : {value:.2f} USD à {price:.2f} USD",
+                 side='SELL', iteration=iteration, price=price, value=self.balance)
 
     def show_performance(self, current_price, iteration):
         net_worth = self.balance + (self.crypto_balance * current_price)
         profit = net_worth - self.initial_balance
         self.net_worth_history.append(net_worth)
-        print(f"\nPerformance après itération {iteration}:")
-        print(f"Valeur nette : {net_worth:.2f} USD")
-        print(f"Profit/Pertes : {profit:.2f} USD")
-        print(f"Transactions totales : {len(self.trade_history)}")
+        self.analytics.update_net_worth(net_worth)
+        emit('performance', PERFORMANCE_MESSAGE, iteration=iteration, price=current_price, net_worth=net_worth,
+             profit=profit, trades=len(self.trade_history), trades_note=self.trades_note,
+             max_drawdown=self.analytics.max_drawdown,
+             sharpe=self.analytics.sharpe, win_rate=self.analytics.win_rate, closed_trades=self.analytics.trades,
+             average_trade_pnl=self.analytics.average_trade_pnl)
 
     def manage_risk(self, price, iteration):
         if self.crypto_balance > 0:
@@ -45,51 +66,35 @@ class TradingBot:
             take_profit_price = self.buy_price * (1 + self.take_profit_percent)
 
             if price <= stop_loss_price:
-                print(f"[{iteration}] Stop-Loss atteint à {price:.2f} USD. Vente effectuée.")
+                emit('risk', "[{iteration}] Stop-Loss atteint à {price:.2f} USD. Vente effectuée.",
+                     trigger='stop_loss', iteration=iteration, price=price)
                 return 'SELL'
             elif price >= take_profit_price:
-                print(f"[{iteration}] Take-Profit atteint à {price:.2f} USD. Vente effectuée.")
+                emit('risk', "[{iteration}] Take-Profit atteint à {price:.2f} USD. Vente effectuée.",
+                     trigger='take_profit', iteration=iteration, price=price)
                 return 'SELL'
         return 'HOLD'
 
 
-def fetch_ohlcv(symbol='ETHUSDT', interval='1m', limit=100):
-    url = f'https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}'
-    response = requests.get(url)
-    data = response.json()
-
-    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time',
-                                     'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume',
-                                     'taker_buy_quote_asset_volume', 'ignore'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df[['open', 'high', 'low', 'close']] = df[['open', 'high', 'low', 'close']].astype(float)
-    return df[['timestamp', 'open', 'high', 'low', 'close']]
-
-
 def supertrend(data, period=10, multiplier=3):
-    atr = data['high'].rolling(window=period).max() - data['low'].rolling(window=period).min()
-    hl2 = (data['high'] + data['low']) / 2
-    basic_upper_band = hl2 + (multiplier * atr)
-    basic_lower_band = hl2 - (multiplier * atr)
-    
-    supertrend = np.zeros(len(data))
-    in_uptrend = True
-    for i in range(1, len(data)):
-        if data['close'][i] > basic_upper_band[i-1]:
-            in_uptrend = True
-        elif data['close'][i] < basic_lower_band[i-1]:
-            in_uptrend = False
-
-        supertrend[i] = basic_upper_band[i] if in_uptrend else basic_lower_band[i]
-    
-    return supertrend
-
-
-def trade_signal(data):
-    data['Supertrend'] = supertrend(data)
-    last_row = data.iloc[-1]
-
-    print(f"Supertrend: {last_row['Supertrend']:.2f}, Close: {last_row['close']:.2f}")
+    values, _ = supertrend_np(data['high'].to_numpy(), data['low'].to_numpy(), data['close'].to_numpy(),
+                              period, multiplier)
+    return values
+
+
+def trade_signal(data, registry=None, symbol=None, interval='1m', engine=None):
+    with stage('indicators'):
+        if registry is not None:
+            last_row = registry.last_row(symbol, interval, data, ('Supertrend',))
+        elif engine is not None:
+            # Mise à jour incrémentale : seule la bougie en cours est recalculée
+            last_row = dict(engine.sync(data), close=data['close'].iloc[-1])
+        else:
+            data['Supertrend'] = supertrend(data)
+            last_row = data.iloc[-1]
+
+    emit('indicators', "Supertrend: {Supertrend:.2f}, Close: {close:.2f}",
+         symbol=symbol, Supertrend=last_row['Supertrend'], close=last_row['close'])
 
     if last_row['close'] > last_row['Supertrend']:
         return 'BUY'
@@ -99,6 +104,8 @@ def trade_signal(data):
 
 
 def select_crypto():
+    import inquirer  # Importé seulement pour le menu interactif (démarrage plus rapide)
+
     questions = [
         inquirer.List('crypto',
                       message="Choisissez la cryptomonnaie à trader",
@@ -109,36 +116,56 @@ def select_crypto():
     return answers['crypto']
 
 
+def run_iteration(bot, symbol, interval, iteration, fetch=fetch_ohlcv_cached, engine=None, guard=None):
+    with stage('tick'):
+        with stage('fetch'):
+            data = fetch(symbol, interval)
+        with stage('signal'):
+            signal = trade_signal(data, engine=engine)
+        price = data['close'].iloc[-1]
+
+        with stage('print'):
+            emit('tick', "\n--- Iteration {iteration} ---\nPrix actuel : {price:.2f} USD",
+                 iteration=iteration, symbol=symbol, price=price, signal=signal)
+
+        # Ordres sous le verrou du BotGuard : ses sorties arrivent depuis le thread du flux
+        with guard_lock(guard):
+            with stage('execution'):
+                if signal == 'BUY':
+                    bot.buy(price, iteration)
+                elif signal == 'SELL':
+                    bot.sell(price, iteration)
+                else:
+                    emit('hold', "[{iteration}] Aucune action. En attente du prochain signal...", iteration=iteration)
+
+                action = bot.manage_risk(price, iteration)
+                if action == 'SELL':
+                    bot.sell(price, iteration)
+                if guard is not None:
+                    guard.sync(iteration)
+
+            with stage('performance'):
+                bot.show_performance(price, iteration)
+    return signal
+
+
 def main():
     symbol = select_crypto()
     print(f"Vous avez sélectionné {symbol} pour le trading.")
-    
-    bot = TradingBot(initial_balance=1000)
+
+    bot = TradingBot(initial_balance=1000, journal_dir=os.path.join('journal', 'supertrend', symbol))
+    engine = IndicatorEngine(sma_periods=(), supertrend_params=(10, 3))
     interval = '1m'
+    profiler = LoopProfiler.from_env()
+
+    guard = guard_from_env(bot, symbol, interval)  # BOT_TRADE_TRIGGERS=1 : Stop-Loss/Take-Profit à chaque transaction
 
     iteration = 0
     while True:
         iteration += 1
-        data = fetch_ohlcv(symbol, interval)
-        signal = trade_signal(data)
-        price = data['close'].iloc[-1]
-
-        print(f"\n--- Iteration {iteration} ---")
-        print(f"Prix actuel : {price:.2f} USD")
-
-        if signal == 'BUY':
-            bot.buy(price, iteration)
-        elif signal == 'SELL':
-            bot.sell(price, iteration)
-        else:
-            print(f"[{iteration}] Aucune action. En attente du prochain signal...")
-
-        action = bot.manage_risk(price, iteration)
-        if action == 'SELL':
-            bot.sell(price, iteration)
-
-        bot.show_performance(price, iteration)
-        time.sleep(1)
+        run_iteration(bot, symbol, interval, iteration, engine=engine, guard=guard)
+        profiler.after_iteration(iteration)
+        wait_next_tick(interval)  # Réveil après la clôture (BOT_LIVE_POLL pour suivre la bougie en cours)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,7 @@
+"""Les tests importent les modules à la racine du dépôt (scripts plats, sans paquet)."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
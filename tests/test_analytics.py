@@ -0,0 +1,28 @@
+"""Statistiques en flux : rendements, y compris depuis une valeur nette nulle."""
+import numpy as np
+import pytest
+
+from analytics import StreamingAnalytics
+
+
+def test_returns_match_the_history():
+    values = [1000.0, 1010.0, 990.0, 1030.0, 1025.0]
+    analytics = StreamingAnalytics()
+    for value in values:
+        analytics.update_net_worth(value)
+    returns = np.diff(values) / values[:-1]
+    assert analytics.returns == len(returns)
+    assert analytics.mean == pytest.approx(returns.mean())
+    assert analytics.volatility == pytest.approx(returns.std(ddof=1))
+    assert analytics.max_drawdown == pytest.approx(990.0 / 1010.0 - 1)
+
+
+def test_zero_net_worth_is_not_skipped():
+    analytics = StreamingAnalytics()
+    for value in (100.0, 0.0, 0.0, 50.0, 60.0):
+        analytics.update_net_worth(value)
+    # 100 -> 0 : -100 % ; 0 -> 0 : 0 % ; 0 -> 50 : indéfini, ignoré ; 50 -> 60 : +20 %
+    assert analytics.returns == 3
+    assert analytics.mean == pytest.approx((-1.0 + 0.0 + 0.2) / 3)
+    assert analytics.downside_sq == pytest.approx(1.0)
+    assert analytics.max_drawdown == -1.0
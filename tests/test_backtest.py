@@ -0,0 +1,26 @@
+"""Backtest : le mode fenêtré du Supertrend rejoue la boucle en direct bougie par bougie."""
+import numpy as np
+
+import event_sink
+from backtest import supertrend_signals, windowed_supertrend
+from benchmarks.suite import synthetic_ohlcv
+from strategies import load_script
+
+SIGNALS = {'HOLD': 0, 'BUY': 1, 'SELL': 2}
+
+
+def test_windowed_supertrend_matches_the_live_window(monkeypatch):
+    monkeypatch.setattr(event_sink, '_sink', event_sink.EventSink([]))
+    supertrend = load_script('supertrend.py')
+    data = synthetic_ohlcv(400, seed=1)
+    arrays = {name: np.asarray(data[name]) for name in ('high', 'low', 'close')}
+    signals = supertrend_signals(arrays, window=100)
+    live = [SIGNALS[supertrend.trade_signal(data.iloc[i - 99:i + 1].copy())] for i in range(99, len(data))]
+    assert signals[99:].tolist() == live
+
+
+def test_windowed_supertrend_chunks_agree():
+    data = synthetic_ohlcv(3000, seed=2)
+    columns = [np.asarray(data[name]) for name in ('high', 'low', 'close')]
+    assert np.array_equal(windowed_supertrend(*columns, window=100),
+                          windowed_supertrend(*columns, window=100, chunk=37), equal_nan=True)
@@ -0,0 +1,169 @@
+"""Client Binance contre un faux serveur local : retries, Retry-After, fusion et poids."""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import binance_client
+from binance_client import KLINES_PATH, USED_WEIGHT_HEADER, BinanceClient
+
+KLINES = [[1700000000000, '1.0', '2.0', '0.5', '1.5', '10.0', 1700000059999, '15.0', 3, '0', '0', '0']]
+
+
+class FakeBinance(ThreadingHTTPServer):
+    """Serveur qui rejoue des réponses scriptées `(statut, en-têtes, corps)` puis répond 200"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeHandler)
+        self.script = []
+        self.requests = []
+        self.delay = 0.0
+        self.used_weight = None
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            status, headers, body = server.script.pop(0) if server.script else (200, {}, KLINES)
+        if server.delay:
+            time.sleep(server.delay)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if server.used_weight is not None:
+            self.send_header(USED_WEIGHT_HEADER, str(server.used_weight))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    fake = FakeBinance()
+    thread = threading.Thread(target=fake.serve_forever, daemon=True)
+    thread.start()
+    yield fake
+    fake.shutdown()
+    fake.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Attentes de retry enregistrées au lieu d'être dormies"""
+    recorded = []
+    clock = types.SimpleNamespace(sleep=recorded.append, time=time.time, monotonic=time.monotonic)
+    monkeypatch.setattr(binance_client, 'time', clock)
+    return recorded
+
+
+def error(code):
+    return {'code': code, 'msg': 'erreur simulée'}
+
+
+@pytest.mark.parametrize('status', [429, 418, 500, 503])
+def test_retries_throttling_and_server_errors(server, sleeps, status):
+    server.script = [(status, {}, error(-1003))]
+    response = BinanceClient(server.url).klines('ETHUSDT', '1m', 1)
+    assert response.json() == KLINES
+    assert len(server.requests) == 2
+    assert len(sleeps) == 1 and 0.25 <= sleeps[0] <= 0.75  # backoff_delay(0) : 0,5 s ± 50 %
+
+
+def test_gives_up_after_max_retries(server, sleeps):
+    server.script = [(503, {}, error(-1001))] * 3
+    with pytest.raises(requests.HTTPError):
+        BinanceClient(server.url, max_retries=2).klines('ETHUSDT', '1m', 1)
+    assert len(server.requests) == 3
+    assert len(sleeps) == 2
+
+
+def test_retry_after_seconds(server, sleeps):
+    server.script = [(429, {'Retry-After': '7'}, error(-1003))]
+    BinanceClient(server.url).klines('ETHUSDT', '1m', 1)
+    assert sleeps == [7.0]
+
+
+def test_retry_after_http_date(server, sleeps):
+    server.script = [(429, {'Retry-After': formatdate(time.time() + 30, usegmt=True)}, error(-1003)),
+                     (418, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}, error(-1003))]
+    BinanceClient(server.url).klines('ETHUSDT', '1m', 1)
+    assert len(server.requests) == 3
+    assert 28 <= sleeps[0] <= 30
+    assert sleeps[1] == 0.0  # Date passée : nouvelle tentative immédiate
+
+
+def test_unreadable_retry_after_falls_back_to_backoff(server, sleeps):
+    server.script = [(429, {'Retry-After': 'bientôt'}, error(-1003))]
+    BinanceClient(server.url).klines('ETHUSDT', '1m', 1)
+    assert len(sleeps) == 1 and 0.25 <= sleeps[0] <= 0.75
+
+
+def test_identical_in_flight_requests_are_coalesced(server):
+    server.delay = 0.3
+    client = BinanceClient(server.url)
+    barrier = threading.Barrier(5)
+    results = []
+
+    def fetch():
+        barrier.wait()
+        results.append(client.klines('ETHUSDT', '1m', 1).json())
+
+    threads = [threading.Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [KLINES] * 5
+    assert len(server.requests) == 1
+    assert client.coalesced == 4
+    assert not client.in_flight
+
+
+def test_different_requests_are_not_coalesced(server):
+    client = BinanceClient(server.url)
+    client.klines('ETHUSDT', '1m', 1)
+    client.klines('BTCUSDT', '1m', 1)
+    assert len(server.requests) == 2
+    assert client.coalesced == 0
+
+
+def test_used_weight_header_resyncs_the_limiter(server):
+    server.used_weight = 4700
+    client = BinanceClient(server.url, weight_limit=6000)  # Capacité : 4800 (marge de 80 %)
+    client.klines('ETHUSDT', '1m', 1)
+    assert client.used_weight == 4700
+    assert client.limiter.tokens <= 100 + 1e-6
+    # Le seau recalé impose une attente avant de dépasser la limite
+    assert client.limiter.reserve(200) > 0
+
+
+def test_api_url_redirects_the_shared_client(server):
+    code = ("from binance_client import get_client; "
+            "print(get_client().base_url, get_client().klines('ETHUSDT', '1m', 1).json()[0][0])")
+    env = dict(os.environ, BINANCE_API_URL=server.url)
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(__file__)),
+                            env=env, capture_output=True, text=True, timeout=30, check=True).stdout.split()
+    assert output == [server.url, str(KLINES[0][0])]
+    assert server.requests[0].startswith(KLINES_PATH + '?')
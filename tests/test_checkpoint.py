@@ -0,0 +1,90 @@
+"""Checkpoints : attributs persistés, historiques en colonnes, journaux incohérents."""
+import json
+import os
+
+from checkpoint import Checkpointer
+from ledger import NetWorthHistory, TradeLedger, cumulative_note, journal_path
+from strategies import load_script
+
+smart = load_script('smart.py')
+etherum_bot = load_script('etherum-bot.py')
+
+
+def trade(bot, iterations):
+    for iteration, price in enumerate(iterations, 1):
+        bot.buy(price, iteration) if iteration % 2 else bot.sell(price, iteration)
+        bot.show_performance(price, iteration)
+
+
+def test_derived_attributes_are_not_restored(tmp_path, capsys):
+    journal = str(tmp_path / 'journal')
+    bot = smart.TradingBot(1000, journal_dir=journal)
+    trade(bot, [100.0, 110.0, 105.0])
+    checkpoint = Checkpointer(str(tmp_path / 'bot.json'), bot)
+    checkpoint.save(3)
+    saved = json.load(open(checkpoint.path))['bot']
+    assert 'trades_note' not in saved and 'stop_loss_percent' not in saved
+    bot.trade_history.flush()
+    bot.net_worth_history.flush()
+
+    resumed = smart.TradingBot(1000, journal_dir=journal)
+    assert Checkpointer(checkpoint.path, resumed).restore() == 3
+    assert resumed.trades_note == cumulative_note(resumed.trade_history) != ''
+    assert resumed.balance == bot.balance and resumed.crypto_balance == bot.crypto_balance
+    assert resumed.buy_price == bot.buy_price and resumed.entry_value == bot.entry_value
+    assert len(resumed.trade_history) == 3
+    assert resumed.analytics.trades == bot.analytics.trades
+
+
+def test_short_journal_is_reported_not_raised(tmp_path, capsys):
+    journal = str(tmp_path / 'journal')
+    bot = smart.TradingBot(1000, journal_dir=journal)
+    trade(bot, [100.0, 110.0, 105.0])
+    checkpoint = Checkpointer(str(tmp_path / 'bot.json'), bot)
+    checkpoint.save(3)
+    bot.trade_history.flush()
+    # Journal tronqué après le checkpoint (copie partielle, disque plein...)
+    path = journal_path(journal, 'trades.bin')
+    with open(path, 'ab') as f:
+        f.truncate(os.path.getsize(path) // 3)
+
+    resumed = smart.TradingBot(1000, journal_dir=journal)
+    assert Checkpointer(checkpoint.path, resumed).restore() == 3
+    assert "trade_history du checkpoint ignoré" in capsys.readouterr().out
+    assert len(resumed.trade_history) == 1  # Contenu du journal sur disque
+    assert resumed.balance == bot.balance
+
+
+def test_list_histories_go_to_npz(tmp_path):
+    bot = etherum_bot.TradingBot(1000)
+    for price in (100.0, 110.0, 120.0):
+        bot.buy(price) if not bot.eth_balance else bot.sell(price)
+        bot.show_performance(price)
+    checkpoint = Checkpointer(str(tmp_path / 'bot.json'), bot)
+    checkpoint.save(3)
+    saved = json.load(open(checkpoint.path))['bot']
+    assert saved['trade_history'] == {'length': 3, 'columns': 3}
+    assert saved['net_worth_history'] == {'length': 3, 'columns': 0}
+    assert os.path.exists(checkpoint.history_path)
+
+    resumed = etherum_bot.TradingBot(1000)
+    Checkpointer(checkpoint.path, resumed).restore()
+    assert resumed.trade_history == bot.trade_history
+    assert resumed.net_worth_history == bot.net_worth_history
+    assert resumed.balance == bot.balance and resumed.eth_balance == bot.eth_balance
+
+
+def test_history_npz_ahead_of_json_is_truncated(tmp_path):
+    bot = etherum_bot.TradingBot(1000)
+    bot.show_performance(100.0)
+    checkpoint = Checkpointer(str(tmp_path / 'bot.json'), bot)
+    checkpoint.save(1)
+    state = open(checkpoint.path).read()
+    bot.show_performance(101.0)
+    checkpoint.save(2)
+    with open(checkpoint.path, 'w') as f:
+        f.write(state)  # Arrêt entre l'écriture du .npz et celle du JSON
+
+    resumed = etherum_bot.TradingBot(1000)
+    assert Checkpointer(checkpoint.path, resumed).restore() == 1
+    assert resumed.net_worth_history == [bot.net_worth_history[0]]
@@ -0,0 +1,123 @@
+"""Flux WebSocket (`KlineStream`) contre le simulateur local : livraison, reconnexion, rattrapage REST."""
+import asyncio
+import time
+
+import numpy as np
+from aiohttp import web
+
+from binance_client import BinanceClient
+from candle_cache import FIELDS, CandleCache, interval_ms
+from kline_parser import parse_klines
+from simulator import ExchangeSimulator, load_markets
+from stream import KlineStream
+
+SYMBOL = 'ETHUSDT'
+INTERVAL = '1m'
+STEP = interval_ms(INTERVAL)
+SPEED = 120  # Une bougie toutes les 0,5 s réelles
+
+
+def kline_message(open_time, close, closed=False, event_time=None):
+    return {'stream': f'{SYMBOL.lower()}@kline_{INTERVAL}', 'data': {
+        'e': 'kline', 'E': event_time or int(time.time() * 1000), 's': SYMBOL,
+        'k': {'t': open_time, 'T': open_time + STEP - 1, 'o': '1', 'h': str(close), 'l': '1',
+              'c': str(close), 'v': '1', 'x': closed}}}
+
+
+def rest_fetcher(client):
+    def fetch(symbol, interval, limit=1000, start_time=None, end_time=None):
+        return parse_klines(client.klines(symbol, interval, limit, start_time, end_time).content, FIELDS)
+    return fetch
+
+
+async def until(predicate, timeout):
+    """Attend que `predicate()` soit vrai, au plus `timeout` secondes"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.02)
+    return True
+
+
+def test_handler_error_does_not_stop_the_stream():
+    calls = []
+
+    def on_candle(symbol, cache, closed):
+        calls.append(cache.live[0])
+        if len(calls) == 1:
+            raise RuntimeError("erreur volontaire")
+
+    stream = KlineStream([SYMBOL], INTERVAL, on_candle=on_candle, caches={SYMBOL: CandleCache(SYMBOL, INTERVAL)})
+
+    async def feed():
+        await stream.handle_message(kline_message(0, 10.0))
+        await stream.handle_message(kline_message(STEP, 11.0))
+
+    asyncio.run(feed())
+    assert calls == [0, STEP]
+    assert stream.handler_errors == 1
+    cache = stream.caches[SYMBOL]
+    assert cache.size == 1 and cache.live[0] == STEP and cache.live[4] == 11.0
+
+
+def test_async_handler_error_is_isolated():
+    async def on_candle(symbol, cache, closed):
+        raise ValueError("erreur volontaire")
+
+    stream = KlineStream([SYMBOL], INTERVAL, on_candle=on_candle, caches={SYMBOL: CandleCache(SYMBOL, INTERVAL)})
+    asyncio.run(stream.handle_message(kline_message(0, 10.0)))
+    assert stream.handler_errors == 1
+    assert stream.latency_stats()['count'] == 1
+
+
+async def run_against_simulator(outage=1.5):
+    simulator = ExchangeSimulator(load_markets([SYMBOL], INTERVAL, candles=5000), INTERVAL, SPEED)
+    runner = web.AppRunner(simulator.app())
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    host, port = runner.addresses[0][:2]
+    fetch = rest_fetcher(BinanceClient(f'http://{host}:{port}'))
+    streamed = []
+
+    def on_candle(symbol, cache, closed):
+        if closed:
+            streamed.append(cache.live[0])
+
+    cache = CandleCache(SYMBOL, INTERVAL, fetcher=fetch)
+    # Le délai de reconnexion fait durer la coupure : des bougies s'y clôturent sans être diffusées
+    stream = KlineStream([SYMBOL], INTERVAL, on_candle=on_candle, url=f'ws://{host}:{port}/stream',
+                         caches={SYMBOL: cache}, reconnect_delay=outage)
+    task = asyncio.create_task(stream.run())
+    try:
+        assert await until(lambda: len(streamed) >= 3, timeout=10), "aucune bougie clôturée reçue par le flux"
+        dropped_at = simulator.now_ms()
+        assert await simulator.drop_streams() == 1
+        before = len(streamed)
+        assert await until(lambda: stream.reconnections >= 1 and len(streamed) >= before + 2, timeout=15), \
+            "pas de reconnexion après la coupure"
+        stream.stop()
+        arrays = cache.arrays()
+        # Référence REST dans un thread : le serveur tourne sur cette boucle
+        rest = await asyncio.get_running_loop().run_in_executor(None, lambda: fetch(SYMBOL, INTERVAL))
+    finally:
+        stream.stop()
+        task.cancel()
+        await runner.cleanup()
+    return streamed, dropped_at, arrays, rest, stream
+
+
+def test_stream_delivers_reconnects_and_backfills():
+    streamed, dropped_at, arrays, rest, stream = asyncio.run(run_against_simulator())
+
+    assert stream.handler_errors == 0
+    assert len(set(streamed)) == len(streamed)  # Chaque clôture livrée une seule fois
+    closed_times = arrays['open_time'][:-1]  # La dernière est la bougie en cours
+    assert np.all(np.diff(closed_times) == STEP), "trou dans les bougies après la reconnexion"
+    # Bougies clôturées pendant la coupure : absentes du flux, présentes grâce au rattrapage REST
+    missed = [t for t in closed_times if t >= dropped_at - STEP and t not in set(streamed)]
+    assert missed, "aucune bougie comblée par REST"
+    common, ours, theirs = np.intersect1d(closed_times, rest['open_time'][:-1], return_indices=True)
+    assert len(common) >= len(closed_times) - 1
+    for name in FIELDS:
+        assert np.array_equal(arrays[name][ours], rest[name][theirs]), name
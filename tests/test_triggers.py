@@ -0,0 +1,45 @@
+"""Déclencheurs à chaque transaction branchés sur la boucle de supertrend.py (`BotGuard`)."""
+import threading
+
+import event_sink
+from benchmarks.suite import synthetic_ohlcv
+from strategies import load_script
+from triggers import BotGuard, TriggerEngine, guard_from_env
+
+
+def test_guard_is_opt_in(monkeypatch):
+    monkeypatch.delenv('BOT_TRADE_TRIGGERS', raising=False)
+    assert guard_from_env(object(), 'ETHUSDT') is None
+
+
+def test_loop_syncs_the_guard_and_trade_thread_exits(monkeypatch):
+    monkeypatch.setattr(event_sink, '_sink', event_sink.EventSink([]))
+    supertrend = load_script('supertrend.py')
+    data = synthetic_ohlcv(400, seed=4)
+    for column in ('open', 'high', 'low', 'close'):
+        # Chutes de 10 % : la clôture repasse sous la bande basse, puis au-dessus (signaux d'achat)
+        data.loc[150:, column] *= 0.9
+        data.loc[250:, column] *= 0.9
+    bot = supertrend.TradingBot(1000, stop_loss_percent=0.5, take_profit_percent=0.5)  # Hors de portée du close
+    guard = BotGuard(TriggerEngine(), bot, 'ETHUSDT')
+    position = [100]
+
+    def fetch(symbol, interval):
+        return data.iloc[position[0] - 100:position[0]].copy()
+
+    exits = 0
+    for iteration in range(1, 300):
+        supertrend.run_iteration(bot, 'ETHUSDT', '1m', iteration, fetch=fetch, guard=guard)
+        position[0] += 1
+        if bot.crypto_balance > 0:
+            assert guard.engine.pending('ETHUSDT') == 2
+            # Prix sous le Stop-Loss reçu par le thread du flux entre deux itérations
+            stop = bot.buy_price * (1 - bot.stop_loss_percent)
+            thread = threading.Thread(target=guard.on_trade, args=('ETHUSDT', stop * 0.99, 0))
+            thread.start()
+            thread.join()
+            assert bot.crypto_balance == 0 and bot.balance > 0
+            assert guard.engine.pending('ETHUSDT') == 0
+            exits += 1
+    assert exits > 0
+    assert bot.analytics.trades == exits
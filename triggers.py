@@ -0,0 +1,247 @@
+"""Moteur de déclencheurs Stop-Loss / Take-Profit au niveau de chaque transaction.
+
+`manage_risk()` ne compare que la dernière clôture aux niveaux, une fois par
+itération : un mouvement rapide entre deux requêtes peut traverser le stop
+sans être vu. Ici les niveaux de toutes les positions ouvertes sont rangés,
+par symbole, dans deux tas :
+- les déclencheurs « en dessous » (Stop-Loss d'un achat) dans un tas max,
+- les déclencheurs « au-dessus » (Take-Profit d'un achat) dans un tas min.
+Chaque prix reçu (flux `@trade`) ne consulte que le sommet de chaque tas ; un
+déclenchement coûte O(log n). Les annulations sont paresseuses : l'entrée
+reste dans le tas et est ignorée quand elle remonte au sommet.
+
+La latence de réaction (réception du prix -> fin de l'ordre de sortie) est
+mesurée dans un histogramme (profiling.py).
+
+Les boucles de smart.py et supertrend.py peuvent l'activer avec
+`BOT_TRADE_TRIGGERS=1` : `guard_from_env()` lance le flux `@trade` dans un
+thread et la boucle synchronise le `BotGuard` après ses ordres. Sans la
+variable, seul `manage_risk()` (à la clôture) protège la position.
+"""
+import contextlib
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from event_sink import emit
+from profiling import Histogram
+
+BELOW, ABOVE = 'below', 'above'
+
+
+class Trigger:
+    """Niveau de prix surveillé ; `callback(trigger, price)` est appelé une seule fois"""
+
+    __slots__ = ('symbol', 'level', 'direction', 'callback', 'kind', 'group', 'active', 'fired_price')
+
+    def __init__(self, symbol, level, direction, callback, kind='', group=None):
+        self.symbol = symbol
+        self.level = level
+        self.direction = direction
+        self.callback = callback
+        self.kind = kind  # 'stop_loss', 'take_profit'...
+        self.group = group  # Déclencheurs liés (OCO) : un déclenchement annule les autres
+        self.active = True
+        self.fired_price = None
+
+
+class TriggerEngine:
+    """Déclencheurs de tous les symboles"""
+
+    def __init__(self):
+        self.below = {}  # symbole -> tas de (-niveau, seq, Trigger)
+        self.above = {}  # symbole -> tas de (niveau, seq, Trigger)
+        self.groups = {}  # groupe -> [Trigger]
+        self.counter = itertools.count()
+        self.reaction = Histogram()  # ns entre la réception du prix et la fin du callback
+        self.event_latency = Histogram()  # ns entre l'heure de l'événement et le déclenchement
+        self.fired = 0
+
+    def add(self, symbol, level, direction, callback, kind='', group=None):
+        trigger = Trigger(symbol, level, direction, callback, kind, group)
+        if direction == BELOW:
+            heapq.heappush(self.below.setdefault(symbol, []), (-level, next(self.counter), trigger))
+        elif direction == ABOVE:
+            heapq.heappush(self.above.setdefault(symbol, []), (level, next(self.counter), trigger))
+        else:
+            raise ValueError(f"Direction inconnue : {direction}")
+        if group is not None:
+            self.groups.setdefault(group, []).append(trigger)
+        return trigger
+
+    def bracket(self, symbol, entry_price, stop_loss_percent, take_profit_percent, callback, side='long',
+                group=None):
+        """Stop-Loss + Take-Profit liés d'une position (annulation mutuelle)"""
+        group = group if group is not None else next(self.counter)
+        if side == 'long':
+            stop = self.add(symbol, entry_price * (1 - stop_loss_percent), BELOW, callback, 'stop_loss', group)
+            take = self.add(symbol, entry_price * (1 + take_profit_percent), ABOVE, callback, 'take_profit', group)
+        else:
+            stop = self.add(symbol, entry_price * (1 + stop_loss_percent), ABOVE, callback, 'stop_loss', group)
+            take = self.add(symbol, entry_price * (1 - take_profit_percent), BELOW, callback, 'take_profit', group)
+        return stop, take
+
+    def cancel(self, trigger):
+        """Annulation paresseuse (retirée du tas lorsqu'elle arrive au sommet)"""
+        trigger.active = False
+
+    def cancel_group(self, group):
+        for trigger in self.groups.pop(group, ()):
+            trigger.active = False
+
+    def _pop_crossed(self, heap, crossed):
+        """Retire du tas les déclencheurs franchis (et les annulés rencontrés au sommet)"""
+        hits = []
+        while heap:
+            key, _, trigger = heap[0]
+            if not trigger.active:
+                heapq.heappop(heap)
+            elif crossed(key):
+                heapq.heappop(heap)
+                hits.append(trigger)
+            else:
+                break
+        return hits
+
+    def on_price(self, symbol, price, event_time_ms=None):
+        """Prix reçu (transaction ou mise à jour) : exécute les déclencheurs franchis"""
+        received = time.perf_counter_ns()
+        hits = self._pop_crossed(self.below.get(symbol, []), lambda key: price <= -key)
+        hits += self._pop_crossed(self.above.get(symbol, []), lambda key: price >= key)
+        fired = []
+        for trigger in hits:
+            if not trigger.active:  # Annulé par un déclencheur lié de ce même prix
+                continue
+            trigger.active = False
+            trigger.fired_price = price
+            if trigger.group is not None:
+                self.cancel_group(trigger.group)
+            trigger.callback(trigger, price)
+            fired.append(trigger)
+            self.fired += 1
+            self.reaction.record(time.perf_counter_ns() - received)
+            if event_time_ms is not None:
+                self.event_latency.record(max(0, int((time.time() * 1000 - event_time_ms) * 1e6)))
+        return fired
+
+    def pending(self, symbol=None):
+        """Nombre de déclencheurs actifs"""
+        heaps = [self.below, self.above]
+        symbols = [symbol] if symbol is not None else set(self.below) | set(self.above)
+        return sum(1 for heap_by_symbol in heaps for s in symbols
+                   for _, _, trigger in heap_by_symbol.get(s, ()) if trigger.active)
+
+    def stats(self):
+        return {'fired': self.fired, 'pending': self.pending(),
+                'reaction': self.reaction.summary(), 'event_latency': self.event_latency.summary()}
+
+
+class BotGuard:
+    """Relie un `TradingBot` de smart.py / supertrend.py au moteur de déclencheurs
+
+    `sync()` après chaque ordre pose (ou annule) le bracket Stop-Loss/Take-Profit
+    de la position ; le déclencheur vend immédiatement au prix qui l'a franchi.
+    `lock` sérialise les ordres quand les prix arrivent dans un autre thread.
+    """
+
+    def __init__(self, engine, bot, symbol):
+        self.engine = engine
+        self.bot = bot
+        self.symbol = symbol
+        self.group = None
+        self.iteration = 0
+        self.lock = threading.RLock()
+
+    def on_trade(self, symbol, price, trade_time):
+        """Callback `on_trade` de `KlineStream`"""
+        with self.lock:
+            if self.engine.on_price(symbol, price, trade_time):
+                self.sync()
+
+    def sync(self, iteration=None):
+        if iteration is not None:
+            self.iteration = iteration
+        if self.group is not None and (self.bot.crypto_balance == 0 or self.group[2] != self.bot.buy_price):
+            # Position fermée (ou reprise à un autre prix) depuis le dernier appel
+            self.engine.cancel_group(self.group)
+            self.group = None
+        if self.bot.crypto_balance > 0 and self.group is None:
+            self.group = ('guard', id(self), self.bot.buy_price)
+            self.engine.bracket(self.symbol, self.bot.buy_price, self.bot.stop_loss_percent,
+                                self.bot.take_profit_percent, self._exit, group=self.group)
+
+    def _exit(self, trigger, price):
+        label = 'Stop-Loss' if trigger.kind == 'stop_loss' else 'Take-Profit'
+        emit('risk', "[{iteration}] {label} déclenché à {price:.2f} USD (niveau {level:.2f}). Vente effectuée.",
+             trigger=trigger.kind, label=label, iteration=self.iteration, symbol=self.symbol, price=price,
+             level=trigger.level)
+        self.bot.sell(price, self.iteration)
+        self.group = None
+
+
+def guard_from_env(bot, symbol, interval='1m'):
+    """`BotGuard` alimenté par le flux `@trade` dans un thread si `BOT_TRADE_TRIGGERS` est défini, sinon None"""
+    if not os.environ.get('BOT_TRADE_TRIGGERS'):
+        return None
+    import asyncio
+
+    from stream import KlineStream
+
+    guard = BotGuard(TriggerEngine(), bot, symbol)
+    stream = KlineStream([symbol], interval, on_trade=guard.on_trade, trades=True)
+    threading.Thread(target=asyncio.run, args=(stream.run(),), name='trade-triggers', daemon=True).start()
+    return guard
+
+
+def guard_lock(guard):
+    """Verrou des ordres du bot : celui du `BotGuard`, ou aucun sans surveillance"""
+    return guard.lock if guard is not None else contextlib.nullcontext()
+
+
+def main():
+    """smart.py sur le flux : signal à chaque clôture de bougie, sorties à chaque transaction"""
+    import argparse
+    import asyncio
+
+    from smart import TradingBot, combined_trade_signal
+    from indicators import IndicatorEngine
+    from stream import KlineStream
+
+    parser = argparse.ArgumentParser(description="Stop-Loss / Take-Profit déclenchés à chaque transaction")
+    parser.add_argument('symbol', nargs='?', default='ETHUSDT')
+    parser.add_argument('--interval', default='1m')
+    args = parser.parse_args()
+
+    engine = TriggerEngine()
+    bot = TradingBot(initial_balance=1000)
+    guard = BotGuard(engine, bot, args.symbol)
+    indicators = IndicatorEngine(sma_periods=())
+    iteration = 0
+
+    def on_candle(symbol, cache, closed):
+        nonlocal iteration
+        if not closed:
+            return
+        iteration += 1
+        data = cache.frame(100)
+        signal = combined_trade_signal(data, indicators)
+        price = data['close'].iloc[-1]
+        if signal == 'BUY':
+            bot.buy(price, iteration)
+        elif signal == 'SELL':
+            bot.sell(price, iteration)
+        guard.sync(iteration)
+        bot.show_performance(price, iteration)
+        print(f"Réaction des déclencheurs : {engine.reaction.summary()}")
+
+    stream = KlineStream([args.symbol], args.interval, on_candle=on_candle, on_trade=guard.on_trade, trades=True)
+    try:
+        asyncio.run(stream.run())
+    except KeyboardInterrupt:
+        print(engine.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Indicateurs vectorisés sur des tableaux NumPy.
+
+Les fonctions travaillent sur le dernier axe : un tableau 1D (une série) ou un
+tableau 2D (symboles x temps) est traité en un seul appel.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def rolling_reduce(values, period, reducer):
+    """Applique `reducer` sur une fenêtre glissante, NaN tant que la fenêtre est incomplète"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= period:
+        windows = sliding_window_view(values, period, axis=-1)
+        out[..., period - 1:] = reducer(windows, axis=-1)
+    return out
+
+
+def forward_fill_state(events, initial):
+    """Propage le dernier événement non nul (+1 / -1) le long du dernier axe"""
+    events = np.array(events, dtype=np.int8)
+    events[..., 0] = np.where(events[..., 0] != 0, events[..., 0], initial)
+    positions = np.where(events != 0, np.arange(events.shape[-1]), 0)
+    np.maximum.accumulate(positions, axis=-1, out=positions)
+    return np.take_along_axis(events, positions, axis=-1)
+
+
+def supertrend_np(high, low, close, period=10, multiplier=3):
+    """Supertrend identique à `supertrend()` de supertrend.py, sans boucle Python
+
+    Renvoie (supertrend, in_uptrend). Accepte des tableaux 1D ou 2D (symboles x temps).
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    atr = rolling_reduce(high, period, np.max) - rolling_reduce(low, period, np.min)
+    hl2 = (high + low) / 2
+    basic_upper_band = hl2 + (multiplier * atr)
+    basic_lower_band = hl2 - (multiplier * atr)
+
+    # La tendance ne change que lorsque la clôture franchit la bande de la bougie précédente
+    events = np.zeros(close.shape, dtype=np.int8)
+    crosses_up = close[..., 1:] > basic_upper_band[..., :-1]
+    crosses_down = close[..., 1:] < basic_lower_band[..., :-1]
+    events[..., 1:] = np.where(crosses_up, 1, np.where(crosses_down, -1, 0))
+    in_uptrend = forward_fill_state(events, initial=1) > 0
+
+    supertrend = np.where(in_uptrend, basic_upper_band, basic_lower_band)
+    supertrend[..., 0] = 0
+    return supertrend, in_uptrend
+
+
+def sma_np(close, period):
+    """Équivalent de `simple_moving_average()` (rolling mean)"""
+    return rolling_reduce(close, period, np.mean)
+
+
+def rsi_np(close, period=14):
+    """Équivalent de `rsi()` : moyennes simples des gains et pertes"""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.zeros(close.shape)
+    delta[..., 1:] = np.diff(close, axis=-1)  # La première variation compte pour 0, comme dans pandas
+    gain = rolling_reduce(np.maximum(delta, 0), period, np.mean)
+    loss = rolling_reduce(np.maximum(-delta, 0), period, np.mean)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
+
+
+def ema_np(values, span, block=128):
+    """Équivalent de `ewm(span=span, adjust=False).mean()` sans boucle par élément
+
+    La récurrence est résolue par blocs : une multiplication matricielle calcule
+    la contribution interne de chaque bloc, puis l'état est propagé d'un bloc
+    à l'autre (n / block itérations seulement). Les valeurs ne doivent pas
+    contenir de NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    if n == 0:
+        return values.copy()
+    alpha = 2 / (span + 1)
+    decay = 1 - alpha
+
+    blocks = -(-n // block)
+    padded = np.zeros(values.shape[:-1] + (blocks * block,))
+    padded[..., :n] = values
+    padded = padded.reshape(values.shape[:-1] + (blocks, block))
+
+    # kernel[i, j] = alpha * decay^(i-j) pour j <= i
+    steps = np.arange(block)
+    lags = steps[:, None] - steps[None, :]
+    kernel = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+    inner = padded @ kernel.T
+
+    # Report de l'état d'un bloc au suivant ; l'état initial vaut la première valeur
+    carry_weights = decay ** (steps + 1)
+    carries = np.empty(values.shape[:-1] + (blocks,))
+    carry = values[..., 0]
+    for b in range(blocks):
+        carries[..., b] = carry
+        carry = inner[..., b, -1] + carry_weights[-1] * carry
+    result = inner + carry_weights * carries[..., None]
+    return result.reshape(values.shape[:-1] + (blocks * block,))[..., :n]
+
+
+def macd_np(close, fast_period=12, slow_period=26, signal_period=9):
+    """Équivalent de `macd()` : renvoie (macd_line, signal_line)"""
+    macd_line = ema_np(close, fast_period) - ema_np(close, slow_period)
+    return macd_line, ema_np(macd_line, signal_period)